@@ -0,0 +1,135 @@
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class AnswerCache:
+    """
+    Size-bounded LRU cache of generated answers for near-duplicate questions.
+
+    An entry matches when the retrieved chunk IDs, model and prompt version are identical
+    and the cosine similarity of the query embeddings is at least `similarity_threshold`.
+    Entries belong to a scope (the collection or multi-collection view searched) and are
+    stamped with that scope's corpus version; when the version changes (any ingestion,
+    deletion or clear) only that scope's entries are dropped.
+    """
+
+    def __init__(self, max_entries: int = 1000, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # scope -> corpus version its entries were built from
+        self._corpus_versions: Dict[str, int] = {}
+        # entry id -> (key, normalized query embedding, tokens); the key starts with the scope
+        self._entries: "OrderedDict[str, Tuple[tuple, np.ndarray, List[str]]]" = OrderedDict()
+        self._by_key: Dict[tuple, set] = {}
+        self._by_scope: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(scope: str, chunk_ids: Sequence[str], model: str, prompt_version: str) -> tuple:
+        return scope, tuple(chunk_ids), model, prompt_version
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _remove(self, entry_id: str):
+        # Called with the lock held
+        key = self._entries.pop(entry_id)[0]
+        for index, group_key in ((self._by_key, key), (self._by_scope, key[0])):
+            group = index[group_key]
+            group.discard(entry_id)
+            if not group:
+                del index[group_key]
+
+    def _check_corpus_version(self, scope: str, corpus_version: int):
+        # Called with the lock held
+        previous = self._corpus_versions.get(scope)
+        if corpus_version != previous:
+            stale = list(self._by_scope.get(scope, ()))
+            if stale:
+                logger.info(f"Corpus of {scope} changed ({previous} -> {corpus_version}), dropping {len(stale)} cached answers")
+                self.invalidations += 1
+            for entry_id in stale:
+                self._remove(entry_id)
+            self._corpus_versions[scope] = corpus_version
+
+    def lookup(
+            self,
+            query_embedding,
+            chunk_ids: Sequence[str],
+            model: str,
+            prompt_version: str,
+            scope: str,
+            corpus_version: int
+    ) -> Optional[List[str]]:
+        """Return the cached token stream of a matching answer, or None"""
+        key = self._make_key(scope, chunk_ids, model, prompt_version)
+        query = self._normalize(query_embedding)
+        with self._lock:
+            self._check_corpus_version(scope, corpus_version)
+            best_id, best_similarity = None, self.similarity_threshold
+            for entry_id in self._by_key.get(key, ()):
+                similarity = float(np.dot(query, self._entries[entry_id][1]))
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_id)
+            return list(self._entries[best_id][2])
+
+    def store(
+            self,
+            query_embedding,
+            chunk_ids: Sequence[str],
+            model: str,
+            prompt_version: str,
+            scope: str,
+            corpus_version: int,
+            tokens: List[str]
+    ):
+        key = self._make_key(scope, chunk_ids, model, prompt_version)
+        with self._lock:
+            previous = self._corpus_versions.get(scope)
+            if previous is not None and corpus_version < previous:
+                # The corpus changed while this answer was generated
+                return
+            self._check_corpus_version(scope, corpus_version)
+            entry_id = uuid.uuid4().hex
+            self._entries[entry_id] = (key, self._normalize(query_embedding), list(tokens))
+            self._by_key.setdefault(key, set()).add(entry_id)
+            self._by_scope.setdefault(scope, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_key.clear()
+            self._by_scope.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,397 @@
+import math
+import os
+import pickle
+import re
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Postings up to this length are scored whole; impact bands only pay off for long ones
+SHORT_POSTINGS = 1024
+NO_BANDS = (None, None, None, np.empty(0, dtype=np.float32), None)
+
+# Very frequent function words carry almost no BM25 weight but have the longest
+# posting lists, so dropping them keeps lexical lookups fast on large corpora.
+STOPWORDS = frozenset("""
+a an and are as at be been by can do does for from has have how i if in into is it its
+may must not of on or shall should such than that the their them there these they this
+those to was were what when where which who whom why will with would
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse several ranked ID lists: each ID scores sum(1 / (k + rank)) over the lists it appears in.
+    Returns (id, score) pairs, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    In-process inverted index scored with Okapi BM25.
+
+    Postings are compact typed arrays (document index, term frequency) per term, sorted
+    by document index, and are scored with numpy into a reused corpus-sized accumulator.
+    Searches are score-at-a-time over impact-ordered postings: each query term's
+    postings are banded by term frequency, bands are scored highest bound first, and
+    scoring stops once no unseen document can reach the current top k. The remaining
+    contributions are then only looked up for the documents already scored, so the long
+    postings of common terms are rarely scanned in full. Results are exact unless
+    `max_scored_postings` is set and reached: scoring then stops there and only the best
+    documents so far are completed, so a query of common terms only costs a bounded
+    amount of work.
+    Deleted documents are tombstoned and physically dropped by `compact`, which runs
+    automatically once a quarter of the documents are dead.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_scored_postings: Optional[int] = None):
+        self.k1 = k1
+        self.b = b
+        self.max_scored_postings = max_scored_postings
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._ids: List[str] = []
+            self._id_to_idx: Dict[str, int] = {}
+            self._doc_len = array('f')
+            self._alive = bytearray()
+            self._postings: Dict[str, Tuple[array, array]] = {}
+            self._live_count = 0
+            self._live_total_len = 0
+            # term -> tombstoned postings, computed on demand and reset whenever documents are removed
+            self._dead_postings: Dict[str, int] = {}
+            # term -> postings in impact order, see `_impact_groups`
+            self._impacts: Dict[str, tuple] = {}
+            self._scores: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]):
+        """Index documents, replacing any previous version of the same IDs"""
+        with self._lock:
+            self.remove([doc_id for doc_id in ids if doc_id in self._id_to_idx])
+            # Group the batch's postings per term first, then extend each typed array once
+            batch_postings: Dict[str, Tuple[List[int], List[int]]] = {}
+            for doc_id, text in zip(ids, texts):
+                terms = Counter(tokenize(text))
+                doc_len = sum(terms.values())
+                idx = len(self._ids)
+                self._ids.append(doc_id)
+                self._id_to_idx[doc_id] = idx
+                self._doc_len.append(doc_len)
+                self._alive.append(1)
+                self._live_count += 1
+                self._live_total_len += doc_len
+                for term, tf in terms.items():
+                    postings = batch_postings.get(term)
+                    if postings is None:
+                        batch_postings[term] = ([idx], [tf])
+                    else:
+                        postings[0].append(idx)
+                        postings[1].append(tf)
+
+            for term, (doc_idx, tfs) in batch_postings.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    self._postings[term] = (array('i', doc_idx), array('f', tfs))
+                else:
+                    postings[0].extend(doc_idx)
+                    postings[1].extend(tfs)
+
+    def remove(self, ids: Sequence[str]):
+        with self._lock:
+            for doc_id in ids:
+                idx = self._id_to_idx.pop(doc_id, None)
+                if idx is None:
+                    continue
+                self._dead_postings.clear()
+                self._alive[idx] = 0
+                self._live_count -= 1
+                self._live_total_len -= int(self._doc_len[idx])
+            if len(self._ids) - self._live_count > max(1000, len(self._ids) // 4):
+                self.compact()
+
+    def compact(self):
+        """Drop tombstoned documents from all postings and renumber the survivors"""
+        with self._lock:
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            remap = np.cumsum(alive, dtype=np.int64) - 1
+            new_postings = {}
+            for term, (doc_idx, tfs) in self._postings.items():
+                idx = np.frombuffer(doc_idx, dtype=np.int32)
+                keep = alive[idx]
+                if keep.any():
+                    new_postings[term] = (
+                        array('i', remap[idx[keep]].astype(np.int32).tobytes()),
+                        array('f', np.frombuffer(tfs, dtype=np.float32)[keep].tobytes())
+                    )
+            doc_len = np.frombuffer(self._doc_len, dtype=np.float32)[alive]
+            self._ids = [doc_id for doc_id, is_alive in zip(self._ids, alive) if is_alive]
+            self._id_to_idx = {doc_id: i for i, doc_id in enumerate(self._ids)}
+            self._doc_len = array('f', doc_len.tobytes())
+            self._alive = bytearray(b'\x01' * len(self._ids))
+            self._postings = new_postings
+            self._dead_postings.clear()
+            self._impacts.clear()
+            logger.info(f"Compacted BM25 index to {len(self._ids)} documents")
+
+    def _document_frequency(self, term: str, idx: np.ndarray, alive: np.ndarray) -> int:
+        """Live documents containing the term; called with the lock held"""
+        if self._live_count == len(self._ids):
+            return len(idx)
+        dead = self._dead_postings.get(term)
+        if dead is None:
+            dead = len(idx) - int(np.count_nonzero(alive[idx]))
+            self._dead_postings[term] = dead
+        return len(idx) - dead
+
+    def _impact_groups(self, term: str, idx: np.ndarray, tf: np.ndarray, doc_len: np.ndarray):
+        """
+        The term's postings in impact order: banded by term frequency (1, 2-3, 4-7, ...),
+        highest band first and shortest documents first within a band, as (doc idx, tf,
+        band offsets, highest tf per band, shortest document per band). Built on first use
+        and kept until the term's postings change; called with the lock held.
+        """
+        groups = self._impacts.get(term)
+        if groups is None or groups[2][-1] != len(idx):
+            band = np.log2(tf).astype(np.int32)
+            order = np.lexsort((doc_len[idx], -band))
+            by_impact = idx[order]
+            offsets = np.concatenate(([0], np.flatnonzero(np.diff(band[order])) + 1, [len(idx)]))
+            groups = (
+                by_impact,
+                tf[order],
+                offsets,
+                np.maximum.reduceat(tf[order], offsets[:-1]),
+                np.minimum.reduceat(doc_len[by_impact], offsets[:-1])
+            )
+            self._impacts[term] = groups
+        return groups
+
+    def _score_buffer(self) -> np.ndarray:
+        """Per-document score accumulator, all zeros between searches; called with the lock held"""
+        if self._scores is None or len(self._scores) < len(self._ids):
+            self._scores = np.zeros(len(self._ids) + len(self._ids) // 4 + 1024, dtype=np.float64)
+        return self._scores
+
+    def _term_scores(self, idf: float, tf, doc_len, avg_len: float):
+        norm = self.k1 * (1.0 - self.b + self.b * doc_len / avg_len)
+        return idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+    def _complete_scores(self, scores: np.ndarray, docs: np.ndarray, term_postings: list, positions: List[int], doc_len: np.ndarray, avg_len: float) -> np.ndarray:
+        """Scores of `docs` plus what the bands not scored yet add, looked up in the doc-ordered postings"""
+        totals = scores[docs]
+        for (idf, idx, tf, (_, _, _, band_tf, _), _), position in zip(term_postings, positions):
+            if position == len(band_tf) or not len(docs):
+                continue
+            found_at = np.minimum(np.searchsorted(idx, docs), len(idx) - 1)
+            found = (idx[found_at] == docs) & (tf[found_at] <= band_tf[position])
+            totals[found] += self._term_scores(idf, tf[found_at[found]], doc_len[docs[found]], avg_len)
+        return totals
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Return up to k (id, score) pairs, best first"""
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self._live_count or k <= 0:
+                return []
+            n_docs = self._live_count
+            avg_len = self._live_total_len / n_docs or 1.0
+            doc_len = np.frombuffer(self._doc_len, dtype=np.float32)
+            alive = np.frombuffer(self._alive, dtype=np.uint8)
+            has_tombstones = self._live_count < len(self._ids)
+
+            # Per term: idf, doc-ordered postings, impact bands and, per band, the most a
+            # document of that band or a later one can gain from the term
+            term_postings = []
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                idx = np.frombuffer(postings[0], dtype=np.int32)
+                df = self._document_frequency(term, idx, alive)
+                if not df:
+                    continue
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                tf = np.frombuffer(postings[1], dtype=np.float32)
+                if len(idx) <= SHORT_POSTINGS:
+                    term_postings.append((idf, idx, tf, NO_BANDS, np.zeros(1)))
+                    continue
+                groups = self._impact_groups(term, idx, tf, doc_len)
+                bounds = self._term_scores(idf, groups[3].astype(np.float64), groups[4], avg_len)
+                remaining = np.append(np.maximum.accumulate(bounds[::-1])[::-1], 0.0)
+                term_postings.append((idf, idx, tf, groups, remaining))
+            if not term_postings:
+                return []
+
+            scores = self._score_buffer()
+            scored, candidate_count, scored_postings = [], 0, 0
+            # The best partially scored documents; their complete scores bound the final k-th score from below
+            leaders = np.empty(0, dtype=np.int32)
+            positions = [0] * len(term_postings)
+            out_of_budget = False
+            try:
+                short = [(idf, idx, tf) for idf, idx, tf, groups, _ in term_postings if groups is NO_BANDS]
+                if short:
+                    docs = np.concatenate([idx for _, idx, _ in short])
+                    gains = np.concatenate([self._term_scores(idf, tf, doc_len[idx], avg_len) for idf, idx, tf in short])
+                    if has_tombstones:
+                        keep = alive[docs].view(bool)
+                        docs, gains = docs[keep], gains[keep]
+                    np.add.at(scores, docs, gains)
+                    new = np.unique(docs)
+                    scored.append(new)
+                    candidate_count, scored_postings = len(new), len(docs)
+                    leaders = new if len(new) <= 4 * k else new[np.argpartition(-scores[new], 4 * k - 1)[:4 * k]]
+                # Score the band with the highest bound until no unseen document can reach the top k
+                while True:
+                    next_bounds = [entry[4][position] for entry, position in zip(term_postings, positions)]
+                    unseen_bound = sum(next_bounds)
+                    if unseen_bound <= 0.0:
+                        break
+                    if len(leaders) >= k:
+                        totals = self._complete_scores(scores, leaders, term_postings, positions, doc_len, avg_len)
+                        if unseen_bound <= np.partition(totals, len(totals) - k)[len(totals) - k]:
+                            break
+                    term = max(range(len(term_postings)), key=next_bounds.__getitem__)
+                    idf, _, _, (by_impact, tf_by_impact, offsets, _, _), _ = term_postings[term]
+                    band = positions[term]
+                    docs = by_impact[offsets[band]:offsets[band + 1]]
+                    tf = tf_by_impact[offsets[band]:offsets[band + 1]]
+                    if has_tombstones:
+                        keep = alive[docs].view(bool)
+                        docs, tf = docs[keep], tf[keep]
+                    # Scores are positive, so a zero marks a document not scored yet
+                    new = docs[scores[docs] == 0.0]
+                    if self.max_scored_postings and scored_postings + len(docs) > self.max_scored_postings:
+                        # Out of budget: only the best documents so far are completed, topped up
+                        # with the band's highest-impact documents when fewer than k were scored
+                        out_of_budget = True
+                        leaders = np.concatenate((leaders, new[:max(0, k - len(leaders))]))
+                        break
+                    scores[docs] += self._term_scores(idf, tf, doc_len[docs], avg_len)
+                    scored.append(new)
+                    candidate_count += len(new)
+                    scored_postings += len(docs)
+                    positions[term] = band + 1
+                    # Only the documents just scored gained, so the leaders are among them and the previous ones
+                    pool = np.concatenate((leaders, docs))
+                    if len(pool) > 4 * k:
+                        pool = pool[np.argpartition(-scores[pool], 4 * k - 1)[:4 * k]]
+                    leaders = np.unique(pool)
+
+                scored = np.concatenate(scored) if scored else np.empty(0, dtype=np.int32)
+                candidates = scored
+                if out_of_budget:
+                    if len(candidates) > 25 * k:
+                        candidates = candidates[np.argpartition(-scores[candidates], 25 * k - 1)[:25 * k]]
+                    candidates = np.union1d(leaders, candidates)
+                elif len(leaders) >= k:
+                    # Candidates that cannot reach the leaders' k-th complete score need no lookups
+                    unseen_bound = sum(entry[4][position] for entry, position in zip(term_postings, positions))
+                    totals = self._complete_scores(scores, leaders, term_postings, positions, doc_len, avg_len)
+                    threshold = np.partition(totals, len(totals) - k)[len(totals) - k]
+                    candidates = candidates[scores[candidates] + unseen_bound >= threshold]
+                    # Walking a term's unscored bands beats looking up many candidates one by one;
+                    # every scored document is a candidate here, so a nonzero score marks one
+                    for term, (idf, _, _, (by_impact, tf_by_impact, offsets, band_tf, _), _) in enumerate(term_postings):
+                        if positions[term] == len(band_tf):
+                            continue
+                        rest = offsets[positions[term]]
+                        if len(by_impact) - rest < 20 * len(candidates):
+                            docs, tf = by_impact[rest:], tf_by_impact[rest:]
+                            hit = scores[docs] > 0.0
+                            docs = docs[hit]
+                            scores[docs] += self._term_scores(idf, tf[hit], doc_len[docs], avg_len)
+                            positions[term] = len(band_tf)
+                values = self._complete_scores(scores, candidates, term_postings, positions, doc_len, avg_len)
+            finally:
+                for docs in (scored if isinstance(scored, list) else [scored]):
+                    scores[docs] = 0.0
+
+            top = min(k, len(candidates))
+            if not top:
+                return []
+            best = np.argpartition(-values, top - 1)[:top]
+            best = best[np.argsort(-values[best])]
+            return [(self._ids[candidates[i]], float(values[i])) for i in best]
+
+    def save(self, path: str, fingerprint: Optional[Dict[str, Any]] = None):
+        """
+        Write the index to a file atomically so a restart can load it instead of rebuilding.
+        `fingerprint` describes the corpus the index was built from and is handed back by `load`.
+        """
+        path = Path(path)
+        with self._lock:
+            state = {
+                'fingerprint': fingerprint,
+                'k1': self.k1,
+                'b': self.b,
+                'ids': self._ids,
+                'doc_len': self._doc_len,
+                'alive': self._alive,
+                'postings': self._postings,
+                'live_count': self._live_count,
+                'live_total_len': self._live_total_len
+            }
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        logger.info(f"Saved BM25 index with {self._live_count} documents to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> Optional[Tuple["BM25Index", Optional[Dict[str, Any]]]]:
+        """Load an index written by `save` with its fingerprint, or None if there is no usable file"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logger.error(f"Could not load BM25 index {path}: {e}")
+            return None
+        index = cls(k1=state['k1'], b=state['b'])
+        index._ids = state['ids']
+        index._id_to_idx = {doc_id: i for i, doc_id in enumerate(index._ids) if state['alive'][i]}
+        index._doc_len = state['doc_len']
+        index._alive = state['alive']
+        index._postings = state['postings']
+        index._live_count = state['live_count']
+        index._live_total_len = state['live_total_len']
+        logger.info(f"Loaded BM25 index with {index._live_count} documents from {path}")
+        return index, state.get('fingerprint')
+
+    def rebuild_from_collection(self, collection, batch_size: int = 1000):
+        """(Re)build the index by paging through the texts stored in a Chroma collection"""
+        with self._lock:
+            self.clear()
+            offset = 0
+            while True:
+                page = collection.get(include=["documents"], limit=batch_size, offset=offset)
+                if not page['ids']:
+                    break
+                self.add(page['ids'], page['documents'])
+                offset += len(page['ids'])
+            logger.info(f"Built BM25 index with {self._live_count} documents and {len(self._postings)} terms")
@@ -0,0 +1,110 @@
+import math
+import threading
+from typing import List, Dict
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+TRUNCATION_MARKER = " [...]"
+# A message cut below this many tokens is dropped instead
+MIN_PARTIAL_TURN_TOKENS = 32
+
+
+def _get_encoding():
+    """
+    Load the tokenizer on first use rather than at import: tiktoken may download the
+    vocabulary the first time. Returns None if it cannot be loaded.
+    """
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            try:
+                # phi4 uses a cl100k-style BPE vocabulary, so tiktoken gives close counts
+                import tiktoken
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:  # encoding unavailable offline
+                logger.warning(f"Could not load the tiktoken encoding, estimating 4 characters per token: {e}")
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count prompt tokens, approximating 4 characters per token without tiktoken"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the beginning of the text within max_tokens, marking that it was cut"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max(max_tokens - count_tokens(TRUNCATION_MARKER), 0)
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:budget]) + TRUNCATION_MARKER
+    return text[:budget * 4] + TRUNCATION_MARKER
+
+
+class ContextPacker:
+    """
+    Packs retrieved chunks and chat history into fixed token budgets so the prompt
+    size per turn stays bounded however long a conversation runs.
+
+    Chunks are kept in the order given (best first), de-duplicated, and added until
+    the context budget is used. History is taken newest first: the most recent
+    `full_turns` messages are kept verbatim, older ones are compressed to at most
+    `old_turn_tokens`, and the oldest messages that no longer fit are dropped.
+    """
+
+    def __init__(
+            self,
+            context_budget: int = 3000,
+            history_budget: int = 1500,
+            full_turns: int = 4,
+            old_turn_tokens: int = 100
+    ):
+        self.context_budget = context_budget
+        self.history_budget = history_budget
+        self.full_turns = full_turns
+        self.old_turn_tokens = old_turn_tokens
+
+    def pack_chunks(self, chunks: List[str]) -> List[str]:
+        packed, seen, used = [], set(), 0
+        for chunk in chunks:
+            if chunk in seen:
+                continue
+            seen.add(chunk)
+            tokens = count_tokens(chunk)
+            if used + tokens > self.context_budget:
+                # A later, shorter chunk may still fit
+                continue
+            packed.append(chunk)
+            used += tokens
+        if len(packed) < len(seen):
+            logger.info(f"Context budget {self.context_budget} kept {len(packed)} of {len(seen)} chunks ({used} tokens)")
+        return packed
+
+    def pack_history(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        packed, used = [], 0
+        for age, message in enumerate(reversed(messages)):
+            content = message.get("content", "")
+            if age >= self.full_turns:
+                content = truncate_to_tokens(content, self.old_turn_tokens)
+            tokens = count_tokens(content)
+            if used + tokens > self.history_budget:
+                remaining = self.history_budget - used
+                if remaining >= MIN_PARTIAL_TURN_TOKENS:
+                    packed.append({**message, "content": truncate_to_tokens(content, remaining)})
+                    used += remaining
+                break
+            packed.append({**message, "content": content})
+            used += tokens
+        if len(packed) < len(messages):
+            logger.info(f"History budget {self.history_budget} kept {len(packed)} of {len(messages)} messages ({used} tokens)")
+        return list(reversed(packed))
@@ -1,22 +1,28 @@
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from .logger_config import get_logger, log_time
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from chromadb.utils import embedding_functions
 from markitdown import MarkItDown
 import mimetypes
 import asyncio
+import threading
 from io import BytesIO
-from pdfminer.high_level import extract_text as pdf_extract_text
-from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
-from pdfminer.converter import TextConverter
-from pdfminer.layout import LAParams
-from pdfminer.pdfpage import PDFPage
-from io import StringIO
+import hashlib
+import re
+from . import pdf_extraction
+from .manifest import DocumentManifest
+from .embedding_cache import QueryEmbeddingCache
+from .embeddings import create_embedding_function
+from .bm25_index import BM25Index, reciprocal_rank_fusion
+from .write_gate import WriteGate
+from .snapshots import apply_pending_restore
+from .reranker import CrossEncoderReranker
+from .fanout import MultiCollectionSearch
+from .metrics import SEARCH_SECONDS, RERANK_SECONDS
 
 # Get the project root directory (where .env is located)
 root_dir = Path(__file__).resolve().parents[2]  # Go up 2 levels from document_store.py
@@ -31,30 +37,97 @@ logger.info(f"Loading environment variables from: {env_path}")
 logger.debug(f"CHUNK_SIZE: {os.getenv('CHUNK_SIZE')}")
 logger.debug(f"CHUNK_OVERLAP: {os.getenv('CHUNK_OVERLAP')}")
 
+DEFAULT_COLLECTION = "documents"
+# Chroma's own naming rules: 3-63 characters, alphanumeric at both ends
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{1,61}[A-Za-z0-9]$")
+
+# Resources every collection of one store shares: the client, the embedding model and
+# its caches, the write gate and the retrieval/chunking configuration
+SHARED_ATTRIBUTES = (
+    "persist_directory", "settings", "client", "n_results", "distance_threshold",
+    "retrieval_mode", "hybrid_candidates", "rrf_k", "embedding_function", "embedding_id",
+    "query_embedding_cache", "add_batch_size", "write_gate", "reranker", "rerank_candidates",
+    "bm25_enabled", "bm25_max_scored_postings", "chunk_size", "chunk_overlap", "text_splitter", "collections",
+    "_collections_lock", "_search_views"
+)
+
 class ChromaDocStore:
-    def __init__(self):
+    """
+    Document store over one Chroma collection.
+
+    The store created without a parent holds the shared resources and the default
+    collection; further named collections (see `create_collection`) are stores of their
+    own that reuse those resources but keep a separate collection, manifest and BM25
+    index, so indexing one never touches another.
+    """
+
+    def __init__(self, collection_name: str = DEFAULT_COLLECTION, parent: "ChromaDocStore" = None, embedding_function=None):
+        """
+        Args:
+            collection_name: Chroma collection this store reads and writes
+            parent: Store whose shared resources are reused (for named collections)
+            embedding_function: Embedding function to use instead of the one configured
+                by EMBEDDING_BACKEND (e.g. for benchmarks); must provide `embedding_id`
+        """
+        self.collection_name = collection_name
+        if parent is None:
+            self._init_shared(embedding_function)
+        else:
+            for attribute in SHARED_ATTRIBUTES:
+                setattr(self, attribute, getattr(parent, attribute))
+        self._init_collection()
+        logger.info(f"Initialized ChromaDocStore for collection {self.collection_name} with chunk_size={self.chunk_size}, chunk_overlap={self.chunk_overlap}")
+
+    def _init_shared(self, embedding_function=None):
+        # Everything the store persists (Chroma, manifest, lexical index, query cache) lives here
+        self.persist_directory = os.getenv('CHROMA_PERSIST_DIRECTORY', './chroma')
+        # A restore requested through the API is applied before anything is opened
+        apply_pending_restore(self.persist_directory)
+
         self.settings = Settings(
             allow_reset=os.getenv('CHROMA_ALLOW_RESET', 'true').lower() == 'true',
             anonymized_telemetry=os.getenv('CHROMA_ANONYMIZED_TELEMETRY', 'false').lower() == 'true',
-            is_persistent=os.getenv('CHROMA_IS_PERSISTENT', 'true').lower() == 'true'
+            is_persistent=os.getenv('CHROMA_IS_PERSISTENT', 'true').lower() == 'true',
+            persist_directory=self.persist_directory
         )
         
         self.client = chromadb.Client(self.settings)
-        self.collection_name = "documents"
         
         # Load configuration from environment variables
         self.n_results = int(os.getenv('N_RESULTS', 5))
         self.distance_threshold = float(os.getenv('DISTANCE_THRESHOLD', 1.5))
+        self.retrieval_mode = os.getenv('RETRIEVAL_MODE', 'vector').lower()
+        self.hybrid_candidates = int(os.getenv('HYBRID_CANDIDATES', 20))
+        self.rrf_k = int(os.getenv('RRF_K', 60))
         
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L12-v2"
-        )
-        
-        self.collection = self.client.get_or_create_collection(
-            name=self.collection_name,
-            embedding_function=self.embedding_function
+        # Embedding backend (PyTorch, ONNX or int8 ONNX) is selected by EMBEDDING_BACKEND
+        self.embedding_function = embedding_function or create_embedding_function()
+        self.embedding_id = self.embedding_function.embedding_id
+
+        persist_query_cache = os.getenv('QUERY_CACHE_PERSIST', 'true').lower() == 'true'
+        self.query_embedding_cache = QueryEmbeddingCache(
+            model_name=self.embedding_id,
+            max_entries=int(os.getenv('QUERY_CACHE_SIZE', 10000)),
+            persist_path=os.getenv('QUERY_CACHE_PATH', os.path.join(self.persist_directory, 'query_embeddings.npz')) if persist_query_cache else None,
+            save_every=int(os.getenv('QUERY_CACHE_SAVE_EVERY', 500))
         )
         
+        self.add_batch_size = int(os.getenv('EMBEDDING_BATCH_SIZE', 64))
+        # Held shared by every write and exclusively while a snapshot copies the files
+        self.write_gate = WriteGate()
+
+        # Optional cross-encoder reranking of over-fetched candidates
+        self.reranker = None
+        self.rerank_candidates = int(os.getenv('RERANK_CANDIDATES', 20))
+        if os.getenv('RERANK_ENABLED', 'false').lower() == 'true':
+            self.reranker = CrossEncoderReranker(
+                model_name=os.getenv('RERANK_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2'),
+                batch_size=int(os.getenv('RERANK_BATCH_SIZE', 16)),
+                latency_budget_ms=float(os.getenv('RERANK_LATENCY_BUDGET_MS', 300))
+            )
+        self.bm25_enabled = os.getenv('BM25_ENABLED', str(self.retrieval_mode != 'vector')).lower() == 'true'
+        self.bm25_max_scored_postings = int(os.getenv('BM25_MAX_SCORED_POSTINGS', 0)) or None
+
         self.chunk_size = int(os.getenv('CHUNK_SIZE', 1000))
         self.chunk_overlap = int(os.getenv('CHUNK_OVERLAP', 200))
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -62,41 +135,163 @@ class ChromaDocStore:
             chunk_overlap=self.chunk_overlap,
             separators=["\n\n##", "\n\n", "\n", ". ", " ", ""]
         )
-        logger.info(f"Initialized ChromaDocStore with chunk_size={self.chunk_size}, chunk_overlap={self.chunk_overlap}")
+
+        # Registry of loaded collections by name, shared by all of them
+        self.collections: Dict[str, "ChromaDocStore"] = {}
+        self._collections_lock = threading.Lock()
+        self._search_views: Dict[Tuple[str, ...], "MultiCollectionSearch"] = {}
+
+    def _init_collection(self):
+        self.collection = self.client.get_or_create_collection(
+            name=self.collection_name,
+            embedding_function=self.embedding_function
+        )
+        
+        # One lock per file name so concurrent jobs for different files do not serialize
+        self._file_locks: Dict[str, threading.Lock] = {}
+        self._file_locks_guard = threading.Lock()
+        # Incremented on every write so derived caches (e.g. answers) know when to invalidate
+        self.corpus_version = 0
+        manifest_path = self._data_path('manifest.json')
+        if self.collection_name == DEFAULT_COLLECTION:
+            manifest_path = os.getenv('DOCUMENT_MANIFEST_PATH', manifest_path)
+        self.manifest = DocumentManifest(manifest_path)
+
+        # Lexical index kept alongside the collection for bm25/hybrid retrieval
+        self.bm25_index = None
+        self.bm25_path = self._data_path('bm25_index.pkl') if self.settings.is_persistent else None
+        # Whether a saved index may be on disk; the first write deletes it even if it was not loaded
+        self._bm25_saved = bool(self.bm25_path) and os.path.exists(self.bm25_path)
+        if self.bm25_enabled:
+            self.bm25_index = self._load_bm25_index()
+        self.collections[self.collection_name] = self
+
+    def _data_path(self, file_name: str, collection_name: Optional[str] = None) -> str:
+        """Per-collection file in the data directory; the default collection keeps the plain name"""
+        collection_name = collection_name or self.collection_name
+        if collection_name == DEFAULT_COLLECTION:
+            return os.path.join(self.persist_directory, file_name)
+        stem, extension = os.path.splitext(file_name)
+        return os.path.join(self.persist_directory, f"{stem}_{collection_name}{extension}")
+
+    def _collection_names(self) -> List[str]:
+        # Older Chroma versions return collection objects, newer ones names
+        return [getattr(collection, 'name', collection) for collection in self.client.list_collections()]
+
+    def get_collection(self, name: Optional[str] = None) -> "ChromaDocStore":
+        """Store of a named collection, loading it on first use. Raises KeyError if it does not exist."""
+        name = name or DEFAULT_COLLECTION
+        with self._collections_lock:
+            store = self.collections.get(name)
+            if store is None:
+                if name not in self._collection_names():
+                    raise KeyError(name)
+                store = ChromaDocStore(name, parent=self)
+            return store
+
+    def create_collection(self, name: str) -> "ChromaDocStore":
+        if not COLLECTION_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid collection name {name!r}: use 3-63 letters, digits, '.', '_' or '-', starting and ending with a letter or digit")
+        with self._collections_lock:
+            if name in self.collections or name in self._collection_names():
+                raise ValueError(f"Collection {name} already exists")
+            logger.info(f"Creating collection {name}")
+            return ChromaDocStore(name, parent=self)
+
+    def list_collections(self) -> List[Dict[str, Any]]:
+        collections = []
+        for name in sorted(self._collection_names()):
+            store = self.collections.get(name)
+            collection = store.collection if store else self.client.get_collection(name=name, embedding_function=self.embedding_function)
+            collections.append({
+                'name': name,
+                'chunk_count': collection.count(),
+                'file_count': len(store.manifest.files()) if store else None,
+                'default': name == DEFAULT_COLLECTION
+            })
+        return collections
+
+    def drop_collection(self, name: str) -> bool:
+        """Delete a named collection with its manifest and lexical index. The default collection cannot be dropped."""
+        if name == DEFAULT_COLLECTION:
+            raise ValueError("The default collection cannot be dropped, clear it instead")
+        with self._collections_lock:
+            if name not in self._collection_names():
+                return False
+            self.collections.pop(name, None)
+            self._search_views = {key: view for key, view in self._search_views.items() if name not in key}
+        with self.write_gate.writing():
+            self.client.delete_collection(name=name)
+            for file_name in ('manifest.json', 'bm25_index.pkl'):
+                path = self._data_path(file_name, name)
+                if os.path.exists(path):
+                    os.remove(path)
+        logger.info(f"Dropped collection {name}")
+        return True
+
+    def search_view(self, names: List[str]):
+        """Store for a query: one collection's store, or a fan-out view over several"""
+        names = tuple(sorted(set(names or [DEFAULT_COLLECTION])))
+        if len(names) == 1:
+            return self.get_collection(names[0])
+        stores = [self.get_collection(name) for name in names]
+        # Checked and stored under the lock drop_collection holds, so a view built while one
+        # of its collections is dropped is never cached and no dropped store is kept
+        with self._collections_lock:
+            view = self._search_views.get(names)
+            if view is None:
+                dropped = [store.collection_name for store in stores if self.collections.get(store.collection_name) is not store]
+                if dropped:
+                    raise KeyError(dropped[0])
+                view = MultiCollectionSearch(stores)
+                self._search_views[names] = view
+            return view
 
     @staticmethod
-    def extract_text_from_pdf(file_obj) -> list:
+    def extract_text_from_pdf(file_obj, progress_callback: Optional[Callable[[int], None]] = None) -> list:
         """
         Extract text from a PDF file using pdfminer.six, returning a list of page texts.
         Each element in the list corresponds to text extracted from a page.
+        Pages are processed in batches across a process pool (see PDF_EXTRACTION_WORKERS
+        and PDF_PAGE_BATCH_SIZE) and returned in page order; progress_callback receives
+        the page count of each batch as it completes.
         """
-        resource_manager = PDFResourceManager()
-        laparams = LAParams()
-        codec = 'utf-8'
-        page_texts = []
-
-        for page_number, page in enumerate(PDFPage.get_pages(file_obj, check_extractable=True), start=1):
-            output_string = StringIO()
-            converter = TextConverter(resource_manager, output_string, codec=codec, laparams=laparams)
-            interpreter = PDFPageInterpreter(resource_manager, converter)
-            try:
-                interpreter.process_page(page)
-                text = output_string.getvalue()
-                page_texts.append(text)
-            finally:
-                converter.close()
-                output_string.close()
-
-        return page_texts
+        file_obj.seek(0)
+        return pdf_extraction.extract_pages(file_obj.read(), progress_callback=progress_callback)
 
     @staticmethod
     async def extract_text_from_document(file_obj) -> List[Dict[str, any]]:
         """
         Extract text from a document, handling PDFs with pdfminer.six and other formats with MarkItDown.
         """
+        # Get the file name from the file object
+        file_name = getattr(file_obj, 'filename', None) or getattr(file_obj, 'name', 'unknown')
+
+        # Read the file content if it's a FastAPI UploadFile
+        if hasattr(file_obj, 'read'):
+            logger.debug("Reading file content...")
+            if asyncio.iscoroutinefunction(file_obj.read):
+                file_content = await file_obj.read()
+            else:
+                file_content = file_obj.read()
+
+            logger.debug(f"Read {len(file_content)} bytes from file")
+
+            # Convert to file-like object
+            file_obj = BytesIO(file_content)
+            file_obj.seek(0)  # Ensure we're at the start of the stream
+            logger.debug("Converted to BytesIO object")
+
+        return ChromaDocStore.extract_text_from_stream(file_obj, file_name)
+
+    @staticmethod
+    def extract_text_from_stream(file_obj, file_name: str, progress_callback: Optional[Callable[[int], None]] = None) -> List[Dict[str, any]]:
+        """
+        Synchronously extract text from a seekable binary stream. Used directly by
+        background ingestion jobs, which already hold the uploaded bytes.
+        For PDFs, progress_callback receives the number of pages extracted as each batch completes.
+        """
         try:
-            # Get the file name from the file object
-            file_name = getattr(file_obj, 'filename', None) or getattr(file_obj, 'name', 'unknown')
             file_type = mimetypes.guess_type(file_name)[0]
 
             logger.info(f"Processing document: {file_name} (type: {file_type})")
@@ -104,26 +299,11 @@ class ChromaDocStore:
             if not file_type:
                 logger.warning(f"Could not determine file type for {file_name}, attempting conversion anyway")
 
-            # Read the file content if it's a FastAPI UploadFile
-            if hasattr(file_obj, 'read'):
-                logger.debug("Reading file content...")
-                if asyncio.iscoroutinefunction(file_obj.read):
-                    file_content = await file_obj.read()
-                else:
-                    file_content = file_obj.read()
-
-                logger.debug(f"Read {len(file_content)} bytes from file")
-
-                # Convert to file-like object
-                file_obj = BytesIO(file_content)
-                file_obj.seek(0)  # Ensure we're at the start of the stream
-                logger.debug("Converted to BytesIO object")
-
             # Handle PDF files separately using pdfminer
             if file_type == 'application/pdf':
                 logger.info("Detected PDF file, using pdfminer to extract text.")
                 try:
-                    page_texts = ChromaDocStore.extract_text_from_pdf(file_obj)  # Now returns a list of texts per page
+                    page_texts = ChromaDocStore.extract_text_from_pdf(file_obj, progress_callback)  # Now returns a list of texts per page
                     if not page_texts or all(not text.strip() for text in page_texts):
                         raise ValueError("pdfminer extracted empty text content")
                     documents = []
@@ -185,51 +365,381 @@ class ChromaDocStore:
             logger.error(f"Error extracting text from document {file_name}: {str(e)}", exc_info=True)
             raise
 
+    def split_documents(self, documents: List[Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Split extracted page documents into chunks and build the matching chunk metadata.
+        """
+        processed_docs = []
+        processed_metas = []
+
+        for doc in documents:
+            chunks = self.text_splitter.split_text(doc['text'])
+            # Calculate page range for each chunk
+            for j, chunk in enumerate(chunks):
+                processed_docs.append(chunk)
+                # Ensure all metadata fields have valid values
+                metadata = {
+                    'source': str(doc.get('file_name', 'unknown')),
+                    'type': doc.get('file_type', 'unknown'),  # Use file_type from document
+                    'file_name': str(doc.get('file_name', 'unknown')),
+                    'page_number': str(doc.get('page_number', 'unknown')),
+                    'page_range': f"{doc.get('page_number', 'unknown')}",
+                    'chunk_num': str(j + 1),
+                    'total_chunks': str(len(chunks))
+                }
+                processed_metas.append(metadata)
+
+        return processed_docs, processed_metas
 
     @log_time(logger)
-    def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str] = None) -> bool:
+    def add_documents(
+            self,
+            documents: List[str],
+            metadatas: List[Dict[str, Any]],
+            ids: List[str] = None,
+            progress_callback: Optional[Callable[[str, int], None]] = None
+    ) -> bool:
+        """
+        Embed and write chunks in batches of `add_batch_size`.
+
+        Args:
+            documents: Chunk texts
+            metadatas: Metadata for each chunk
+            ids: Optional chunk IDs
+            progress_callback: Optional callable receiving ("embedded" | "written", count) after each batch
+        """
         try:
             # Validate input lengths match
             if len(documents) != len(metadatas):
                 raise ValueError(f"Number of documents ({len(documents)}) must match number of metadatas ({len(metadatas)})")
+            if not documents:
+                return True
 
-            # Get current collection size for ID generation
-            current_docs = self.collection.get()
-            start_idx = len(current_docs['ids']) if current_docs['ids'] else 0
-            
-            # Generate sequential IDs
-            generated_ids = [f"doc_{i}" for i in range(start_idx, start_idx + len(documents))]
-            
             # Ensure required metadata fields exist
             for metadata in metadatas:
                 if 'file_name' not in metadata:
                     metadata['file_name'] = 'unknown'
                 if 'page_range' not in metadata:
                     metadata['page_range'] = 'unknown'
-            
-            logger.info(f"Adding {len(documents)} documents with IDs {generated_ids[0]} to {generated_ids[-1]}")
-            
-            self.collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=generated_ids
-            )
+
+            # Chunk IDs are derived from content, so no collection scan is needed to allocate them
+            if ids is None:
+                ids = self.compute_chunk_ids(documents, metadatas)
+            elif len(ids) != len(documents):
+                raise ValueError(f"Number of ids ({len(ids)}) must match number of documents ({len(documents)})")
+
+            logger.info(f"Adding {len(documents)} documents")
+
+            for start in range(0, len(documents), self.add_batch_size):
+                end = start + self.add_batch_size
+                batch_docs = documents[start:end]
+
+                embeddings = self.embedding_function(batch_docs)
+                if progress_callback:
+                    progress_callback("embedded", len(batch_docs))
+
+                self.write_embedded(ids[start:end], batch_docs, metadatas[start:end], embeddings)
+                if progress_callback:
+                    progress_callback("written", len(batch_docs))
             return True
         except Exception as e:
             logger.error(f"Error adding documents: {e}")
             return False
 
+    def write_embedded(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], embeddings):
+        """Write one batch of already embedded chunks to the collection and the lexical index"""
+        with self.write_gate.writing():
+            self.collection.upsert(
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=embeddings,
+                ids=ids
+            )
+            if self.bm25_index is not None:
+                self.bm25_index.add(ids, documents)
+            self._bump_corpus_version()
+
+    @staticmethod
+    def compute_file_hash(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def compute_chunk_id(text: str, metadata: Dict[str, Any], occurrence: int = 0) -> str:
+        """
+        Stable chunk ID from the file, page and chunk content, plus the occurrence number
+        of identical text on the same page. The chunk's position is deliberately left out:
+        text inserted early on a page must not change the IDs of the unchanged chunks after it.
+        """
+        key = "\x00".join([
+            str(metadata.get('file_name', 'unknown')),
+            str(metadata.get('page_number', 'unknown')),
+            hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            str(occurrence)
+        ])
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def compute_chunk_ids(documents: List[str], metadatas: List[Dict[str, Any]]) -> List[str]:
+        """Chunk IDs of a file's chunks, numbering repeats of the same text on a page apart"""
+        occurrences: Dict[Tuple[str, str, str], int] = {}
+        ids = []
+        for text, metadata in zip(documents, metadatas):
+            key = (str(metadata.get('file_name')), str(metadata.get('page_number')), text)
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            ids.append(ChromaDocStore.compute_chunk_id(text, metadata, occurrence))
+        return ids
+
+    def _bump_corpus_version(self):
+        with self._file_locks_guard:
+            self.corpus_version += 1
+            if self._bm25_saved:
+                # The saved lexical index no longer matches the collection
+                self._bm25_saved = False
+                try:
+                    os.remove(self.bm25_path)
+                except OSError:
+                    pass
+
+    def _load_bm25_index(self) -> BM25Index:
+        """
+        Load the lexical index saved at the last clean shutdown or snapshot. Any write
+        deletes the file, and the index is only trusted if the corpus fingerprint saved
+        with it still matches, otherwise it is rebuilt from the collection.
+        """
+        if self.bm25_path:
+            loaded = BM25Index.load(self.bm25_path)
+            if loaded is not None:
+                index, fingerprint = loaded
+                if fingerprint is not None and fingerprint == self._corpus_fingerprint() and len(index) == fingerprint['chunk_count']:
+                    index.max_scored_postings = self.bm25_max_scored_postings
+                    return index
+                logger.warning(f"Saved BM25 index {self.bm25_path} does not match collection {self.collection_name}, rebuilding it")
+        index = BM25Index(max_scored_postings=self.bm25_max_scored_postings)
+        index.rebuild_from_collection(self.collection)
+        return index
+
+    def _corpus_fingerprint(self) -> Dict[str, Any]:
+        """Cheap identity of the stored corpus: chunk count and a digest of the manifest"""
+        return {'chunk_count': self.collection.count(), 'manifest': self.manifest.digest()}
+
+    def save_lexical_index(self, pause_writes: bool = True):
+        """Persist the BM25 index of every loaded collection so the next start can skip rebuilding them"""
+        if pause_writes:
+            with self.write_gate.paused():
+                self.save_lexical_index(pause_writes=False)
+            return
+        for store in list(self.collections.values()):
+            if store.bm25_index is None or not store.bm25_path:
+                continue
+            store.bm25_index.save(store.bm25_path, fingerprint=store._corpus_fingerprint())
+            with store._file_locks_guard:
+                store._bm25_saved = True
+
+    def _file_lock(self, file_name: str) -> threading.Lock:
+        with self._file_locks_guard:
+            return self._file_locks.setdefault(file_name, threading.Lock())
+
+    def is_file_unchanged(self, file_name: str, file_hash: str) -> bool:
+        """True if the file was already ingested with the same content and chunking configuration"""
+        entry = self.manifest.get(file_name)
+        return (
+            entry is not None
+            and entry.get('file_hash') == file_hash
+            and entry.get('chunking') == self.get_chunking_config()
+        )
+
+    @log_time(logger)
+    def sync_file(
+            self,
+            file_name: str,
+            file_hash: str,
+            documents: List[str],
+            metadatas: List[Dict[str, Any]],
+            progress_callback: Optional[Callable[[str, int], None]] = None
+    ) -> Dict[str, int]:
+        """
+        Bring the stored chunks of one file in line with its new chunks: only chunks
+        whose IDs are not stored yet are embedded, and chunks that no longer exist
+        are deleted. Returns counts of added, reused and removed chunks.
+
+        Chunk IDs do not depend on position, so reused chunks have their metadata (e.g.
+        chunk_num, total_chunks) updated in place, without re-embedding. The file hash is
+        recorded in the manifest only, not in chunk metadata.
+
+        Visibility guarantee: a re-uploaded file never disappears from query results, but
+        it is not swapped atomically either. New chunks become searchable batch by batch
+        while the old ones are still stored, so until the stale chunks are deleted at the
+        end, a query may return chunks of both versions of the file. The write gate does
+        not hide this, as readers do not take it.
+        """
+        new_ids = self.compute_chunk_ids(documents, metadatas)
+
+        with self._file_lock(file_name):
+            entry = self.manifest.get(file_name)
+            if entry is not None:
+                old_ids = set(entry['chunk_ids'])
+            else:
+                # Not in the manifest (e.g. ingested before it existed): look up this file's chunks only
+                old_ids = set(self.collection.get(where={'file_name': file_name}, include=[])['ids'])
+
+            to_add = [i for i, chunk_id in enumerate(new_ids) if chunk_id not in old_ids]
+            reused = [i for i, chunk_id in enumerate(new_ids) if chunk_id in old_ids]
+            stale_ids = list(old_ids - set(new_ids))
+
+            # Add before deleting so the file is never missing from query results (both versions may show meanwhile)
+            if to_add and not self.add_documents(
+                    [documents[i] for i in to_add],
+                    [metadatas[i] for i in to_add],
+                    ids=[new_ids[i] for i in to_add],
+                    progress_callback=progress_callback
+            ):
+                raise RuntimeError(f"Failed to add chunks of {file_name} to database")
+            with self.write_gate.writing():
+                if reused:
+                    # Positions shift when text is inserted or removed, the text and vector do not
+                    self.collection.update(
+                        ids=[new_ids[i] for i in reused],
+                        metadatas=[metadatas[i] for i in reused]
+                    )
+                if stale_ids:
+                    self.collection.delete(ids=stale_ids)
+                    if self.bm25_index is not None:
+                        self.bm25_index.remove(stale_ids)
+                if reused or stale_ids:
+                    self._bump_corpus_version()
+
+                self.manifest.set(file_name, {
+                    'file_hash': file_hash,
+                    'chunking': self.get_chunking_config(),
+                    'chunk_ids': new_ids,
+                    'chunk_count': len(new_ids),
+                    'page_count': len({meta.get('page_number') for meta in metadatas})
+                })
+
+        summary = {
+            'added': len(to_add),
+            'reused': len(reused),
+            'removed': len(stale_ids)
+        }
+        logger.info(f"Synced {file_name}: {summary}")
+        return summary
+
+    @log_time(logger)
+    def delete_file(self, file_name: str) -> int:
+        """
+        Delete all chunks of one file by metadata and drop it from the manifest.
+        Returns the number of chunks removed.
+        """
+        with self._file_lock(file_name), self.write_gate.writing():
+            ids = self.collection.get(where={'file_name': file_name}, include=[])['ids']
+            if ids:
+                self.collection.delete(ids=ids)
+                if self.bm25_index is not None:
+                    self.bm25_index.remove(ids)
+                self._bump_corpus_version()
+            self.manifest.remove(file_name)
+        logger.info(f"Deleted {len(ids)} chunks of {file_name}")
+        return len(ids)
+
+    def list_files(self) -> List[Dict[str, Any]]:
+        """Per-file summary from the manifest"""
+        return [
+            {
+                'file_name': file_name,
+                'file_hash': entry.get('file_hash'),
+                'chunk_count': entry.get('chunk_count', 0)
+            }
+            for file_name, entry in sorted(self.manifest.files().items())
+        ]
+
     def get_chunking_config(self):
         return {
             "chunk_size": self.chunk_size,
             "chunk_overlap": self.chunk_overlap
         }
 
-    def get_all_documents(self):
-        return self.collection.get()
+    def get_documents(self, limit: int = 100, offset: int = 0, fields: Tuple[str, ...] = ("documents", "metadatas"), file_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One page of chunks in storage order. `fields` selects what is returned besides the
+        ids ("documents", "metadatas"), so a listing can skip the chunk text. Optionally
+        restricted to the chunks of one file.
+        """
+        where = {'file_name': file_name} if file_name else None
+        page = self.collection.get(limit=limit, offset=offset, include=list(fields), where=where)
+        if file_name:
+            entry = self.manifest.get(file_name)
+            total = entry.get('chunk_count') if entry else None
+        else:
+            total = self.collection.count()
+
+        returned = len(page['ids'])
+        has_more = returned == limit and (total is None or offset + returned < total)
+        result = {
+            'ids': page['ids'],
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'next_offset': offset + returned if has_more else None
+        }
+        for field in fields:
+            result[field] = page[field]
+        return result
+
+    def summarize_files(self, full_scan: bool = False, batch_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Per-file chunk and page counts from the manifest, without touching the collection.
+        Files ingested before the manifest recorded page counts report page_count None.
+
+        With `full_scan` the counts are instead read from the metadata of every stored
+        chunk, so files ingested before the manifest existed are included too. That reads
+        the whole collection and is meant as an explicit admin action, not a page view.
+        """
+        if not full_scan:
+            return [
+                {
+                    'file_name': file_name,
+                    'file_hash': entry.get('file_hash'),
+                    'chunk_count': entry.get('chunk_count', 0),
+                    'page_count': entry.get('page_count')
+                }
+                for file_name, entry in sorted(self.manifest.files().items())
+            ]
+
+        summary: Dict[str, Dict[str, Any]] = {}
+        offset = 0
+        while True:
+            page = self.collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            if not page['ids']:
+                break
+            for metadata in page['metadatas']:
+                file_name = (metadata or {}).get('file_name', 'unknown')
+                entry = summary.setdefault(file_name, {'chunk_count': 0, 'pages': set()})
+                entry['chunk_count'] += 1
+                entry['pages'].add(metadata.get('page_number'))
+            offset += len(page['ids'])
+
+        files = []
+        for file_name, entry in sorted(summary.items()):
+            manifest_entry = self.manifest.get(file_name) or {}
+            files.append({
+                'file_name': file_name,
+                'file_hash': manifest_entry.get('file_hash'),
+                'chunk_count': entry['chunk_count'],
+                'page_count': len(entry['pages'])
+            })
+        return files
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query through the LRU cache, skipping the model on repeated questions"""
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries through the cache, running all misses in one forward pass"""
+        return self.query_embedding_cache.get_or_compute_many(queries, self.embedding_function)
 
     @log_time(logger)
-    def query_documents(self, query: str, n_results: int = None, distance_threshold: float = None):
+    def query_documents(self, query: str, n_results: int = None, distance_threshold: float = None, retrieval_mode: str = None, rerank: bool = None):
         """
         Query documents with a distance threshold to filter out irrelevant results.
         Lower distance means more similar (better match). Range is typically 0-1.
@@ -238,23 +748,92 @@ class ChromaDocStore:
             query (str): The query text to search for
             n_results (int, optional): Number of results to return. Defaults to self.n_results
             distance_threshold (float, optional): Maximum distance threshold for results. Defaults to self.distance_threshold
+            retrieval_mode (str, optional): "vector", "bm25" or "hybrid". Defaults to self.retrieval_mode
+            rerank (bool, optional): Over-fetch and rerank with the cross-encoder. Defaults to RERANK_ENABLED
+        """
+        return self.query_documents_batch([query], n_results, distance_threshold, retrieval_mode, rerank)[0]
+
+    def query_documents_batch(self, queries: List[str], n_results: int = None, distance_threshold: float = None, retrieval_mode: str = None, rerank: bool = None):
+        """
+        Same as query_documents for several queries at once: the queries are embedded in
+        one forward pass and searched with a single multi-query vector search.
+        Returns one result per query, in order.
         """
         if n_results is None:
             n_results = self.n_results
         
         if distance_threshold is None:
             distance_threshold = self.distance_threshold
+
+        retrieval_mode = retrieval_mode or self.retrieval_mode
+        if retrieval_mode not in ("vector", "bm25", "hybrid"):
+            raise ValueError(f"Unknown retrieval mode: {retrieval_mode}")
+        if retrieval_mode != "vector" and self.bm25_index is None:
+            logger.warning(f"Retrieval mode '{retrieval_mode}' requested but the BM25 index is disabled, using vector search")
+            retrieval_mode = "vector"
             
-        logger.info(f"Querying documents with: {query[:100]}...")
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
+        rerank = self.reranker is not None if rerank is None else rerank and self.reranker is not None
+        # Reranking over-fetches candidates and keeps the best n_results
+        fetch_n = max(n_results, self.rerank_candidates) if rerank else n_results
+
+        logger.info(f"Querying documents ({retrieval_mode}) with {len(queries)} queries: {queries[0][:100]}...")
+        vector_results = None
+        if retrieval_mode == "vector":
+            vector_results = self._vector_search(queries, fetch_n, distance_threshold)
+        elif retrieval_mode == "hybrid":
+            vector_results = self._vector_search(queries, max(fetch_n, self.hybrid_candidates), distance_threshold)
+
+        batch_results = []
+        for i, query in enumerate(queries):
+            if retrieval_mode == "vector":
+                results = vector_results[i]
+            elif retrieval_mode == "bm25":
+                with SEARCH_SECONDS.labels("bm25").time():
+                    ranked = [doc_id for doc_id, _ in self.bm25_index.search(query, fetch_n)]
+                results = self._fetch_ranked(ranked, {})
+            else:
+                results = self._fuse_hybrid(query, vector_results[i], fetch_n)
+
+            if rerank:
+                with RERANK_SECONDS.time():
+                    results = self.reranker.rerank(query, results, n_results)
+
+            # Log retrieved chunks and their distances
+            for j in range(len(results['documents'][0])):
+                distance = results['distances'][0][j] if results.get('distances') else 'N/A'
+                metadata = results['metadatas'][0][j]
+                logger.info(f"Retrieved chunk {j + 1}/{len(results['documents'][0])}:")
+                logger.info(f"  Distance: {distance}")
+                logger.info(f"  Metadata: {metadata}")
+                logger.info(f"  Content: {results['documents'][0][j][:50]}...")
+            batch_results.append(results)
         
+        return batch_results
+
+    def _vector_search(self, queries: List[str], n_results: int, distance_threshold: float):
+        """Multi-query vector search, returning one query-style result per query"""
+        query_embeddings = self.embed_queries(queries)
+        with SEARCH_SECONDS.labels("vector").time():
+            raw = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results
+            )
+        return [
+            self._filter_by_distance({
+                'ids': [raw['ids'][i]],
+                'documents': [raw['documents'][i]],
+                'metadatas': [raw['metadatas'][i]],
+                'distances': [raw['distances'][i]] if raw.get('distances') else None
+            }, distance_threshold)
+            for i in range(len(queries))
+        ]
+
+    @staticmethod
+    def _filter_by_distance(results, distance_threshold: float):
         # Filter out results above the distance threshold if distances are available
         if results['documents'] and results['documents'][0]:
             # Check if distances are available in results
-            if 'distances' in results and results['distances'][0]:
+            if results.get('distances') and results['distances'][0]:
                 filtered_indices = [
                     i for i, dist in enumerate(results['distances'][0]) 
                     if dist <= distance_threshold
@@ -264,42 +843,80 @@ class ChromaDocStore:
                 if not filtered_indices:
                     logger.info("No documents found within acceptable distance threshold")
                     return {
+                        'ids': [[]],
                         'documents': [[]],
                         'metadatas': [[]],
-                        'distances': [[]] if 'distances' in results else None
+                        'distances': [[]]
                     }
                 
                 # Filter all result lists to only include relevant documents
+                results['ids'][0] = [results['ids'][0][i] for i in filtered_indices]
                 results['documents'][0] = [results['documents'][0][i] for i in filtered_indices]
                 results['metadatas'][0] = [results['metadatas'][0][i] for i in filtered_indices]
-                if 'distances' in results:
-                    results['distances'][0] = [results['distances'][0][i] for i in filtered_indices]
-            
-            # Log retrieved chunks and their distances
-            for i in range(len(results['documents'][0])):
-                distance = results['distances'][0][i] if 'distances' in results else 'N/A'
-                metadata = results['metadatas'][0][i]
-                logger.info(f"Retrieved chunk {i + 1}/{len(results['documents'][0])}:")
-                logger.info(f"  Distance: {distance}")
-                logger.info(f"  Metadata: {metadata}")
-                logger.info(f"  Content: {results['documents'][0][i][:50]}...")
+                results['distances'][0] = [results['distances'][0][i] for i in filtered_indices]
         
         return results
 
+    def _fuse_hybrid(self, query: str, vector_results, n_results: int):
+        """
+        Fuse over-fetched vector candidates with BM25 candidates using reciprocal rank
+        fusion. The distance threshold applies to vector hits only, so exact-term matches
+        are kept even when their embeddings are far away.
+        """
+        candidates = max(n_results, self.hybrid_candidates)
+        vector_hits = {
+            doc_id: (document, metadata, distance)
+            for doc_id, document, metadata, distance in zip(
+                vector_results['ids'][0],
+                vector_results['documents'][0],
+                vector_results['metadatas'][0],
+                vector_results['distances'][0] if vector_results.get('distances') else [None] * len(vector_results['ids'][0])
+            )
+        }
+        with SEARCH_SECONDS.labels("bm25").time():
+            lexical_ids = [doc_id for doc_id, _ in self.bm25_index.search(query, candidates)]
+
+        fused = reciprocal_rank_fusion([vector_results['ids'][0], lexical_ids], k=self.rrf_k)[:n_results]
+        results = self._fetch_ranked([doc_id for doc_id, _ in fused], vector_hits)
+        results['scores'] = [[score for _, score in fused]]
+        return results
+
+    def _fetch_ranked(self, ranked_ids: List[str], known: Dict[str, Tuple[str, Dict[str, Any], Optional[float]]]):
+        """Build a query-style result for the given IDs, fetching the ones not already known"""
+        missing = [doc_id for doc_id in ranked_ids if doc_id not in known]
+        if missing:
+            fetched = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            for doc_id, document, metadata in zip(fetched['ids'], fetched['documents'], fetched['metadatas']):
+                known[doc_id] = (document, metadata, None)
+
+        ranked_ids = [doc_id for doc_id in ranked_ids if doc_id in known]
+        return {
+            'ids': [ranked_ids],
+            'documents': [[known[doc_id][0] for doc_id in ranked_ids]],
+            'metadatas': [[known[doc_id][1] for doc_id in ranked_ids]],
+            'distances': [[known[doc_id][2] for doc_id in ranked_ids]]
+        }
+
     @log_time(logger)
     def clear_documents(self):
         logger.info("Clearing all documents and reinitializing collection")
         try:
-            # Delete the entire collection
-            self.client.delete_collection(name=self.collection_name)
-            logger.info(f"Deleted collection: {self.collection_name}")
-            
-            # Recreate the collection with the current embedding function
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                embedding_function=self.embedding_function
-            )
-            logger.info(f"Recreated collection: {self.collection_name}")
+            with self.write_gate.writing():
+                # Delete the entire collection
+                self.client.delete_collection(name=self.collection_name)
+                logger.info(f"Deleted collection: {self.collection_name}")
+
+                # Recreate the collection with the current embedding function
+                self.collection = self.client.create_collection(
+                    name=self.collection_name,
+                    embedding_function=self.embedding_function
+                )
+                logger.info(f"Recreated collection: {self.collection_name}")
+
+                self.manifest.clear()
+                if self.bm25_index is not None:
+                    self.bm25_index.clear()
+                self._bump_corpus_version()
             
             return True
         except Exception as e:
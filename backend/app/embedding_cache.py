@@ -0,0 +1,141 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+import numpy as np
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different spellings of a question share an entry"""
+    return " ".join(query.split())
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings keyed on embedding model and normalized query text.
+    Optionally persisted to a `.npz` file (keys plus one float32 matrix, in LRU order) so
+    it survives restarts. Besides explicit saves (shutdown, snapshots), the file is
+    rewritten in the background every `save_every` new embeddings, so a crash loses at
+    most that many.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 10000, persist_path: Optional[str] = None, save_every: int = 500):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.save_every = save_every
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes writers of the file; a periodic save is skipped while another runs
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+        self._load()
+
+    def _key(self, query: str) -> str:
+        return f"{self.model_name}\x00{normalize_query(query)}"
+
+    def get_or_compute(self, query: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """
+        Return the cached embedding for the query, computing and storing it on a miss.
+        """
+        return self.get_or_compute_many([query], lambda texts: [compute(text) for text in texts])[0]
+
+    def get_or_compute_many(self, queries: List[str], compute_many: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """
+        Return embeddings for all queries, computing every distinct miss in a single call.
+        """
+        keys = [self._key(query) for query in queries]
+        found: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        with self._lock:
+            for key, query in zip(keys, queries):
+                embedding = self._entries.get(key)
+                if embedding is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found[key] = embedding
+                else:
+                    self.misses += 1
+                    missing.setdefault(key, normalize_query(query))
+
+        if missing:
+            # Compute outside the lock so concurrent misses do not serialize on the model
+            computed = compute_many(list(missing.values()))
+            with self._lock:
+                for key, embedding in zip(missing, computed):
+                    embedding = [float(x) for x in embedding]
+                    found[key] = embedding
+                    self._entries[key] = embedding
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self._unsaved += len(missing)
+                save_due = bool(self.persist_path) and self.save_every > 0 and self._unsaved >= self.save_every
+            if save_due:
+                # Write off the query path
+                threading.Thread(target=self.save, kwargs={"blocking": False}, daemon=True).start()
+
+        return [found[key] for key in keys]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+    def _load(self):
+        if not self.persist_path or not self.persist_path.exists():
+            return
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                keys, vectors = data["keys"], data["vectors"]
+            # Entries of another embedding model would be wrong, not just stale
+            prefix = f"{self.model_name}\x00"
+            for key, vector in zip(keys.tolist(), vectors):
+                if key.startswith(prefix):
+                    self._entries[key] = vector.tolist()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            logger.info(f"Loaded {len(self._entries)} cached query embeddings from {self.persist_path}")
+        except (OSError, KeyError, ValueError) as e:
+            logger.error(f"Could not load query embedding cache {self.persist_path}: {e}")
+
+    def save(self, blocking: bool = True):
+        """Write the cache to its file atomically; with blocking=False, skip if a save is already running"""
+        if not self.persist_path:
+            return
+        if not self._save_lock.acquire(blocking=blocking):
+            return
+        try:
+            with self._lock:
+                entries = list(self._entries.items())
+                self._unsaved = 0
+            keys = np.array([key for key, _ in entries], dtype=np.str_)
+            vectors = np.array([embedding for _, embedding in entries], dtype=np.float32)
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.persist_path.with_suffix(self.persist_path.suffix + '.tmp')
+            # Through a file object, np.savez would append .npz to a path
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, keys=keys, vectors=vectors)
+            os.replace(tmp_path, self.persist_path)
+            logger.info(f"Saved {len(entries)} cached query embeddings to {self.persist_path}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not save query embedding cache {self.persist_path}: {e}")
+        finally:
+            self._save_lock.release()
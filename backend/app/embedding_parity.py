@@ -0,0 +1,102 @@
+"""
+Parity check between the reference PyTorch embeddings and another embedding backend.
+
+Usage (from the backend directory):
+    python -m app.embedding_parity --backend onnx-int8
+    python -m app.embedding_parity --backend onnx --questions ../eval/questions.csv --chunks 2000
+
+Compares per-text cosine similarity of the two backends and, using the eval questions
+as queries against stored chunks, how much of the reference top-k each backend retrieves.
+Exits with status 1 if either metric falls below its threshold.
+"""
+import argparse
+import csv
+import json
+import sys
+from typing import List, Dict, Any
+import numpy as np
+from .embeddings import create_embedding_function, BACKEND_TORCH, BACKENDS
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def check_parity(reference_fn, candidate_fn, queries: List[str], corpus: List[str], k: int = 5) -> Dict[str, Any]:
+    """
+    Compare two embedding functions on the same texts.
+
+    Returns the mean and minimum cosine similarity between the two embeddings of each
+    text, and the mean overlap of the top-k corpus chunks each backend retrieves per query.
+    """
+    texts = queries + corpus
+    reference = _normalize(reference_fn(texts))
+    candidate = _normalize(candidate_fn(texts))
+    cosines = np.sum(reference * candidate, axis=1)
+
+    overlaps = []
+    if corpus:
+        n_queries = len(queries)
+        k = min(k, len(corpus))
+        for embeddings in (reference, candidate):
+            scores = embeddings[:n_queries] @ embeddings[n_queries:].T
+            overlaps.append(np.argsort(-scores, axis=1)[:, :k])
+        overlap = [len(set(ref) & set(cand)) / k for ref, cand in zip(*overlaps)]
+    else:
+        overlap = []
+
+    return {
+        "texts": len(texts),
+        "mean_cosine": float(np.mean(cosines)),
+        "min_cosine": float(np.min(cosines)),
+        "k": k,
+        "mean_topk_overlap": float(np.mean(overlap)) if overlap else None,
+        "min_topk_overlap": float(np.min(overlap)) if overlap else None
+    }
+
+
+def _read_questions(path: str) -> List[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [row["question"] for row in csv.DictReader(f)]
+
+
+def _read_chunks(limit: int) -> List[str]:
+    from .document_store import ChromaDocStore
+    store = ChromaDocStore()
+    return store.collection.get(limit=limit, include=["documents"])["documents"] or []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check embedding parity against the PyTorch backend")
+    parser.add_argument("--backend", choices=BACKENDS, required=True)
+    parser.add_argument("--questions", default="../eval/questions.csv")
+    parser.add_argument("--chunks", type=int, default=1000, help="Stored chunks to use as retrieval corpus")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-overlap", type=float, default=0.9)
+    args = parser.parse_args(argv)
+
+    queries = _read_questions(args.questions)
+    corpus = _read_chunks(args.chunks) if args.chunks else []
+
+    result = check_parity(
+        create_embedding_function(backend=BACKEND_TORCH),
+        create_embedding_function(backend=args.backend),
+        queries,
+        corpus,
+        k=args.k
+    )
+    print(json.dumps(result, indent=2))
+
+    overlap = result["mean_topk_overlap"]
+    passed = result["min_cosine"] >= args.min_cosine and (overlap is None or overlap >= args.min_overlap)
+    print("PASS" if passed else "FAIL")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
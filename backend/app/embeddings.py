@@ -0,0 +1,136 @@
+import os
+from pathlib import Path
+from typing import List, Optional
+from chromadb.api.types import EmbeddingFunction, Documents, Embeddings
+from .logger_config import get_logger
+from .metrics import EMBEDDING_SECONDS, EMBEDDED_TEXTS
+
+logger = get_logger(__name__)
+
+# Backends selectable through EMBEDDING_BACKEND
+BACKEND_TORCH = "sentence-transformers"
+BACKEND_ONNX = "onnx"
+BACKEND_ONNX_INT8 = "onnx-int8"
+BACKENDS = (BACKEND_TORCH, BACKEND_ONNX, BACKEND_ONNX_INT8)
+
+
+class SentenceTransformerBackend(EmbeddingFunction[Documents]):
+    """
+    Chroma embedding function on top of sentence-transformers, running either the
+    PyTorch model or an ONNX Runtime export (optionally int8 dynamically quantized).
+    """
+
+    def __init__(
+            self,
+            model_name: str,
+            backend: str = BACKEND_TORCH,
+            batch_size: int = 32,
+            threads: Optional[int] = None,
+            quantization: str = "avx2",
+            onnx_cache_dir: str = "./models"
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.threads = threads
+        self.quantization = quantization
+        self.onnx_cache_dir = Path(onnx_cache_dir)
+
+        if backend == BACKEND_TORCH:
+            self._model = self._load_torch()
+        else:
+            self._model = self._load_onnx()
+        logger.info(f"Loaded embedding backend {self.embedding_id} with batch_size={batch_size}, threads={threads}")
+
+    @property
+    def embedding_id(self) -> str:
+        """Identifies the exact vectors produced, used to key caches and verify index compatibility"""
+        if self.backend == BACKEND_ONNX_INT8:
+            return f"{self.backend}-{self.quantization}:{self.model_name}"
+        return f"{self.backend}:{self.model_name}"
+
+    def _load_torch(self):
+        from sentence_transformers import SentenceTransformer
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+        return SentenceTransformer(self.model_name, device="cpu")
+
+    def _load_onnx(self):
+        try:
+            import onnxruntime
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "The ONNX embedding backends require 'sentence-transformers[onnx]' (optimum and onnxruntime)"
+            ) from e
+
+        model_kwargs = {"provider": "CPUExecutionProvider"}
+        if self.threads:
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = self.threads
+            session_options.inter_op_num_threads = 1
+            model_kwargs["session_options"] = session_options
+
+        if self.backend == BACKEND_ONNX:
+            return SentenceTransformer(self.model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+        file_name = f"onnx/model_qint8_{self.quantization}.onnx"
+        try:
+            # Quantized exports published alongside the model on the hub
+            return SentenceTransformer(
+                self.model_name, device="cpu", backend="onnx",
+                model_kwargs={**model_kwargs, "file_name": file_name}
+            )
+        except Exception as e:
+            logger.info(f"No published {file_name} for {self.model_name} ({e}), quantizing locally")
+
+        local_dir = self.onnx_cache_dir / self.model_name.replace("/", "__")
+        if not (local_dir / file_name).exists():
+            from sentence_transformers.backend import export_dynamic_quantized_onnx_model
+            fp32_model = SentenceTransformer(self.model_name, device="cpu", backend="onnx")
+            fp32_model.save(str(local_dir))
+            export_dynamic_quantized_onnx_model(fp32_model, self.quantization, str(local_dir))
+            logger.info(f"Exported int8 quantized model to {local_dir / file_name}")
+
+        return SentenceTransformer(
+            str(local_dir), device="cpu", backend="onnx",
+            model_kwargs={**model_kwargs, "file_name": file_name}
+        )
+
+    def __call__(self, input: Documents) -> Embeddings:
+        with EMBEDDING_SECONDS.time():
+            embeddings = self._model.encode(
+                list(input),
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        EMBEDDED_TEXTS.inc(len(embeddings))
+        return [embedding for embedding in embeddings]
+
+
+def create_embedding_function(backend: str = None, model_name: str = None) -> SentenceTransformerBackend:
+    """
+    Build the embedding function selected by configuration.
+
+    Environment:
+        EMBEDDING_BACKEND: sentence-transformers | onnx | onnx-int8
+        EMBEDDING_MODEL: sentence-transformers model name
+        EMBEDDING_BATCH_SIZE: texts per forward pass
+        EMBEDDING_THREADS: CPU threads for inference (0 uses the runtime default)
+        EMBEDDING_ONNX_QUANTIZATION: avx2 | avx512 | avx512_vnni | arm64
+        EMBEDDING_ONNX_CACHE_DIR: where locally quantized models are stored
+    """
+    threads = int(os.getenv('EMBEDDING_THREADS', 0))
+    return SentenceTransformerBackend(
+        model_name=model_name or os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L12-v2'),
+        backend=backend or os.getenv('EMBEDDING_BACKEND', BACKEND_TORCH),
+        batch_size=int(os.getenv('EMBEDDING_BATCH_SIZE', 64)),
+        threads=threads or None,
+        quantization=os.getenv('EMBEDDING_ONNX_QUANTIZATION', 'avx2'),
+        onnx_cache_dir=os.getenv('EMBEDDING_ONNX_CACHE_DIR', './models')
+    )
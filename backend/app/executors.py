@@ -0,0 +1,69 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .logger_config import get_logger
+
+# Blocking store work runs on separately sized pools so that a large upload can never
+# occupy the threads that answer queries or serve listings and admin operations, and
+# none of them blocks the event loop.
+
+logger = get_logger(__name__)
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def _get_executor(name: str, env_var: str, default_workers: int) -> ThreadPoolExecutor:
+    with _lock:
+        executor = _executors.get(name)
+        if executor is None:
+            workers = int(os.getenv(env_var, default_workers))
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+            _executors[name] = executor
+            logger.info(f"Started {name} executor with {workers} threads")
+        return executor
+
+
+def get_retrieval_executor() -> ThreadPoolExecutor:
+    return _get_executor("retrieval", 'RETRIEVAL_WORKERS', 4)
+
+
+def get_ingestion_executor() -> ThreadPoolExecutor:
+    return _get_executor("ingestion", 'INGESTION_MAX_WORKERS', 2)
+
+
+def get_admin_executor() -> ThreadPoolExecutor:
+    return _get_executor("admin", 'ADMIN_WORKERS', 2)
+
+
+def get_fanout_executor() -> ThreadPoolExecutor:
+    """Per-collection searches of one multi-collection query, submitted from retrieval threads"""
+    return _get_executor("fanout", 'FANOUT_WORKERS', 8)
+
+
+async def run_retrieval(func, *args, **kwargs):
+    """Run a blocking retrieval call (embedding, vector/BM25 search, reranking) off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_retrieval_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_ingestion(func, *args, **kwargs):
+    """Run a bulk write (ingestion, index import) off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_ingestion_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_admin(func, *args, **kwargs):
+    """Run a listing or admin operation (delete, clear, export, snapshots) off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_admin_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown():
+    with _lock:
+        for name, executor in _executors.items():
+            logger.info(f"Shutting down {name} executor")
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
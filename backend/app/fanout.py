@@ -0,0 +1,85 @@
+from typing import Any, Dict, List
+from .executors import get_fanout_executor
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def merge_results(results: List[Dict[str, Any]], n_results: int) -> Dict[str, Any]:
+    """
+    Merge query-style results from several collections into the overall top n.
+
+    Cross-encoder scores and vector distances are comparable across collections and
+    are used when every hit has one; otherwise (BM25 or hybrid ranks, which are only
+    meaningful within a collection) the lists are interleaved rank by rank.
+    """
+    hits = []
+    for result in results:
+        distances = result.get('distances')[0] if result.get('distances') else None
+        rerank_scores = result.get('rerank_scores')[0] if result.get('rerank_scores') else None
+        for rank, doc_id in enumerate(result['ids'][0]):
+            hits.append({
+                'rank': rank,
+                'id': doc_id,
+                'document': result['documents'][0][rank],
+                'metadata': result['metadatas'][0][rank],
+                'distance': distances[rank] if distances else None,
+                'rerank_score': rerank_scores[rank] if rerank_scores else None
+            })
+
+    if hits and all(hit['rerank_score'] is not None for hit in hits):
+        hits.sort(key=lambda hit: -hit['rerank_score'])
+    elif all(hit['distance'] is not None for hit in hits):
+        hits.sort(key=lambda hit: hit['distance'])
+    else:
+        hits.sort(key=lambda hit: hit['rank'])
+    hits = hits[:n_results]
+
+    merged = {
+        'ids': [[hit['id'] for hit in hits]],
+        'documents': [[hit['document'] for hit in hits]],
+        'metadatas': [[hit['metadata'] for hit in hits]],
+        'distances': [[hit['distance'] for hit in hits]]
+    }
+    if hits and all(hit['rerank_score'] is not None for hit in hits):
+        merged['rerank_scores'] = [[hit['rerank_score'] for hit in hits]]
+    return merged
+
+
+class MultiCollectionSearch:
+    """
+    Query-side view over several collections of one store. Each query is embedded once,
+    searched in every collection in parallel, and the per-collection top-k are merged.
+    Offers the query interface the RAG pipeline and the query batcher use.
+    """
+
+    def __init__(self, stores: List[Any]):
+        self.stores = stores
+        self.collection_name = "+".join(store.collection_name for store in stores)
+        self.n_results = stores[0].n_results
+
+    @property
+    def corpus_version(self) -> int:
+        # Every collection's version only grows, so the sum changes whenever any of them does
+        return sum(store.corpus_version for store in self.stores)
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.stores[0].embed_query(query)
+
+    def query_documents(self, query: str, n_results: int = None, distance_threshold: float = None, retrieval_mode: str = None, rerank: bool = None):
+        return self.query_documents_batch([query], n_results, distance_threshold, retrieval_mode, rerank)[0]
+
+    def query_documents_batch(self, queries: List[str], n_results: int = None, distance_threshold: float = None, retrieval_mode: str = None, rerank: bool = None):
+        n_results = n_results or self.n_results
+        # The collections share the query embedding cache, so after this every search reuses the vectors
+        self.stores[0].embed_queries(queries)
+        futures = [
+            get_fanout_executor().submit(store.query_documents_batch, queries, n_results, distance_threshold, retrieval_mode, rerank)
+            for store in self.stores
+        ]
+        per_collection = [future.result() for future in futures]
+        logger.info(f"Searched {len(self.stores)} collections for {len(queries)} queries")
+        return [
+            merge_results([results[i] for results in per_collection], n_results)
+            for i in range(len(queries))
+        ]
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import AsyncGenerator, Deque, Dict, Any
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the generation wait queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Generation queue is full, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class GenerationTicket:
+    """A request's place in the generation scheduler"""
+
+    def __init__(self, client_id: str):
+        self.client_id = client_id
+        self.granted = False
+        self.released = False
+        self.enqueued_at = time.monotonic()
+        self.granted_at = None
+        self._changed = asyncio.Event()
+
+    @property
+    def wait_seconds(self) -> float:
+        return (self.granted_at or time.monotonic()) - self.enqueued_at
+
+
+class GenerationScheduler:
+    """
+    Admission control in front of LLM generation.
+
+    At most `max_concurrent` generations run at once. Further requests wait in a queue
+    of at most `max_queue` entries and are served round-robin across clients, so one
+    client submitting many questions cannot starve the others. Requests beyond the
+    queue are rejected with a retry hint. Must be used from a single event loop.
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_queue: int = 32, retry_after: int = 10):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.active = 0
+        self.queued = 0
+        self.rejected = 0
+        self._queues: "OrderedDict[str, Deque[GenerationTicket]]" = OrderedDict()
+
+    def acquire(self, client_id: str) -> GenerationTicket:
+        """
+        Take a generation slot or a place in the queue for the client.
+        Raises QueueFullError if the queue is full.
+        """
+        ticket = GenerationTicket(client_id)
+        if self.active < self.max_concurrent and self.queued == 0:
+            self._grant(ticket)
+            return ticket
+        if self.queued >= self.max_queue:
+            raise QueueFullError(self.reject())
+
+        self._queues.setdefault(client_id, deque()).append(ticket)
+        self.queued += 1
+        logger.info(f"Queued generation for {client_id} at position {self.position(ticket)} ({self.active} active)")
+        return ticket
+
+    def reject(self) -> int:
+        """Count a request turned away because the scheduler is full; returns the retry hint in seconds"""
+        self.rejected += 1
+        return self.retry_after
+
+    @property
+    def is_full(self) -> bool:
+        return self.active >= self.max_concurrent and self.queued >= self.max_queue
+
+    async def wait(self, ticket: GenerationTicket) -> AsyncGenerator[int, None]:
+        """Yield the ticket's 1-based queue position whenever it changes, until a slot is granted"""
+        last_position = None
+        while not ticket.granted:
+            position = self.position(ticket)
+            if position != last_position:
+                last_position = position
+                yield position
+            ticket._changed.clear()
+            await ticket._changed.wait()
+
+    def release(self, ticket: GenerationTicket):
+        """Free the ticket's slot, or leave the queue if it was still waiting. Idempotent."""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.granted:
+            self.active -= 1
+        else:
+            queue = self._queues.get(ticket.client_id)
+            if queue is not None and ticket in queue:
+                queue.remove(ticket)
+                self.queued -= 1
+                if not queue:
+                    del self._queues[ticket.client_id]
+        self._dispatch()
+
+    def position(self, ticket: GenerationTicket) -> int:
+        """
+        1-based position in service order. Clients are served in turn, so the ticket at
+        index i of its client's queue waits for i rounds of every other client plus, in its
+        own round, the clients ahead of it in the rotation.
+        """
+        queue = self._queues.get(ticket.client_id)
+        if ticket.granted or queue is None:
+            return 0
+        index = queue.index(ticket)
+        position = 1 + index
+        ahead_in_rotation = True
+        for client_id, client_queue in self._queues.items():
+            if client_id == ticket.client_id:
+                ahead_in_rotation = False
+                continue
+            position += min(len(client_queue), index)
+            if ahead_in_rotation and len(client_queue) > index:
+                position += 1
+        return position
+
+    def _grant(self, ticket: GenerationTicket):
+        ticket.granted = True
+        ticket.granted_at = time.monotonic()
+        self.active += 1
+        ticket._changed.set()
+
+    def _dispatch(self):
+        while self.active < self.max_concurrent and self.queued:
+            # Serve the client at the head of the rotation, then move it to the back
+            client_id, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self._queues.move_to_end(client_id)
+            else:
+                del self._queues[client_id]
+            self._grant(ticket)
+            logger.info(f"Started queued generation for {client_id} after {ticket.wait_seconds:.2f} seconds")
+
+        # Positions moved for everyone still waiting
+        for queue in self._queues.values():
+            for waiting in queue:
+                waiting._changed.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected
+        }
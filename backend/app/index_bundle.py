@@ -0,0 +1,227 @@
+"""
+Portable export/import of the document collection with its embeddings.
+
+A bundle is a zip archive holding, per batch of chunks, an `.npy` array of embeddings
+(float16 by default) and a JSON list of ids, texts and metadata, plus a header naming the
+embedding model that produced the vectors and the file manifest. Importing writes the
+stored vectors directly, so a new replica needs no extraction or embedding. Both
+directions work batch by batch, so memory stays bounded by the batch size.
+
+Exporting only pauses writes while the chunks are copied out of the collection to
+uncompressed staging files; the archive is compressed after writes resume. Importing
+checks every batch of the bundle before it touches the store, so a truncated or corrupt
+bundle never leaves a cleared collection behind.
+
+Usage (from the backend directory, with the backend stopped):
+    python -m app.index_bundle export corpus.zip
+    python -m app.index_bundle import corpus.zip --replace
+"""
+import argparse
+import json
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable
+import numpy as np
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+HEADER = "header.json"
+DTYPES = ("float16", "float32")
+
+
+def _batch_names(batch: int):
+    return f"embeddings_{batch:06d}.npy", f"chunks_{batch:06d}.json"
+
+
+def export_index(store, path: str, batch_size: int = 1000, dtype: str = "float16") -> Dict[str, Any]:
+    """Write every chunk of the store, with its embedding, to a bundle at `path`. Writes are paused while the chunks are read."""
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype {dtype}, expected one of {DTYPES}")
+    start = time.perf_counter()
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    batches, chunk_count, dimension = 0, 0, None
+    with tempfile.TemporaryDirectory(dir=path.parent, prefix=".export_") as staging:
+        staging = Path(staging)
+        # Writes wait until the copy is done, so paging by offset neither skips nor repeats chunks
+        with store.write_gate.paused():
+            offset = 0
+            while True:
+                page = store.collection.get(include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset)
+                if not len(page['ids']):
+                    break
+                embeddings = np.asarray(page['embeddings'], dtype=dtype)
+                dimension = embeddings.shape[1]
+                embeddings_name, chunks_name = _batch_names(batches)
+                np.save(staging / embeddings_name, embeddings, allow_pickle=False)
+                with open(staging / chunks_name, 'w', encoding='utf-8') as f:
+                    json.dump({"ids": page['ids'], "documents": page['documents'], "metadatas": page['metadatas']}, f)
+                batches += 1
+                chunk_count += len(page['ids'])
+                offset += len(page['ids'])
+            files = store.manifest.files()
+        paused_seconds = time.perf_counter() - start
+
+        header = {
+            "format_version": FORMAT_VERSION,
+            "embedding_id": store.embedding_id,
+            "dimension": dimension,
+            "dtype": dtype,
+            "chunk_count": chunk_count,
+            "batches": batches,
+            "chunking": store.get_chunking_config(),
+            "files": files,
+            "created_at": time.time()
+        }
+        with zipfile.ZipFile(tmp_path, 'w', allowZip64=True) as bundle:
+            for batch in range(batches):
+                embeddings_name, chunks_name = _batch_names(batch)
+                # Vectors barely compress, the JSON does
+                bundle.write(staging / embeddings_name, embeddings_name, compress_type=zipfile.ZIP_STORED)
+                bundle.write(staging / chunks_name, chunks_name, compress_type=zipfile.ZIP_DEFLATED)
+            bundle.writestr(HEADER, json.dumps(header), compress_type=zipfile.ZIP_DEFLATED)
+    tmp_path.replace(path)
+    logger.info(
+        f"Exported {chunk_count} chunks in {batches} batches to {path} in {time.perf_counter() - start:.2f} seconds "
+        f"(writes paused for {paused_seconds:.2f} seconds)"
+    )
+    return {k: v for k, v in header.items() if k != "files"}
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    with zipfile.ZipFile(path) as bundle:
+        return json.loads(bundle.read(HEADER))
+
+
+def _read_array_shape(bundle: zipfile.ZipFile, name: str):
+    """Shape and dtype from the header of an `.npy` member, without reading the vectors"""
+    with bundle.open(name) as f:
+        if np.lib.format.read_magic(f) == (1, 0):
+            shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+    return shape, dtype
+
+
+def validate_bundle(bundle: zipfile.ZipFile, store) -> Dict[str, Any]:
+    """
+    Check the header and every batch of an open bundle against the store and return the
+    header. Raises ValueError on the first problem, before anything is written.
+    """
+    try:
+        header = json.loads(bundle.read(HEADER))
+    except KeyError:
+        raise ValueError(f"Bundle has no {HEADER}")
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format version {header.get('format_version')}")
+    if header["embedding_id"] != store.embedding_id:
+        raise ValueError(
+            f"Bundle was embedded with {header['embedding_id']} but the store uses {store.embedding_id}, "
+            f"its vectors are not comparable"
+        )
+    if not isinstance(header.get("files"), dict):
+        raise ValueError("Bundle header has no file manifest")
+
+    members = set(bundle.namelist())
+    chunk_count = 0
+    for batch in range(header["batches"]):
+        embeddings_name, chunks_name = _batch_names(batch)
+        if embeddings_name not in members or chunks_name not in members:
+            raise ValueError(f"Bundle is missing batch {batch}")
+        shape, dtype = _read_array_shape(bundle, embeddings_name)
+        if dtype.name not in DTYPES or len(shape) != 2:
+            raise ValueError(f"Batch {batch} holds {dtype} vectors of shape {shape}, expected a 2-d float array")
+        if header["dimension"] is not None and shape[1] != header["dimension"]:
+            raise ValueError(f"Batch {batch} has dimension {shape[1]}, expected {header['dimension']}")
+        try:
+            chunks = json.loads(bundle.read(chunks_name))
+        except (zipfile.BadZipFile, json.JSONDecodeError) as e:
+            raise ValueError(f"Batch {batch} chunks are corrupt: {e}")
+        if not len(chunks['ids']) == len(chunks['documents']) == len(chunks['metadatas']) == shape[0]:
+            raise ValueError(f"Batch {batch} has mismatched numbers of ids, documents, metadatas and vectors")
+        chunk_count += shape[0]
+    if chunk_count != header["chunk_count"]:
+        raise ValueError(f"Bundle holds {chunk_count} chunks, its header says {header['chunk_count']}")
+    return header
+
+
+def import_index(
+        store,
+        path,
+        replace: bool = False,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, Any]:
+    """
+    Load a bundle (path or seekable file object) into the store without computing any embeddings. The bundle must come
+    from the same embedding model as the store. The whole bundle is validated first; then
+    with `replace` the store is cleared, otherwise files of the bundle that the store already
+    holds are deleted first and the rest of the store is kept.
+    progress_callback receives (chunks imported, total chunks) after each batch.
+    """
+    start = time.perf_counter()
+    with zipfile.ZipFile(path) as bundle:
+        header = validate_bundle(bundle, store)
+
+        if replace:
+            if not store.clear_documents():
+                raise RuntimeError("Failed to clear documents before import")
+        else:
+            # The bundle's manifest replaces these files' entries, so their old chunks would
+            # no longer be tracked and never be removed by later syncs or deletes
+            for file_name in header["files"]:
+                if store.manifest.get(file_name) is not None:
+                    store.delete_file(file_name)
+
+        imported = 0
+        for batch in range(header["batches"]):
+            embeddings_name, chunks_name = _batch_names(batch)
+            with bundle.open(embeddings_name) as f:
+                embeddings = np.lib.format.read_array(f, allow_pickle=False).astype(np.float32)
+            chunks = json.loads(bundle.read(chunks_name))
+            store.write_embedded(chunks['ids'], chunks['documents'], chunks['metadatas'], embeddings.tolist())
+            imported += len(chunks['ids'])
+            if progress_callback:
+                progress_callback(imported, header["chunk_count"])
+
+        # Carry the file manifest over so re-uploads of the same files are recognized as unchanged
+        store.manifest.update(header["files"])
+
+    if header["chunking"] != store.get_chunking_config():
+        logger.warning(f"Bundle was chunked with {header['chunking']}, the store is configured for {store.get_chunking_config()}")
+    summary = {
+        "chunks": imported,
+        "files": len(header["files"]),
+        "embedding_id": header["embedding_id"],
+        "seconds": round(time.perf_counter() - start, 2)
+    }
+    logger.info(f"Imported {imported} chunks from {path} in {summary['seconds']} seconds")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Export the collection to a bundle")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--batch-size", type=int, default=1000)
+    export_parser.add_argument("--dtype", choices=DTYPES, default="float16")
+    import_parser = subparsers.add_parser("import", help="Import a bundle into the collection")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--replace", action="store_true", help="Clear the collection first")
+    args = parser.parse_args()
+
+    from .document_store import ChromaDocStore
+    store = ChromaDocStore()
+    if args.command == "export":
+        print(json.dumps(export_index(store, args.path, args.batch_size, args.dtype), indent=2))
+    else:
+        print(json.dumps(import_index(store, args.path, replace=args.replace), indent=2))
+    store.save_lexical_index()
+
+
+if __name__ == "__main__":
+    main()
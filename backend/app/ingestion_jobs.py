@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass, field, asdict
+from io import BytesIO
+from typing import List, Dict, Any, Optional, Tuple
+from .logger_config import get_logger
+from .executors import get_ingestion_executor
+from .metrics import INGESTED_PAGES, INGESTED_CHUNKS, INGESTION_PAGES_PER_SECOND, INGESTION_CHUNKS_PER_SECOND
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class FileProgress:
+    """Progress of a single file inside an ingestion job"""
+    file_name: str
+    stage: str = "queued"  # queued -> extracting -> embedding -> completed | failed
+    pages_extracted: int = 0
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    chunks_written: int = 0
+    chunks_reused: int = 0
+    chunks_removed: int = 0
+    unchanged: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class IngestionJob:
+    """A batch of uploaded files ingested in the background"""
+    id: str
+    files: List[FileProgress]
+    collection: Optional[str] = None
+    status: str = "queued"  # queued -> running -> completed | partial | failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "partial", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class IngestionJobManager:
+    """
+    Runs document ingestion (extraction, splitting, embedding, writing) on a
+    bounded thread pool so uploads return immediately and several jobs can
+    progress concurrently without blocking the event loop.
+    """
+
+    def __init__(self, document_store, executor: Executor = None, max_jobs: int = None):
+        self.document_store = document_store
+        # Shared ingestion pool, sized by INGESTION_MAX_WORKERS
+        self.executor = executor or get_ingestion_executor()
+        self.max_jobs = max_jobs or int(os.getenv('INGESTION_JOB_HISTORY', 100))
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, uploads: List[Tuple[str, bytes]], document_store=None) -> IngestionJob:
+        """
+        Enqueue a job for the given (file_name, content) pairs and return it immediately.
+        Files go to `document_store` (e.g. a named collection), by default the manager's store.
+        """
+        store = document_store or self.document_store
+        job = IngestionJob(
+            id=uuid.uuid4().hex,
+            files=[FileProgress(file_name=file_name) for file_name, _ in uploads],
+            collection=store.collection_name
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict_finished_jobs()
+        self.executor.submit(self._run_job, job, uploads, store)
+        logger.info(f"Queued ingestion job {job.id} with {len(uploads)} files")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[IngestionJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _evict_finished_jobs(self):
+        # Keep the job history bounded, dropping the oldest finished jobs first
+        while len(self._jobs) > self.max_jobs:
+            finished = next((job_id for job_id, job in self._jobs.items() if job.is_finished), None)
+            if finished is None:
+                break
+            del self._jobs[finished]
+
+    def _run_job(self, job: IngestionJob, uploads: List[Tuple[str, bytes]], store):
+        job.status = "running"
+        job.started_at = time.time()
+        logger.info(f"Starting ingestion job {job.id}")
+
+        for progress, (file_name, content) in zip(job.files, uploads):
+            try:
+                self._ingest_file(store, progress, file_name, content)
+                progress.stage = "completed"
+            except Exception as e:
+                progress.stage = "failed"
+                progress.error = str(e)
+                logger.error(f"Ingestion job {job.id} failed for {file_name}: {str(e)}", exc_info=True)
+
+        failed = sum(1 for progress in job.files if progress.stage == "failed")
+        if failed == 0:
+            job.status = "completed"
+        elif failed == len(job.files):
+            job.status = "failed"
+        else:
+            job.status = "partial"
+        job.finished_at = time.time()
+        logger.info(f"Finished ingestion job {job.id} with status {job.status} in {job.finished_at - job.started_at:.2f} seconds")
+
+    def _ingest_file(self, store, progress: FileProgress, file_name: str, content: bytes):
+        file_hash = store.compute_file_hash(content)
+        if store.is_file_unchanged(file_name, file_hash):
+            # Re-upload of identical content: nothing to extract or embed
+            progress.unchanged = True
+            progress.chunks_reused = store.manifest.get(file_name)['chunk_count']
+            logger.info(f"Skipping unchanged file {file_name}")
+            return
+
+        progress.stage = "extracting"
+        extract_start = time.perf_counter()
+        file_obj = BytesIO(content)
+        file_obj.name = file_name
+
+        def on_pages(count: int):
+            progress.pages_extracted += count
+
+        # PDF pages are counted as each extraction batch completes
+        documents = store.extract_text_from_stream(file_obj, file_name, progress_callback=on_pages)
+        if not documents:
+            raise ValueError(f"No documents extracted from {file_name}")
+        # Keep the count reported per batch (it includes pages without text, so it must not
+        # jump back); formats extracted without page progress report their documents instead
+        if progress.pages_extracted == 0:
+            progress.pages_extracted = len(documents)
+        INGESTED_PAGES.inc(len(documents))
+        INGESTION_PAGES_PER_SECOND.observe(len(documents) / max(time.perf_counter() - extract_start, 1e-6))
+
+        chunks, metadatas = store.split_documents(documents)
+        progress.chunks_total = len(chunks)
+
+        progress.stage = "embedding"
+        embed_start = time.perf_counter()
+
+        def on_progress(stage: str, count: int):
+            if stage == "embedded":
+                progress.chunks_embedded += count
+            elif stage == "written":
+                progress.chunks_written += count
+
+        summary = store.sync_file(file_name, file_hash, chunks, metadatas, progress_callback=on_progress)
+        INGESTED_CHUNKS.inc(progress.chunks_written)
+        if progress.chunks_written:
+            INGESTION_CHUNKS_PER_SECOND.observe(progress.chunks_written / max(time.perf_counter() - embed_start, 1e-6))
+        progress.chunks_reused = summary['reused']
+        progress.chunks_removed = summary['removed']
@@ -2,6 +2,8 @@ import logging
 import time
 from functools import wraps
 import asyncio
+import inspect
+from .metrics import FUNCTION_SECONDS
 
 # Configure logging
 logging.basicConfig(
@@ -13,15 +15,25 @@ def get_logger(name):
     return logging.getLogger(name)
 
 def log_time(logger):
+    """
+    Log the duration of each call and record it in the rag_function_seconds histogram.
+    Start lines are logged at debug level only. Generator functions are not timed, their
+    call returns before any work is done.
+    """
     def decorator(func):
+        histogram = None
+        if not (inspect.isgeneratorfunction(func) or inspect.isasyncgenfunction(func)):
+            histogram = FUNCTION_SECONDS.labels(func.__name__)
+
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
             start_time = time.time()
-            logger.info(f"Starting {func.__name__}")
+            logger.debug(f"Starting {func.__name__}")
             try:
                 result = await func(*args, **kwargs)
                 end_time = time.time()
                 duration = end_time - start_time
+                histogram.observe(duration)
                 logger.info(f"Finished {func.__name__} in {duration:.2f} seconds")
                 return result
             except Exception as e:
@@ -33,11 +45,13 @@ def log_time(logger):
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
             start_time = time.time()
-            logger.info(f"Starting {func.__name__}")
+            logger.debug(f"Starting {func.__name__}")
             try:
                 result = func(*args, **kwargs)
                 end_time = time.time()
                 duration = end_time - start_time
+                if histogram is not None:
+                    histogram.observe(duration)
                 logger.info(f"Finished {func.__name__} in {duration:.2f} seconds")
                 return result
             except Exception as e:
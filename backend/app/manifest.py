@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class DocumentManifest:
+    """
+    File-level manifest of ingested documents, persisted as a JSON file.
+
+    Each entry is keyed by file name and records the file content hash, the
+    chunking configuration used and the IDs of the chunks written for it, so
+    re-uploads can be diffed without scanning the collection.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        logger.info(f"Loaded document manifest with {len(self._entries)} files from {self.path}")
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read document manifest {self.path}, starting empty: {e}")
+            return {}
+
+    def _save(self):
+        # Write to a temporary file first so a crash never leaves a truncated manifest
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, file_name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(file_name)
+
+    def set(self, file_name: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[file_name] = entry
+            self._save()
+
+    def update(self, entries: Dict[str, Dict[str, Any]]):
+        """Set many entries with a single write of the file"""
+        with self._lock:
+            self._entries.update(entries)
+            self._save()
+
+    def remove(self, file_name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.pop(file_name, None)
+            if entry is not None:
+                self._save()
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+    def digest(self) -> str:
+        """Hash of all entries, changing whenever any file's chunks change"""
+        with self._lock:
+            return hashlib.sha256(json.dumps(self._entries, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._entries)
@@ -0,0 +1,115 @@
+"""
+In-process metrics exposed on /metrics in the Prometheus text format, recorded with
+prometheus_client in a registry of the backend's own.
+
+Values that other components already keep (cache hit counts, scheduler queue) are not
+duplicated on the hot path: callback metrics read them when /metrics is scraped.
+"""
+import logging
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, disable_created_metrics, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Plain logging: logger_config imports this module for log_time
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# No *_created series next to every counter and histogram, as before the switch to prometheus_client
+disable_created_metrics()
+REGISTRY = CollectorRegistry()
+
+
+class _CallbackCollector:
+    """
+    A counter or gauge whose samples are read at scrape time from `callback`, which
+    returns (label values, value) pairs. Nothing is recorded on the hot path.
+    """
+
+    def __init__(self, name: str, description: str, type_name: str, callback: Callable[[], Iterable[Tuple[Sequence[str], float]]], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.family = CounterMetricFamily if type_name == "counter" else GaugeMetricFamily
+        self.callback = callback
+        self.labelnames = list(labelnames)
+
+    def describe(self):
+        # Lets the registry check names at registration without calling the callback
+        return [self.family(self.name, self.description, labels=self.labelnames)]
+
+    def collect(self):
+        family = self.family(self.name, self.description, labels=self.labelnames)
+        try:
+            for key, value in self.callback():
+                family.add_metric([str(label) for label in key], value)
+        except Exception as e:
+            # A failing callback must not take the other metrics down
+            logger.error(f"Could not collect metric {self.name}: {e}")
+            return
+        yield family
+
+
+def register_callback(name: str, description: str, type_name: str, callback, labelnames: Sequence[str] = ()):
+    """Expose a "counter" or "gauge" read from `callback` at scrape time"""
+    REGISTRY.register(_CallbackCollector(name, description, type_name, callback, labelnames))
+
+
+# Retrieval
+EMBEDDING_SECONDS = Histogram("rag_embedding_seconds", "Time to embed one batch of texts", buckets=LATENCY_BUCKETS, registry=REGISTRY)
+EMBEDDED_TEXTS = Counter("rag_embedded_texts", "Texts embedded by the model", registry=REGISTRY)
+SEARCH_SECONDS = Histogram("rag_search_seconds", "Index search time per call", ["index"], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+RERANK_SECONDS = Histogram("rag_rerank_seconds", "Cross-encoder reranking time per query", buckets=LATENCY_BUCKETS, registry=REGISTRY)
+RETRIEVAL_SECONDS = Histogram("rag_retrieval_seconds", "Retrieval time per question, embedding and search included", buckets=LATENCY_BUCKETS, registry=REGISTRY)
+PROMPT_ASSEMBLY_SECONDS = Histogram("rag_prompt_assembly_seconds", "Time to pack the context and history into the prompt", buckets=LATENCY_BUCKETS, registry=REGISTRY)
+
+# Generation
+LLM_TTFT_SECONDS = Histogram("rag_llm_time_to_first_token_seconds", "Time from the Ollama request to its first token", buckets=SLOW_BUCKETS, registry=REGISTRY)
+LLM_TOKENS_PER_SECOND = Histogram("rag_llm_tokens_per_second", "Generation speed reported by Ollama per answer", buckets=RATE_BUCKETS, registry=REGISTRY)
+LLM_TOKENS = Counter("rag_llm_tokens", "Tokens processed by Ollama", ["kind"], registry=REGISTRY)
+LLM_REQUESTS = Counter("rag_llm_requests", "Ollama chat requests by outcome", ["outcome"], registry=REGISTRY)
+STREAMS_IN_FLIGHT = Gauge("rag_streams_in_flight", "Open /query answer streams", registry=REGISTRY)
+QUERIES = Counter("rag_queries", "/query requests by outcome", ["outcome"], registry=REGISTRY)
+
+# Ingestion
+INGESTED_PAGES = Counter("rag_ingested_pages", "Pages extracted from ingested files", registry=REGISTRY)
+INGESTED_CHUNKS = Counter("rag_ingested_chunks", "Chunks written by ingestion", registry=REGISTRY)
+INGESTION_CHUNKS_PER_SECOND = Histogram("rag_ingestion_chunks_per_second", "Ingestion throughput per file", buckets=RATE_BUCKETS, registry=REGISTRY)
+INGESTION_PAGES_PER_SECOND = Histogram("rag_ingestion_pages_per_second", "Extraction throughput per file", buckets=RATE_BUCKETS, registry=REGISTRY)
+
+# Instrumented functions (log_time)
+FUNCTION_SECONDS = Histogram("rag_function_seconds", "Duration of functions decorated with log_time", ["function"], buckets=SLOW_BUCKETS, registry=REGISTRY)
+
+
+_caches: Dict[str, Callable[[], Optional[object]]] = {}
+
+
+def register_cache(name: str, cache_getter: Callable[[], Optional[object]]):
+    """
+    Expose hits, misses and hit ratio of a cache with `hits`/`misses` attributes. The
+    getter is called at scrape time, so caches created later (or replaced) are picked up.
+    """
+    _caches[name] = cache_getter
+
+
+def _cache_counts():
+    for name, cache_getter in list(_caches.items()):
+        cache = cache_getter()
+        if cache is not None:
+            yield name, cache.hits, cache.misses
+
+
+register_callback("rag_cache_hits", "Cache hits", "counter", lambda: [((name,), hits) for name, hits, _ in _cache_counts()], ["cache"])
+register_callback("rag_cache_misses", "Cache misses", "counter", lambda: [((name,), misses) for name, _, misses in _cache_counts()], ["cache"])
+register_callback(
+    "rag_cache_hit_ratio", "Cache hit ratio since start", "gauge",
+    lambda: [((name,), hits / (hits + misses) if hits + misses else 0.0) for name, hits, misses in _cache_counts()],
+    ["cache"]
+)
+
+
+def render() -> bytes:
+    return generate_latest(REGISTRY)
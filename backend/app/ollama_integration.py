@@ -1,7 +1,10 @@
 import aiohttp
+import asyncio
 import json
+import time
 from typing import AsyncGenerator
 from .logger_config import get_logger, log_time
+from .metrics import LLM_TTFT_SECONDS, LLM_TOKENS_PER_SECOND, LLM_TOKENS, LLM_REQUESTS
 import os
 from dotenv import load_dotenv
 
@@ -11,50 +14,143 @@ logger = get_logger(__name__)
 
 
 class OllamaAPI:
-    def __init__(self, base_url: str = None):
+    """
+    Ollama client holding one pooled aiohttp session for the application lifetime.
+    Call `start()` on startup and `close()` on shutdown; `chat()` starts the session lazily otherwise.
+    """
+
+    def __init__(self, base_url: str = None, pool_size: int = None, keep_alive: str = None):
         self.base_url = (base_url or os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')).rstrip("/")
         self.chat_url = f"{self.base_url}/api/chat"
         self.models_url = f"{self.base_url}/api/tags"
         self.timeout = aiohttp.ClientTimeout(total=3600)
+        self.pool_size = pool_size or int(os.getenv('OLLAMA_POOL_SIZE', 32))
+        # How long Ollama keeps the model loaded after a request, e.g. "30m" or "-1" for forever
+        self.keep_alive = keep_alive or os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+        self._session: aiohttp.ClientSession | None = None
+        self._session_lock = asyncio.Lock()
         logger.info(f"Initialized OllamaAPI with base URL: {self.base_url}")
 
+    async def start(self) -> aiohttp.ClientSession:
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    limit_per_host=self.pool_size,
+                    keepalive_timeout=300,
+                    ttl_dns_cache=300
+                )
+                self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+                logger.info(f"Opened Ollama connection pool with {self.pool_size} connections")
+        return self._session
+
+    async def close(self):
+        async with self._session_lock:
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+                logger.info("Closed Ollama connection pool")
+            self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            return await self.start()
+        return self._session
+
+    @log_time(logger)
+    async def warm_up(self, model: str | None) -> bool:
+        """
+        Load the model into Ollama's memory ahead of the first question. A chat request
+        with no messages loads the model without generating anything.
+        """
+        if not model:
+            logger.warning("No model configured, skipping warm-up")
+            return False
+        try:
+            session = await self._get_session()
+            async with session.post(
+                    self.chat_url,
+                    json={"model": model, "messages": [], "keep_alive": self.keep_alive, "stream": False},
+                    headers={"Content-Type": "application/json"}
+            ) as response:
+                response.raise_for_status()
+                await response.read()
+            logger.info(f"Model {model} is loaded and kept alive for {self.keep_alive}")
+            return True
+        except Exception as e:
+            logger.error(f"Model warm-up failed: {str(e)}")
+            return False
+
     @log_time(logger)
     async def chat(
             self,
             messages: list[dict[str, str]],
             model: str | None = None,
-            format: dict | None = None
+            format: dict | None = None,
+            stats: dict | None = None
     ) -> AsyncGenerator[str, None]:
         """
         Async streaming chat using Ollama API
+
+        If `stats` is given, it receives the time to first token and, once the stream is
+        done, Ollama's token counts (prompt_tokens, completion_tokens) and durations.
         """
-        
+
         payload = {
             "model": model,
             "messages": messages,
-            "stream": True
+            "stream": True,
+            "keep_alive": self.keep_alive
         }
         if format:
             payload["format"] = format
 
         try:
             logger.info(f"Starting async chat request with model: {model}")
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(
-                        self.chat_url,
-                        json=payload,
-                        headers={"Content-Type": "application/json"}
-                ) as response:
-                    response.raise_for_status()
-
-                    async for line in response.content:
-                        if line:
-                            json_response = json.loads(line)
-                            if "message" in json_response:
-                                yield json_response["message"]["content"]
+            session = await self._get_session()
+            start_time = time.perf_counter()
+            first_token = True
+            async with session.post(
+                    self.chat_url,
+                    json=payload,
+                    headers={"Content-Type": "application/json"}
+            ) as response:
+                response.raise_for_status()
+
+                async for line in response.content:
+                    if line:
+                        json_response = json.loads(line)
+                        if "message" in json_response:
+                            if first_token:
+                                ttft = time.perf_counter() - start_time
+                                LLM_TTFT_SECONDS.observe(ttft)
+                                logger.info(f"Time to first token: {ttft:.2f} seconds")
+                                if stats is not None:
+                                    stats["llm_ttft_ms"] = round(ttft * 1000, 1)
+                                first_token = False
+                            yield json_response["message"]["content"]
+                        if json_response.get("done"):
+                            self._record_usage(json_response)
+                        if json_response.get("done") and stats is not None:
+                            # Durations are reported in nanoseconds
+                            stats["prompt_tokens"] = json_response.get("prompt_eval_count")
+                            stats["completion_tokens"] = json_response.get("eval_count")
+                            if "total_duration" in json_response:
+                                stats["llm_total_ms"] = round(json_response["total_duration"] / 1e6, 1)
+                            if "eval_duration" in json_response:
+                                stats["llm_eval_ms"] = round(json_response["eval_duration"] / 1e6, 1)
 
+            LLM_REQUESTS.labels("ok").inc()
             logger.info("Finished streaming chat response")
 
         except Exception as e:
+            LLM_REQUESTS.labels("error").inc()
             logger.error(f"API request failed: {str(e)}")
             raise
+
+    @staticmethod
+    def _record_usage(final: dict):
+        """Record token counts and generation speed from Ollama's final stream frame"""
+        LLM_TOKENS.labels("prompt").inc(final.get("prompt_eval_count") or 0)
+        LLM_TOKENS.labels("completion").inc(final.get("eval_count") or 0)
+        if final.get("eval_count") and final.get("eval_duration"):
+            LLM_TOKENS_PER_SECOND.observe(final["eval_count"] / (final["eval_duration"] / 1e9))
@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO, StringIO
+from typing import BinaryIO, Callable, List, Optional
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfdocument import PDFDocument, PDFTextExtractionNotAllowed
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+from .logger_config import get_logger
+
+# This module is deliberately lightweight: worker processes are spawned and only
+# import pdfminer, not chromadb or the embedding model.
+
+logger = get_logger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Lazily create the process pool shared by all extractions"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawn instead of fork: the parent process runs threads (ingestion, chromadb)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Started PDF extraction process pool with {workers} workers")
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _extract_pages_from(file_obj: BinaryIO, start: int, end: int, progress_callback: Optional[Callable[[int], None]] = None) -> List[str]:
+    """
+    Extract the text of pages [start, end) (0-based); pages after `end` are never visited.
+    progress_callback, if given, receives 1 after each page.
+    """
+    resource_manager = PDFResourceManager()
+    laparams = LAParams()
+    codec = 'utf-8'
+    page_texts = []
+
+    pages = PDFPage.get_pages(file_obj, pagenos=set(range(start, end)), maxpages=end, check_extractable=True)
+    for page in pages:
+        output_string = StringIO()
+        converter = TextConverter(resource_manager, output_string, codec=codec, laparams=laparams)
+        interpreter = PDFPageInterpreter(resource_manager, converter)
+        try:
+            interpreter.process_page(page)
+            page_texts.append(output_string.getvalue())
+            if progress_callback:
+                progress_callback(1)
+        finally:
+            converter.close()
+            output_string.close()
+
+    return page_texts
+
+
+def extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """
+    Extract the text of pages [start, end) (0-based) from a PDF file.
+    Runs inside a worker process; the parent writes the document to a temporary file
+    once, so every batch only carries its path.
+    """
+    with open(pdf_path, 'rb') as f:
+        return _extract_pages_from(f, start, end)
+
+
+def count_pages(pdf_bytes: bytes) -> int:
+    """Page count from the root of the page tree, without walking the pages"""
+    document = PDFDocument(PDFParser(BytesIO(pdf_bytes)))
+    if not document.is_extractable:
+        raise PDFTextExtractionNotAllowed("Text extraction is not allowed")
+    count = resolve1(resolve1(document.catalog.get('Pages')).get('Count'))
+    if isinstance(count, int) and count >= 0:
+        return count
+    # Malformed page tree root, count the pages one by one
+    return sum(1 for _ in PDFPage.create_pages(document))
+
+
+def extract_pages(
+        pdf_bytes: bytes,
+        workers: int = None,
+        batch_size: int = None,
+        progress_callback: Optional[Callable[[int], None]] = None
+) -> List[str]:
+    """
+    Extract text per page, fanning page batches out over a process pool.
+    Results are returned in page order.
+
+    Args:
+        pdf_bytes: Raw PDF content
+        workers: Number of worker processes. Defaults to PDF_EXTRACTION_WORKERS, 1 disables the pool
+        batch_size: Pages per task. Defaults to PDF_PAGE_BATCH_SIZE
+        progress_callback: Optional callable receiving the number of pages of each batch as
+            it completes, in completion order (1 per page when the pool is not used)
+    """
+    workers = workers or int(os.getenv('PDF_EXTRACTION_WORKERS', os.cpu_count() or 1))
+    batch_size = batch_size or int(os.getenv('PDF_PAGE_BATCH_SIZE', 16))
+
+    page_count = count_pages(pdf_bytes)
+    if workers <= 1 or page_count <= batch_size:
+        return _extract_pages_from(BytesIO(pdf_bytes), 0, page_count, progress_callback)
+
+    ranges = [(start, min(start + batch_size, page_count)) for start in range(0, page_count, batch_size)]
+    logger.info(f"Extracting {page_count} pages in {len(ranges)} batches across {workers} processes")
+
+    # Workers read the document from disk instead of receiving a pickled copy per batch
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+        f.write(pdf_bytes)
+        pdf_path = f.name
+    futures = []
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(extract_page_range, pdf_path, start, end) for start, end in ranges]
+
+        # Report batches as they finish, then assemble the pages in order
+        for future in as_completed(futures):
+            batch_texts = future.result()
+            if progress_callback:
+                progress_callback(len(batch_texts))
+        page_texts = []
+        for future in futures:
+            page_texts.extend(future.result())
+        return page_texts
+    finally:
+        # After a failed batch, the batches not started yet are dropped before their file goes
+        for future in futures:
+            future.cancel()
+        try:
+            os.remove(pdf_path)
+        except OSError:
+            pass
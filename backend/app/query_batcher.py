@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, Dict, List, Tuple
+from .executors import run_retrieval
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class QueryMicroBatcher:
+    """
+    Collects queries that arrive within a short window (or until `max_batch_size` is
+    reached) and retrieves them together through `query_documents_batch`, so concurrent
+    users share one embedding forward pass and one multi-query vector search.
+
+    Queries are only batched with others against the same store (collection) and with
+    identical retrieval parameters. Must be used from a single event loop.
+    """
+
+    def __init__(self, document_store, window_ms: float = 5, max_batch_size: int = 32):
+        self.document_store = document_store
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.queries = 0
+        self._pending: Dict[tuple, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[tuple, asyncio.TimerHandle] = {}
+        # Keep references to running batches so they are not garbage collected
+        self._tasks = set()
+
+    async def query(self, query: str, document_store=None, **params) -> Dict[str, Any]:
+        """Retrieve results for one query, sharing the work with concurrent callers"""
+        loop = asyncio.get_running_loop()
+        key = (document_store or self.document_store, tuple(sorted(params.items())))
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((query, future))
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await future
+
+    def _flush(self, key: tuple):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: tuple, batch: List[Tuple[str, asyncio.Future]]):
+        self.batches += 1
+        self.queries += len(batch)
+        document_store, params = key
+        try:
+            results = await run_retrieval(
+                document_store.query_documents_batch,
+                [query for query, _ in batch],
+                **dict(params)
+            )
+        except Exception as e:
+            logger.error(f"Batched retrieval of {len(batch)} queries failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(batch) > 1:
+            logger.info(f"Retrieved {len(batch)} queries in one batch")
+        for (_, future), result in zip(batch, results):
+            # The caller may have gone away (e.g. client disconnected) while we searched
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size
+        }
@@ -1,8 +1,15 @@
 import os
+import time
 from typing import AsyncGenerator, List
 from app.ollama_integration import OllamaAPI
+from app.answer_cache import AnswerCache
+from app.context_packer import ContextPacker, count_tokens
+from app.executors import run_retrieval
+from app.query_batcher import QueryMicroBatcher
 from pathlib import Path
 from dotenv import load_dotenv
+from app.logger_config import get_logger
+from app.metrics import RETRIEVAL_SECONDS, PROMPT_ASSEMBLY_SECONDS
 
 # Get the project root directory (where .env is located)
 root_dir = Path(__file__).resolve().parents[2]  # Go up 2 levels from rag_pipeline.py
@@ -11,31 +18,65 @@ env_path = root_dir / '.env'
 # Load the environment variables from the root .env file
 load_dotenv(dotenv_path=env_path)
 
+logger = get_logger(__name__)
+
+context_packer = ContextPacker(
+    context_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000)),
+    history_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", 1500)),
+    full_turns=int(os.getenv("HISTORY_FULL_TURNS", 4)),
+    old_turn_tokens=int(os.getenv("HISTORY_OLD_TURN_TOKENS", 100))
+)
+
+# Bump whenever the system prompt changes so cached answers built from the old prompt are not replayed
+PROMPT_VERSION = "1"
+
 def format_citation(metadata: dict) -> str:
     """Format citation from metadata"""
     file_name = metadata.get('file_name', 'unknown')
     page_range = metadata.get('page_range', 'unknown')
     return f"[{file_name}, pages: {page_range}]"
 
-async def rag_pipeline(document_store, query: str, messages: List[dict] = None, previous_chunks: List[str] = None, model: str = None) -> AsyncGenerator[str, None]:
+async def rag_pipeline(document_store, query: str, messages: List[dict] = None, previous_chunks: List[str] = None, model: str = None, answer_cache: AnswerCache = None, ollama_api: OllamaAPI = None, query_batcher: QueryMicroBatcher = None, stats: dict = None) -> AsyncGenerator[str, None]:
     """
     Async RAG pipeline with proper streaming
     
     Args:
-        document_store: The document store instance
+        document_store: The document store instance, or a multi-collection search view
         query: The user's question
         messages: Optional list of previous chat messages
         previous_chunks: Optional list of previous context chunks
         model: Optional model name to use for generation
+        answer_cache: Optional cache replaying answers to near-duplicate standalone questions
+        ollama_api: Shared Ollama client; a temporary one is created and closed if omitted
+        query_batcher: Optional micro-batcher sharing retrieval work with concurrent queries
+        stats: Optional dict filled with retrieval time, chunk counts, whether the answer was
+            replayed from the cache and the generation's token counts
     """
+    if stats is None:
+        stats = {}
     # Get new relevant chunks with distance threshold
     distance_threshold = float(os.getenv("DISTANCE_THRESHOLD", 0.6))
     n_results = int(os.getenv("N_RESULTS", 5))
-    results = document_store.query_documents(
-        query=query,
-        n_results=n_results, 
-        distance_threshold=distance_threshold
-    )
+    # Retrieval is blocking (embedding, index search), keep it off the event loop
+    retrieval_start = time.perf_counter()
+    if query_batcher is not None:
+        results = await query_batcher.query(
+            query,
+            document_store=document_store,
+            n_results=n_results,
+            distance_threshold=distance_threshold
+        )
+    else:
+        results = await run_retrieval(
+            document_store.query_documents,
+            query=query,
+            n_results=n_results, 
+            distance_threshold=distance_threshold
+        )
+    retrieval_seconds = time.perf_counter() - retrieval_start
+    RETRIEVAL_SECONDS.observe(retrieval_seconds)
+    stats["retrieval_ms"] = round(retrieval_seconds * 1000, 1)
+    assembly_start = time.perf_counter()
     
     # Format chunks with citations
     current_chunks = []
@@ -44,10 +85,10 @@ async def rag_pipeline(document_store, query: str, messages: List[dict] = None,
             citation = format_citation(metadata)
             current_chunks.append(f"{chunk} {citation}")
     
-    # Combine with previous context if available
-    all_chunks = current_chunks
-    if previous_chunks:
-        all_chunks = list(set(current_chunks + previous_chunks))  # Remove duplicates
+    # Current chunks arrive best first; previous context follows and is only kept if budget remains
+    all_chunks = context_packer.pack_chunks(current_chunks + (previous_chunks or []))
+    stats["chunk_count"] = len(current_chunks)
+    stats["context_chunks"] = len(all_chunks)
     
     # Create the system message - different versions based on available context
     if all_chunks:
@@ -77,8 +118,8 @@ async def rag_pipeline(document_store, query: str, messages: List[dict] = None,
     prompt = [system_message]
     
     if messages:
-        # Add previous conversation history
-        prompt.extend(messages)
+        # Add previous conversation history, compressed to the history budget
+        prompt.extend(context_packer.pack_history(messages))
     
     # Add the current query
     prompt.append({
@@ -86,9 +127,42 @@ async def rag_pipeline(document_store, query: str, messages: List[dict] = None,
         "content": query
     })
 
-    ollama_api = OllamaAPI()
+    PROMPT_ASSEMBLY_SECONDS.observe(time.perf_counter() - assembly_start)
+    prompt_size = sum(count_tokens(message['content']) for message in prompt)
+    stats["prompt_tokens_estimate"] = prompt_size
+    logger.info(f"Prompt size: {prompt_size} tokens")
+
     # Use provided model or fall back to environment variable
     model_to_use = model or os.getenv("OLLAMA_MODEL", "")
 
-    async for token in ollama_api.chat(prompt, model=model_to_use):
-        yield token
+    # Only standalone questions are cacheable, chat history changes the answer
+    cache_key = None
+    stats["answer_cached"] = False
+    if answer_cache is not None and not messages and not previous_chunks:
+        chunk_ids = results['ids'][0] if results.get('ids') else []
+        query_embedding = await run_retrieval(document_store.embed_query, query)
+        # Scoped to the collection (or view) searched, so other collections' writes keep these entries
+        cache_key = (query_embedding, chunk_ids, model_to_use, PROMPT_VERSION, document_store.collection_name, document_store.corpus_version)
+        cached_tokens = answer_cache.lookup(*cache_key)
+        if cached_tokens is not None:
+            logger.info("Replaying cached answer")
+            stats["answer_cached"] = True
+            for token in cached_tokens:
+                yield token
+            return
+
+    owns_client = ollama_api is None
+    if owns_client:
+        ollama_api = OllamaAPI()
+    tokens = []
+    try:
+        async for token in ollama_api.chat(prompt, model=model_to_use, stats=stats):
+            tokens.append(token)
+            yield token
+    finally:
+        if owns_client:
+            await ollama_api.close()
+
+    # Reached only when the stream completed without error or client disconnect
+    if cache_key is not None and tokens:
+        answer_cache.store(*cache_key, tokens)
@@ -0,0 +1,52 @@
+import time
+from typing import Dict, Any, Iterable, Optional
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class Readiness:
+    """
+    Tracks which heavy components have finished loading in the background, and how long
+    each took measured from process start, so /ready can report them.
+    """
+
+    def __init__(self, components: Iterable[str], started_at: Optional[float] = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.components: Dict[str, bool] = {name: False for name in components}
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def mark(self, name: str, seconds: Optional[float] = None):
+        """Record a timing milestone (e.g. accepting connections) without a component"""
+        self.timings[name] = round(seconds if seconds is not None else self.elapsed(), 3)
+
+    def mark_loaded(self, component: str):
+        self.components[component] = True
+        self.mark(component)
+        logger.info(f"Loaded {component} {self.timings[component]:.2f} seconds after start")
+        if self.is_ready:
+            logger.info(f"Backend ready {self.timings[component]:.2f} seconds after start")
+
+    def mark_failed(self, error: str):
+        self.error = error
+        logger.error(f"Backend failed to load: {error}")
+
+    @property
+    def is_ready(self) -> bool:
+        return self.error is None and all(self.components.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        status = "ready" if self.is_ready else ("error" if self.error else "loading")
+        result = {
+            "status": status,
+            "components": dict(self.components),
+            "startup_seconds": dict(self.timings),
+            "uptime_seconds": round(self.elapsed(), 3)
+        }
+        if self.error:
+            result["message"] = self.error
+        return result
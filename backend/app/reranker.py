@@ -0,0 +1,83 @@
+import threading
+import time
+from typing import Dict, Any, List
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Rescores over-fetched retrieval candidates with a small CPU cross-encoder and keeps the best n.
+
+    Scoring runs in batches against a per-request latency budget. After each batch the time
+    for the remaining batches is projected from the measured rate; if the budget would be
+    exceeded, reranking is abandoned and the candidates are returned in retrieval order.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 16, latency_budget_ms: float = 300):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.latency_budget_ms = latency_budget_ms
+        self.fallbacks = 0
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        # Loaded on first use so startup does not pay for it when reranking is never hit
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+                    logger.info(f"Loaded cross-encoder {self.model_name}")
+        return self._model
+
+    def rerank(self, query: str, results: Dict[str, Any], n_results: int, latency_budget_ms: float = None) -> Dict[str, Any]:
+        """
+        Reorder a query-style result ({'ids': [[...]], 'documents': [[...]], ...}) by cross-encoder
+        score and truncate it to n_results. Adds 'rerank_scores' when reranking completed.
+        """
+        budget = (latency_budget_ms if latency_budget_ms is not None else self.latency_budget_ms) / 1000.0
+        documents = results['documents'][0]
+        if len(documents) <= 1:
+            return results
+
+        model = self.model
+        pairs = [(query, document) for document in documents]
+        total_batches = (len(pairs) + self.batch_size - 1) // self.batch_size
+
+        scores: List[float] = []
+        start = time.perf_counter()
+        for batch_number, batch_start in enumerate(range(0, len(pairs), self.batch_size), start=1):
+            batch = pairs[batch_start:batch_start + self.batch_size]
+            scores.extend(float(score) for score in model.predict(batch, show_progress_bar=False))
+
+            elapsed = time.perf_counter() - start
+            projected = elapsed / batch_number * total_batches
+            if projected > budget:
+                self.fallbacks += 1
+                logger.warning(
+                    f"Reranking {len(pairs)} candidates would take ~{projected * 1000:.0f} ms "
+                    f"(budget {budget * 1000:.0f} ms), keeping retrieval order"
+                )
+                return self._reorder(results, list(range(min(n_results, len(documents)))))
+
+        order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:n_results]
+        reranked = self._reorder(results, order)
+        reranked['rerank_scores'] = [[scores[i] for i in order]]
+        logger.info(f"Reranked {len(pairs)} candidates in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return reranked
+
+    @staticmethod
+    def _reorder(results: Dict[str, Any], order: List[int]) -> Dict[str, Any]:
+        reordered = {}
+        size = len(results['documents'][0])
+        for key, value in results.items():
+            # Only per-candidate lists are reordered, anything else is passed through
+            if isinstance(value, list) and value and isinstance(value[0], list) and len(value[0]) == size:
+                reordered[key] = [[value[0][i] for i in order]]
+            else:
+                reordered[key] = value
+        return reordered
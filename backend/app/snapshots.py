@@ -0,0 +1,194 @@
+"""
+Snapshots of the store's data directory.
+
+A snapshot is a plain copy of everything under CHROMA_PERSIST_DIRECTORY (the Chroma
+SQLite database and vector segment files, the document manifest, the saved BM25 index
+and the query embedding cache), taken while writes are paused so the files agree with
+each other. Restoring copies a snapshot back, so the index opens as it was, with no
+re-ingestion and no embeddings recomputed.
+
+A restore replaces the files the running service has open, so it is only staged here
+and applied the next time the store starts (or offline through the CLI).
+
+Usage (with the backend stopped):
+    python -m app.snapshots list
+    python -m app.snapshots restore 20250101-120000
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from .logger_config import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_INFO = "snapshot.json"
+PENDING_RESTORE = "restore_pending.json"
+CHROMA_DATABASE = "chroma.sqlite3"
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def get_snapshot_directory() -> Path:
+    return Path(os.getenv('CHROMA_SNAPSHOT_DIRECTORY', './snapshots'))
+
+
+def _snapshot_path(name: str, snapshot_dir: Path) -> Path:
+    if not NAME_PATTERN.match(name) or name.startswith('.'):
+        raise ValueError(f"Invalid snapshot name: {name}")
+    return snapshot_dir / name
+
+
+def _copy_data(source: Path, target: Path):
+    """Copy a data directory. The SQLite database goes through the backup API so open connections are safe."""
+    target.mkdir(parents=True, exist_ok=True)
+    for entry in source.iterdir():
+        if entry.name.endswith(('.tmp', '-wal', '-shm', '-journal')) or entry.name == PENDING_RESTORE:
+            continue
+        if entry.name == CHROMA_DATABASE:
+            with sqlite3.connect(str(entry)) as src, sqlite3.connect(str(target / entry.name)) as dst:
+                src.backup(dst)
+        elif entry.is_dir():
+            shutil.copytree(entry, target / entry.name)
+        else:
+            shutil.copy2(entry, target / entry.name)
+
+
+def create_snapshot(store, name: Optional[str] = None, snapshot_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Copy the store's data directory while writes are paused. Queries keep running;
+    ingestion batches wait until the copy is done.
+    """
+    snapshot_dir = snapshot_dir or get_snapshot_directory()
+    name = name or time.strftime("%Y%m%d-%H%M%S")
+    target = _snapshot_path(name, snapshot_dir)
+    if target.exists():
+        raise FileExistsError(f"Snapshot {name} already exists")
+    source = Path(store.persist_directory)
+    if snapshot_dir.resolve().is_relative_to(source.resolve()):
+        raise ValueError("The snapshot directory must not be inside the data directory")
+
+    partial = snapshot_dir / f".{name}.partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    start = time.perf_counter()
+    with store.write_gate.paused():
+        store.save_lexical_index(pause_writes=False)
+        store.query_embedding_cache.save()
+        _copy_data(source, partial)
+        info = {
+            "name": name,
+            "created_at": time.time(),
+            "chunk_count": store.collection.count(),
+            "file_count": len(store.manifest.files()),
+            "embedding_id": store.embedding_id,
+            "chunking": store.get_chunking_config()
+        }
+    with open(partial / SNAPSHOT_INFO, 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2)
+    # Only complete snapshots ever carry their final name
+    os.replace(partial, target)
+    logger.info(f"Created snapshot {name} with {info['chunk_count']} chunks in {time.perf_counter() - start:.2f} seconds")
+    return info
+
+
+def list_snapshots(snapshot_dir: Optional[Path] = None) -> List[Dict[str, Any]]:
+    snapshot_dir = snapshot_dir or get_snapshot_directory()
+    if not snapshot_dir.exists():
+        return []
+    snapshots = []
+    for entry in sorted(snapshot_dir.iterdir()):
+        info_path = entry / SNAPSHOT_INFO
+        # Snapshots still being written are hidden (dot-prefixed) until complete
+        if entry.is_dir() and not entry.name.startswith('.') and info_path.exists():
+            with open(info_path, 'r', encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+    return snapshots
+
+
+def delete_snapshot(name: str, snapshot_dir: Optional[Path] = None) -> bool:
+    target = _snapshot_path(name, snapshot_dir or get_snapshot_directory())
+    if not (target / SNAPSHOT_INFO).exists():
+        return False
+    shutil.rmtree(target)
+    logger.info(f"Deleted snapshot {name}")
+    return True
+
+
+def stage_restore(name: str, data_dir: str, snapshot_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Mark a snapshot to be restored into data_dir the next time the store starts"""
+    snapshot_dir = snapshot_dir or get_snapshot_directory()
+    target = _snapshot_path(name, snapshot_dir)
+    if not (target / SNAPSHOT_INFO).exists():
+        raise FileNotFoundError(f"Unknown snapshot: {name}")
+    Path(data_dir).mkdir(parents=True, exist_ok=True)
+    with open(Path(data_dir) / PENDING_RESTORE, 'w', encoding='utf-8') as f:
+        json.dump({"name": name, "snapshot_dir": str(snapshot_dir.resolve())}, f)
+    logger.info(f"Staged restore of snapshot {name}, it is applied on the next start")
+    with open(target / SNAPSHOT_INFO, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def restore_snapshot(name: str, data_dir: str, snapshot_dir: Optional[Path] = None):
+    """
+    Replace the contents of data_dir with a snapshot. Must not run while a store has the
+    directory open. Interrupted restores are safe to repeat.
+    """
+    source = _snapshot_path(name, snapshot_dir or get_snapshot_directory())
+    if not (source / SNAPSHOT_INFO).exists():
+        raise FileNotFoundError(f"Unknown snapshot: {name}")
+    data_dir = Path(data_dir)
+    start = time.perf_counter()
+    data_dir.mkdir(parents=True, exist_ok=True)
+    # Empty the directory rather than replacing it, it is often a mounted volume
+    for entry in data_dir.iterdir():
+        if entry.name == PENDING_RESTORE:
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry)
+        else:
+            entry.unlink()
+    for entry in source.iterdir():
+        if entry.name == SNAPSHOT_INFO:
+            continue
+        if entry.is_dir():
+            shutil.copytree(entry, data_dir / entry.name)
+        else:
+            shutil.copy2(entry, data_dir / entry.name)
+    logger.info(f"Restored snapshot {name} into {data_dir} in {time.perf_counter() - start:.2f} seconds")
+
+
+def apply_pending_restore(data_dir: str):
+    """Apply a restore staged with `stage_restore`, if any. Called before the store opens its files."""
+    marker = Path(data_dir) / PENDING_RESTORE
+    if not marker.exists():
+        return
+    with open(marker, 'r', encoding='utf-8') as f:
+        pending = json.load(f)
+    restore_snapshot(pending["name"], data_dir, Path(pending["snapshot_dir"]))
+    # Removed last, so a restore interrupted by a crash is retried on the next start
+    marker.unlink()
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=Path(__file__).resolve().parents[2] / '.env')
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List available snapshots")
+    restore_parser = subparsers.add_parser("restore", help="Restore a snapshot into the data directory")
+    restore_parser.add_argument("name")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print(json.dumps(list_snapshots(), indent=2))
+    else:
+        restore_snapshot(args.name, os.getenv('CHROMA_PERSIST_DIRECTORY', './chroma'))
+
+
+if __name__ == "__main__":
+    main()
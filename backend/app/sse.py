@@ -0,0 +1,77 @@
+import asyncio
+import json
+from typing import AsyncGenerator, AsyncIterator
+
+STREAM_FORMATS = ("json", "text")
+_DONE = object()
+
+
+async def coalesce_tokens(tokens: AsyncIterator[str], window_ms: float = 50, max_chars: int = 512) -> AsyncGenerator[str, None]:
+    """
+    Merge a token stream into larger pieces. The first token is passed on immediately so
+    time to first token is unchanged; after that, tokens arriving within `window_ms` of
+    the start of a piece are joined, up to `max_chars`. A window of 0 disables coalescing.
+
+    The source is read by a separate task, so a slow consumer never stalls it and a
+    piece is emitted as soon as its window closes even while no token is arriving.
+    """
+    if window_ms <= 0:
+        async for token in tokens:
+            yield token
+        return
+
+    loop = asyncio.get_running_loop()
+    window = window_ms / 1000.0
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for token in tokens:
+                queue.put_nowait(token)
+            queue.put_nowait(_DONE)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    task = asyncio.create_task(pump())
+    try:
+        item = await queue.get()
+        first = True
+        while item is not _DONE:
+            if isinstance(item, Exception):
+                raise item
+            buffer = [item]
+            size = len(item)
+            item = None
+            if not first:
+                deadline = loop.time() + window
+                while size < max_chars:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        item = None
+                        break
+                    if item is _DONE or isinstance(item, Exception):
+                        break
+                    buffer.append(item)
+                    size += len(item)
+                    item = None
+            first = False
+            yield "".join(buffer)
+            if item is None:
+                item = await queue.get()
+    finally:
+        task.cancel()
+
+
+def format_answer_frame(text: str, stream_format: str = "json") -> str:
+    """
+    One SSE frame carrying answer text. "json" sends `data: {"answer": ...}`; "text" sends
+    the raw text, one `data:` line per line of text, which clients join with newlines.
+    """
+    if stream_format == "text":
+        lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        return "".join(f"data: {line}\n" for line in lines) + "\n"
+    return f"data: {json.dumps({'answer': text})}\n\n"
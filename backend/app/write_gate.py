@@ -0,0 +1,45 @@
+import threading
+from contextlib import contextmanager
+
+
+class WriteGate:
+    """
+    Shared/exclusive lock around store writes. Any number of writers (ingestion batches,
+    deletes) may hold it together; `paused()` waits for them to finish and blocks new
+    ones, so the files on disk can be copied in a consistent state. A pending pause
+    takes precedence over new writers. Not reentrant.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._writers = 0
+        self._paused = False
+        self._pause_waiting = 0
+
+    @contextmanager
+    def writing(self):
+        with self._condition:
+            while self._paused or self._pause_waiting:
+                self._condition.wait()
+            self._writers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writers -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def paused(self):
+        with self._condition:
+            self._pause_waiting += 1
+            while self._paused or self._writers:
+                self._condition.wait()
+            self._pause_waiting -= 1
+            self._paused = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._paused = False
+                self._condition.notify_all()
@@ -1,22 +1,146 @@
-from fastapi import FastAPI, UploadFile, File
+import time
+
+# Taken before any other import so cold-start timings include them
+STARTUP_BEGIN = time.perf_counter()
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse, JSONResponse, FileResponse, Response
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 from app.rag_pipeline import rag_pipeline
-from app.document_store import ChromaDocStore
+from app.ingestion_jobs import IngestionJobManager
+from app.answer_cache import AnswerCache
+from app.ollama_integration import OllamaAPI
+from app.generation_scheduler import GenerationScheduler, QueueFullError
+from app.query_batcher import QueryMicroBatcher
+from app.readiness import Readiness
+from app.sse import coalesce_tokens, format_answer_frame
+from app import metrics
+from app import executors
+from app.executors import run_retrieval, run_ingestion, run_admin
 from typing import List, Dict, Any
+import asyncio
 import json
+import os
+import tempfile
+from contextlib import asynccontextmanager
 import uvicorn
 from app.logger_config import get_logger, log_time
 
 # Initialize logger
 logger = get_logger(__name__)
 
-# Initialize ChromaDB store
-chroma_store = ChromaDocStore()
+# The document store (chromadb, langchain, markitdown, pdfminer and the embedding model)
+# is imported and loaded by a background task after the server starts accepting
+# connections. Until then these stay None and dependent endpoints answer 503.
+chroma_store = None
+job_manager = None
+query_batcher = None
+readiness = Readiness(["index", "embedder"], started_at=STARTUP_BEGIN)
+
+# Semantic cache of answers to near-duplicate questions
+answer_cache = None
+if os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true':
+    answer_cache = AnswerCache(
+        max_entries=int(os.getenv('ANSWER_CACHE_SIZE', 1000)),
+        similarity_threshold=float(os.getenv('ANSWER_CACHE_SIMILARITY', 0.95))
+    )
+
+# Admission control for concurrent LLM generations
+generation_scheduler = GenerationScheduler(
+    max_concurrent=int(os.getenv('GENERATION_MAX_CONCURRENT', 2)),
+    max_queue=int(os.getenv('GENERATION_MAX_QUEUE', 32)),
+    retry_after=int(os.getenv('GENERATION_RETRY_AFTER', 10))
+)
+
+# Tokens are coalesced into SSE frames by time and size window
+SSE_COALESCE_MS = float(os.getenv('SSE_COALESCE_MS', 50))
+SSE_COALESCE_MAX_CHARS = int(os.getenv('SSE_COALESCE_MAX_CHARS', 512))
+
+# Application-lifetime Ollama client with a pooled session
+ollama_api = OllamaAPI()
+
+# Read by /metrics at scrape time, nothing is recorded on the request path
+metrics.register_cache("query_embeddings", lambda: chroma_store.query_embedding_cache if chroma_store is not None else None)
+metrics.register_cache("answers", lambda: answer_cache)
+metrics.register_callback("rag_generation_active", "Generations holding a scheduler slot", "gauge", lambda: [((), generation_scheduler.active)])
+metrics.register_callback("rag_generation_queued", "Generations waiting for a scheduler slot", "gauge", lambda: [((), generation_scheduler.queued)])
+metrics.register_callback("rag_generation_rejected", "Generations rejected because the queue was full", "counter", lambda: [((), generation_scheduler.rejected)])
+metrics.register_callback("rag_ready", "1 once the index and embedding model are loaded", "gauge", lambda: [((), int(readiness.is_ready))])
+
+def create_document_store():
+    # Imported here so the heavy dependencies load off the startup path
+    from app.document_store import ChromaDocStore
+    return ChromaDocStore()
+
+async def load_document_store():
+    """Load the store, warm the embedding model and publish the dependent components"""
+    global chroma_store, job_manager, query_batcher
+    try:
+        store = await run_ingestion(create_document_store)
+        readiness.mark_loaded("index")
+        # The first forward pass is much slower than the rest, take it here instead of in a query
+        await run_retrieval(store.embedding_function, ["warm up"])
+
+        job_manager = IngestionJobManager(store)
+        # Cross-request batching of query embedding and vector search
+        if float(os.getenv('QUERY_BATCH_WINDOW_MS', 5)) > 0:
+            query_batcher = QueryMicroBatcher(
+                store,
+                window_ms=float(os.getenv('QUERY_BATCH_WINDOW_MS', 5)),
+                max_batch_size=int(os.getenv('QUERY_BATCH_MAX_SIZE', 32))
+            )
+        # Publish the store last so nothing sees it before its dependents exist
+        chroma_store = store
+        readiness.mark_loaded("embedder")
+    except Exception as e:
+        logger.error(f"Failed to load document store: {str(e)}", exc_info=True)
+        readiness.mark_failed(str(e))
+
+def get_store():
+    if chroma_store is None:
+        raise HTTPException(status_code=503, detail="Backend is still loading, see /ready", headers={"Retry-After": "5"})
+    return chroma_store
+
+async def get_collection_store(collection: str | None = None):
+    """Store of a named collection (default collection if None), 404 if it does not exist"""
+    store = get_store()
+    if not collection:
+        return store
+    try:
+        # Loading a collection for the first time reads its lexical index, keep it off the loop
+        return await run_retrieval(store.get_collection, collection)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {collection}")
+
+def get_job_manager():
+    get_store()
+    return job_manager
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ollama_api.start()
+    # Load the store and the LLM in the background so startup is not blocked by them
+    background_tasks = [asyncio.create_task(load_document_store())]
+    if os.getenv('OLLAMA_WARM_UP', 'true').lower() == 'true':
+        background_tasks.append(asyncio.create_task(ollama_api.warm_up(os.getenv('OLLAMA_MODEL'))))
+    readiness.mark("accepting_connections")
+    logger.info(f"Accepting connections {readiness.timings['accepting_connections']:.2f} seconds after start")
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await ollama_api.close()
+    executors.shutdown()
+    if chroma_store is not None:
+        from app import pdf_extraction
+        pdf_extraction.shutdown_pool()
+        chroma_store.query_embedding_cache.save()
+        # Lets the next start load the lexical index instead of rebuilding it
+        await asyncio.to_thread(chroma_store.save_lexical_index)
 
 # Initialize FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -32,32 +156,101 @@ class QueryRequest(BaseModel):
     messages: List[Dict[str, str]] = []  # Chat history
     previous_chunks: List[str] = []  # Optional: Previous relevant chunks
     model: str | None = None  # Optional: Model name
+    collections: List[str] = []  # Optional: Collections to search, default collection if empty
+    stream_format: str = Field("json", pattern="^(json|text)$")  # Answer frames as JSON or raw text lines
+
+def not_ready_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"status": "error", "message": "Backend is still loading, please retry later", "retry_after": 5},
+        headers={"Retry-After": "5"}
+    )
+
+def busy_response(retry_after: int) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"status": "error", "message": "Too many queued questions, please retry later", "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)}
+    )
 
 @app.post("/query")
 @log_time(logger)
-async def query_service(request: QueryRequest):
+async def query_service(request: QueryRequest, http_request: Request):
     """
-    Streaming endpoint with proper async handling
+    Streaming endpoint with proper async handling.
+
+    Generations go through the scheduler: while waiting for a slot the stream sends
+    `event: queue` frames with the current position, and a full queue is rejected
+    with 429 and a Retry-After hint. Once a slot is granted an `event: start` frame
+    reports how long the request waited for it. A completed answer is followed by an
+    `event: stats` frame with retrieval time, chunk counts and the generation's token counts.
+
+    Answer tokens are coalesced into frames (SSE_COALESCE_MS / SSE_COALESCE_MAX_CHARS).
+    With `stream_format="text"` a frame carries the raw text as `data:` lines instead of JSON.
     """
     logger.info(f"Received query request with question: {request.question}")
+    client_id = http_request.headers.get("X-Client-Id") or (http_request.client.host if http_request.client else "unknown")
+
+    if chroma_store is None:
+        metrics.QUERIES.labels("not_ready").inc()
+        return not_ready_response()
+    if generation_scheduler.is_full:
+        metrics.QUERIES.labels("rejected").inc()
+        return busy_response(generation_scheduler.reject())
+    try:
+        # Several collections are searched in parallel and their top-k merged
+        store = await run_retrieval(chroma_store.search_view, request.collections)
+    except KeyError as e:
+        metrics.QUERIES.labels("unknown_collection").inc()
+        return JSONResponse(status_code=404, content={"status": "error", "message": f"Unknown collection: {e.args[0]}"})
 
     async def generate():
+        ticket = None
+        stats = {}
+        outcome = "cancelled"
+        metrics.STREAMS_IN_FLIGHT.inc()
         try:
-            # Start streaming immediately
-            async for chunk in rag_pipeline(
-                chroma_store, 
+            # The slot is taken inside the generator so it is always released in `finally`
+            try:
+                ticket = generation_scheduler.acquire(client_id)
+            except QueueFullError as e:
+                outcome = "rejected"
+                error_msg = json.dumps({"error": str(e), "retry_after": e.retry_after})
+                yield f"event: error\ndata: {error_msg}\n\n"
+                return
+
+            async for position in generation_scheduler.wait(ticket):
+                yield f"event: queue\ndata: {json.dumps({'position': position})}\n\n"
+            yield f"event: start\ndata: {json.dumps({'queue_seconds': round(ticket.wait_seconds, 3)})}\n\n"
+
+            tokens = rag_pipeline(
+                store,
                 request.question,
                 request.messages,
-                model=request.model
-            ):
+                previous_chunks=request.previous_chunks,
+                model=request.model,
+                answer_cache=answer_cache,
+                ollama_api=ollama_api,
+                query_batcher=query_batcher,
+                stats=stats
+            )
+            # The first token goes out immediately, later ones are merged into fewer, larger frames
+            async for chunk in coalesce_tokens(tokens, SSE_COALESCE_MS, SSE_COALESCE_MAX_CHARS):
                 if chunk:
-                    message = json.dumps({"answer": chunk})
-                    yield f"data: {message}\n\n"
+                    yield format_answer_frame(chunk, request.stream_format)
+            yield f"event: stats\ndata: {json.dumps(stats)}\n\n"
+            outcome = "ok"
 
         except Exception as e:
+            outcome = "error"
             logger.error(f"Error in query streaming: {str(e)}", exc_info=True)
             error_msg = json.dumps({"error": str(e)})
             yield f"event: error\ndata: {error_msg}\n\n"
+        finally:
+            metrics.STREAMS_IN_FLIGHT.dec()
+            metrics.QUERIES.labels(outcome).inc()
+            if ticket is not None:
+                generation_scheduler.release(ticket)
 
     return StreamingResponse(
         generate(),
@@ -69,26 +262,140 @@ async def query_service(request: QueryRequest):
         }
     )
 
+@app.get("/health")
+async def health():
+    """Liveness only: the process is up and serving requests, models may still be loading"""
+    return {"status": "ok"}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Stage latencies, token rates, ingestion throughput and cache hit rates in the Prometheus text format"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once the index and the embedding model are loaded, 503 until then"""
+    return JSONResponse(status_code=200 if readiness.is_ready else 503, content=readiness.to_dict())
+
 @app.get("/config")
 @log_time(logger)
 async def get_config():
     logger.info("Fetching chunking configuration")
-    return chroma_store.get_chunking_config()
+    return get_store().get_chunking_config()
+
+class CollectionRequest(BaseModel):
+    name: str
+
+@app.get("/collections")
+async def list_collections():
+    return await run_retrieval(get_store().list_collections)
+
+@app.post("/collections")
+@log_time(logger)
+async def create_collection(request: CollectionRequest):
+    try:
+        await run_admin(get_store().create_collection, request.name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "message": f"Created collection {request.name}"}
+
+@app.delete("/collections/{name}")
+@log_time(logger)
+async def drop_collection(name: str):
+    """Drop a named collection with its chunks, manifest and lexical index. Other collections are untouched."""
+    try:
+        dropped = await run_admin(get_store().drop_collection, name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not dropped:
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {name}")
+    return {"status": "success", "message": f"Dropped collection {name}"}
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    stats = {}
+    if chroma_store is not None:
+        stats["query_embeddings"] = chroma_store.query_embedding_cache.stats()
+    if answer_cache is not None:
+        stats["answers"] = answer_cache.stats()
+    return stats
+
+@app.get("/generation/stats")
+async def get_generation_stats():
+    stats = {"scheduler": generation_scheduler.stats()}
+    if query_batcher is not None:
+        stats["query_batcher"] = query_batcher.stats()
+    return stats
+
+DOCUMENT_FIELDS = ("documents", "metadatas")
+
+def parse_fields(fields: str) -> tuple:
+    requested = tuple(field.strip() for field in fields.split(",") if field.strip())
+    unknown = [field for field in requested if field not in DOCUMENT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}, expected a subset of {list(DOCUMENT_FIELDS)}")
+    return requested
+
+async def stream_documents(store, fields: tuple, file_name: str | None, batch_size: int):
+    """NDJSON, one chunk per line, fetched page by page so memory stays flat"""
+    offset = 0
+    while True:
+        page = await run_admin(store.get_documents, batch_size, offset, fields, file_name)
+        lines = []
+        for i, chunk_id in enumerate(page['ids']):
+            record = {"id": chunk_id}
+            if "documents" in fields:
+                record["document"] = page['documents'][i]
+            if "metadatas" in fields:
+                record["metadata"] = page['metadatas'][i]
+            lines.append(json.dumps(record) + "\n")
+        if lines:
+            yield "".join(lines)
+        if page['next_offset'] is None:
+            return
+        offset = page['next_offset']
 
 @app.get("/documents")
 @log_time(logger)
-async def get_documents():
-    logger.info("Fetching all documents")
-    results = chroma_store.get_all_documents()
-    logger.info(f"Retrieved {len(results)} documents")
+async def get_documents(
+        limit: int = Query(100, ge=1, le=1000),
+        offset: int = Query(0, ge=0),
+        fields: str = "documents,metadatas",
+        file_name: str | None = None,
+        format: str = Query("json", pattern="^(json|ndjson)$"),
+        collection: str | None = None):
+    """
+    Page through stored chunks. `fields` is a comma separated subset of documents and
+    metadatas (ids are always returned), e.g. `fields=metadatas` lists chunks without
+    their text. With `format=ndjson` every matching chunk is streamed, one per line,
+    in pages of `limit`.
+    """
+    store = await get_collection_store(collection)
+    requested = parse_fields(fields)
+    if format == "ndjson":
+        return StreamingResponse(stream_documents(store, requested, file_name, limit), media_type="application/x-ndjson")
+
+    results = await run_admin(store.get_documents, limit, offset, requested, file_name)
+    logger.info(f"Retrieved {len(results['ids'])} of {results['total']} documents from offset {offset}")
     return results
 
+@app.get("/documents/summary")
+@log_time(logger)
+async def get_documents_summary(collection: str | None = None, full_scan: bool = False):
+    """
+    Chunk and page counts per file from the manifest. `full_scan=true` recounts them from
+    the metadata of every stored chunk instead, which reads the whole collection.
+    """
+    store = await get_collection_store(collection)
+    return await run_admin(store.summarize_files, full_scan)
+
 @app.post("/documents/clear")
 @log_time(logger)
-async def clear_documents():
+async def clear_documents(collection: str | None = None):
+    store = await get_collection_store(collection)
     try:
         logger.info("Attempting to clear all documents")
-        success = chroma_store.clear_documents()
+        success = await run_admin(store.clear_documents)
         if success:
             logger.info("Successfully cleared all documents")
             return {"status": "success", "message": "Documents cleared successfully"}
@@ -98,68 +405,169 @@ async def clear_documents():
     logger.error("Failed to clear documents: Unknown error")
     return {"status": "error", "message": "Failed to clear documents"}
 
+@app.get("/documents/files")
+@log_time(logger)
+async def list_document_files(collection: str | None = None):
+    return (await get_collection_store(collection)).list_files()
+
+@app.delete("/documents/{file_name:path}")
+@log_time(logger)
+async def delete_document(file_name: str, collection: str | None = None):
+    """
+    Remove all chunks of a single file, leaving the rest of the corpus untouched.
+    """
+    store = await get_collection_store(collection)
+    try:
+        removed = await run_admin(store.delete_file, file_name)
+    except Exception as e:
+        logger.error(f"Failed to delete {file_name}: {str(e)}", exc_info=True)
+        return {"status": "error", "message": f"Failed to delete {file_name}: {str(e)}"}
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"Unknown document: {file_name}")
+    return {"status": "success", "message": f"Deleted {removed} chunks of {file_name}"}
+
+@app.put("/documents/{file_name:path}")
+@log_time(logger)
+async def replace_document(file_name: str, file: UploadFile = File(...), collection: str | None = None):
+    """
+    Replace the chunks of a single file with the uploaded content. New chunks are written
+    before stale ones are deleted, so the document never disappears from query results,
+    and chunks whose content did not change are not re-embedded.
+    """
+    manager = get_job_manager()
+    store = await get_collection_store(collection)
+    try:
+        content = await file.read()
+    finally:
+        await file.close()
+
+    job = manager.submit([(file_name, content)], document_store=store)
+    return {
+        "status": "success",
+        "job_id": job.id,
+        "message": f"Queued replacement of {file_name}"
+    }
+
 @app.post("/documents/upload")
 @log_time(logger)
-async def upload_documents(files: List[UploadFile] = File(...)):
+async def upload_documents(files: List[UploadFile] = File(...), collection: str | None = None):
+    """
+    Enqueue the uploaded files for background ingestion and return the job id immediately.
+    Progress can be followed through /jobs/{job_id}.
+    """
+    manager = get_job_manager()
+    store = await get_collection_store(collection)
     logger.info(f"Received {len(files)} files for upload")
+    uploads = []
     for file in files:
         logger.debug(f"File details - name: {file.filename}, content_type: {file.content_type}, size: {file.size if hasattr(file, 'size') else 'unknown'}")
-    
-    all_documents = []
-    errors = []
-    
-    for file in files:
         try:
-            # Process the file content
-            documents = await chroma_store.extract_text_from_document(file)
-            if documents:
-                all_documents.extend(documents)
-                logger.info(f"Successfully processed {file.filename}")
-            else:
-                errors.append(f"No documents extracted from {file.filename}")
-        except Exception as e:
-            error_msg = f"Error processing {file.filename}: {str(e)}"
-            logger.error(error_msg)
-            errors.append(error_msg)
+            # Read the content now, the upload is closed once the request ends
+            content = await file.read()
+            uploads.append((file.filename, content))
         finally:
             # Ensure we close the file
             await file.close()
-    
-    if not all_documents:
-        error_summary = "\n".join(errors)
-        return {
-            "status": "error", 
-            "message": f"No documents were successfully processed. Errors:\n{error_summary}"
-        }
-    
-    # Process the successful documents
-    processed_docs = []
-    processed_metas = []
-    
-    for doc in all_documents:
-        chunks = chroma_store.text_splitter.split_text(doc['text'])
-        # Calculate page range for each chunk
-        for j, chunk in enumerate(chunks):
-            processed_docs.append(chunk)
-            # Ensure all metadata fields have valid values
-            metadata = {
-                'source': str(doc.get('file_name', 'unknown')),
-                'type': doc.get('file_type', 'unknown'),  # Use file_type from document
-                'file_name': str(doc.get('file_name', 'unknown')),
-                'page_number': str(doc.get('page_number', 'unknown')),
-                'page_range': f"{doc.get('page_number', 'unknown')}",
-                'chunk_num': str(j + 1),
-                'total_chunks': str(len(chunks))
-            }
-            processed_metas.append(metadata)
-    
-    success = chroma_store.add_documents(processed_docs, processed_metas)
-    if success:
-        logger.info(f"Successfully added {len(processed_docs)} chunks to the database")
-        return {"status": "success", "message": f"Successfully processed {len(files)} files"}
-    else:
-        logger.error("Failed to add documents to database")
-        return {"status": "error", "message": "Failed to add documents to database"}
+
+    job = manager.submit(uploads, document_store=store)
+    return {
+        "status": "success",
+        "job_id": job.id,
+        "message": f"Queued {len(uploads)} files for ingestion"
+    }
+
+@app.get("/index/export")
+@log_time(logger)
+async def export_index(dtype: str = Query("float16", pattern="^(float16|float32)$"), collection: str | None = None):
+    """
+    Download the whole collection with its embeddings as a portable bundle that another
+    node can import without re-embedding. Writes wait while the chunks are read out.
+    """
+    from app import index_bundle
+    store = await get_collection_store(collection)
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    try:
+        await run_admin(index_bundle.export_index, store, path, dtype=dtype)
+    except Exception:
+        os.remove(path)
+        raise
+    return FileResponse(path, media_type="application/zip", filename="index_bundle.zip", background=BackgroundTask(os.remove, path))
+
+@app.post("/index/import")
+@log_time(logger)
+async def import_index(file: UploadFile = File(...), replace: bool = False, collection: str | None = None):
+    """
+    Load an exported bundle straight into the store, writing its stored vectors without
+    any embedding calls. The bundle must come from the same embedding model.
+    """
+    from app import index_bundle
+    store = await get_collection_store(collection)
+    try:
+        summary = await run_ingestion(index_bundle.import_index, store, file.file, replace)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await file.close()
+    return {"status": "success", "summary": summary, "message": f"Imported {summary['chunks']} chunks"}
+
+class SnapshotRequest(BaseModel):
+    name: str | None = None
+
+@app.post("/snapshots")
+@log_time(logger)
+async def create_snapshot(request: SnapshotRequest = SnapshotRequest()):
+    """
+    Copy the data directory consistently while the service stays up. Queries keep being
+    answered; ingestion writes wait until the copy is done.
+    """
+    from app import snapshots
+    store = get_store()
+    try:
+        info = await run_admin(snapshots.create_snapshot, store, request.name)
+    except (ValueError, FileExistsError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "snapshot": info, "message": f"Created snapshot {info['name']}"}
+
+@app.get("/snapshots")
+async def list_snapshots():
+    from app import snapshots
+    return await run_admin(snapshots.list_snapshots)
+
+@app.post("/snapshots/{name}/restore")
+@log_time(logger)
+async def restore_snapshot(name: str):
+    """Stage a snapshot to replace the data directory. It is applied on the next restart."""
+    from app import snapshots
+    try:
+        info = snapshots.stage_restore(name, get_store().persist_directory)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Unknown snapshot: {name}")
+    return {"status": "success", "snapshot": info, "message": f"Snapshot {name} will be restored when the backend restarts"}
+
+@app.delete("/snapshots/{name}")
+async def delete_snapshot(name: str):
+    from app import snapshots
+    try:
+        deleted = await run_admin(snapshots.delete_snapshot, name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Unknown snapshot: {name}")
+    return {"status": "success", "message": f"Deleted snapshot {name}"}
+
+@app.get("/jobs")
+async def list_jobs():
+    return [job.to_dict() for job in get_job_manager().list_jobs()]
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = get_job_manager().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,85 @@
+import contextlib
+import numpy as np
+from app import index_bundle
+from app.manifest import DocumentManifest
+
+
+class FakeGate:
+    @contextlib.contextmanager
+    def paused(self):
+        yield
+
+    @contextlib.contextmanager
+    def writing(self):
+        yield
+
+
+class FakeCollection:
+    def __init__(self):
+        self.chunks = {}
+
+    def get(self, include, limit, offset):
+        ids = sorted(self.chunks)[offset:offset + limit]
+        return {
+            'ids': ids,
+            'documents': [self.chunks[i][0] for i in ids],
+            'metadatas': [self.chunks[i][1] for i in ids],
+            'embeddings': [self.chunks[i][2] for i in ids]
+        }
+
+
+class FakeStore:
+    """Just enough of ChromaDocStore for exporting and importing bundles"""
+    embedding_id = "test-model"
+
+    def __init__(self, manifest_path):
+        self.write_gate = FakeGate()
+        self.collection = FakeCollection()
+        self.manifest = DocumentManifest(manifest_path)
+
+    def get_chunking_config(self):
+        return {"chunk_size": 1000, "chunk_overlap": 200}
+
+    def write_embedded(self, ids, documents, metadatas, embeddings):
+        for chunk_id, document, metadata, embedding in zip(ids, documents, metadatas, embeddings):
+            self.collection.chunks[chunk_id] = (document, metadata, list(embedding))
+
+    def add_file(self, file_name, texts):
+        ids = [f"{file_name}-{text}" for text in texts]
+        self.write_embedded(ids, texts, [{'file_name': file_name}] * len(ids), np.ones((len(ids), 4)).tolist())
+        self.manifest.set(file_name, {'file_hash': text_hash(texts), 'chunk_ids': ids, 'chunk_count': len(ids)})
+
+    def delete_file(self, file_name):
+        ids = [i for i, (_, metadata, _) in self.collection.chunks.items() if metadata['file_name'] == file_name]
+        for chunk_id in ids:
+            del self.collection.chunks[chunk_id]
+        self.manifest.remove(file_name)
+        return len(ids)
+
+    def clear_documents(self):
+        self.collection.chunks.clear()
+        self.manifest.clear()
+        return True
+
+
+def text_hash(texts):
+    return "|".join(texts)
+
+
+def test_import_replaces_files_already_in_the_store(tmp_path):
+    source = FakeStore(tmp_path / "source.json")
+    source.add_file("shared.pdf", ["new a", "new b"])
+    source.add_file("other.pdf", ["other"])
+    bundle_path = tmp_path / "bundle.zip"
+    index_bundle.export_index(source, bundle_path, batch_size=2)
+
+    target = FakeStore(tmp_path / "target.json")
+    target.add_file("shared.pdf", ["old a", "old b", "old c"])
+    target.add_file("local.pdf", ["local"])
+    summary = index_bundle.import_index(target, bundle_path)
+
+    assert summary["chunks"] == 3
+    # The old chunks of the overlapping file are gone, the store's other files are kept
+    assert sorted(target.collection.chunks) == ["local.pdf-local", "other.pdf-other", "shared.pdf-new a", "shared.pdf-new b"]
+    assert target.manifest.get("shared.pdf")["chunk_ids"] == ["shared.pdf-new a", "shared.pdf-new b"]
+    assert target.manifest.get("local.pdf")["chunk_ids"] == ["local.pdf-local"]
@@ -0,0 +1,81 @@
+"""
+Measures backend cold-start time.
+
+Starts uvicorn in a fresh process and polls /health and /ready, reporting the time until
+the first accepted connection and until the index and embedding model are loaded,
+alongside the per-component timings the backend reports on /ready.
+Run several times to separate first-run costs (model download) from warm-disk restarts.
+
+Usage:
+    python benchmarks/cold_start.py --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+
+def wait_for(url, deadline, poll_interval, expect_ok=True):
+    while time.perf_counter() < deadline:
+        try:
+            response = requests.get(url, timeout=1)
+            if not expect_ok or response.status_code == 200:
+                return response
+        except requests.RequestException:
+            pass
+        time.sleep(poll_interval)
+    return None
+
+
+def measure(port, timeout, poll_interval):
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + timeout
+        base_url = f"http://127.0.0.1:{port}"
+        if wait_for(f"{base_url}/health", deadline, poll_interval) is None:
+            raise SystemExit("Backend did not accept connections in time")
+        accepting = time.perf_counter() - start
+        response = wait_for(f"{base_url}/ready", deadline, poll_interval)
+        if response is None:
+            raise SystemExit("Backend did not become ready in time")
+        return {
+            "accepting_connections_seconds": round(accepting, 3),
+            "ready_seconds": round(time.perf_counter() - start, 3),
+            "reported": response.json()["startup_seconds"]
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    runs = [measure(args.port, args.timeout, args.poll_interval) for _ in range(args.runs)]
+    report = {
+        "runs": runs,
+        "median_accepting_connections_seconds": statistics.median(r["accepting_connections_seconds"] for r in runs),
+        "median_ready_seconds": statistics.median(r["ready_seconds"] for r in runs)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
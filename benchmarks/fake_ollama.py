@@ -0,0 +1,185 @@
+"""
+Stand-in Ollama server for load tests, runs offline with no model.
+
+Speaks the parts of the Ollama API the project uses: streaming and non-streaming
+/api/chat (NDJSON, final frame with prompt_eval_count/eval_count and durations),
+/api/generate, /api/tags and /api/version. Generation is simulated with a configurable
+time to first token, token rate and jitter, and `--parallel` limits how many requests
+generate at once (like OLLAMA_NUM_PARALLEL), the rest wait. Failures can be injected as
+HTTP 500s before streaming or as connections dropped mid-stream.
+
+Judge prompts from eval/evaluate_responses.py get a well-formed CATEGORY|score|justification
+answer, so the evaluation pipeline can be exercised end to end too.
+
+GET /fake/stats reports requests served, active, waiting and failures injected.
+
+Usage:
+    python benchmarks/fake_ollama.py --port 11435 --tokens-per-second 40 --parallel 2
+    # then start the backend against it
+    OLLAMA_BASE_URL=http://localhost:11435 OLLAMA_MODEL=fake uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from aiohttp import web
+
+WORDS = (
+    "the provider shall ensure that high-risk AI systems are designed and developed in such a way "
+    "that they achieve an appropriate level of accuracy robustness and cybersecurity and perform "
+    "consistently in those respects throughout their lifecycle according to Article 15"
+).split()
+JUDGE_MARKER = "CATEGORY|score|justification"
+JUDGE_CATEGORIES = ("RELEVANCE", "ACCURACY", "COMPLETENESS", "COHERENCE", "CONCISENESS", "CITATION")
+
+
+class FakeOllama:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.slots = asyncio.Semaphore(args.parallel)
+        self.stats = {"requests": 0, "active": 0, "waiting": 0, "completed": 0, "failed_http": 0, "failed_disconnect": 0}
+
+    def _delay(self, seconds):
+        jitter = self.args.jitter
+        return max(0.0, seconds * self.rng.uniform(1 - jitter, 1 + jitter))
+
+    def _tokens(self, prompt):
+        if JUDGE_MARKER in prompt:
+            lines = [f"{category}|{self.rng.randint(60, 95)}|Simulated judgement." for category in JUDGE_CATEGORIES]
+            return [line + "\n" for line in lines]
+        count = max(1, int(self._delay(self.args.response_tokens)))
+        return [(" " if i else "") + self.rng.choice(WORDS) for i in range(count)]
+
+    def _base(self, model):
+        return {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+
+    def _final(self, model, prompt, tokens, started, first_token_at):
+        now = time.perf_counter()
+        return {
+            **self._base(model),
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((now - started) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": max(1, len(prompt) // 4),
+            "prompt_eval_duration": int((first_token_at - started) * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((now - first_token_at) * 1e9)
+        }
+
+    async def _generate(self, request, model, prompt, frame, stream):
+        """Run one simulated generation; `frame(text)` builds the per-token payload"""
+        self.stats["requests"] += 1
+        self.stats["waiting"] += 1
+        started = time.perf_counter()
+        async with self.slots:
+            self.stats["waiting"] -= 1
+            self.stats["active"] += 1
+            try:
+                failure = self.rng.random() < self.args.failure_rate
+                if failure and self.args.failure_mode == "error":
+                    self.stats["failed_http"] += 1
+                    return web.json_response({"error": "injected failure"}, status=500)
+
+                tokens = self._tokens(prompt)
+                await asyncio.sleep(self._delay(self.args.first_token_ms / 1000))
+                first_token_at = time.perf_counter()
+                interval = 1.0 / self.args.tokens_per_second
+
+                if not stream:
+                    await asyncio.sleep(self._delay(interval * len(tokens)))
+                    self.stats["completed"] += 1
+                    return web.json_response({**frame("".join(tokens)), **self._final(model, prompt, tokens, started, first_token_at)})
+
+                response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+                await response.prepare(request)
+                for i, token in enumerate(tokens):
+                    if failure and i == len(tokens) // 2:
+                        self.stats["failed_disconnect"] += 1
+                        request.transport.close()
+                        return response
+                    await response.write((json.dumps({**self._base(model), **frame(token), "done": False}) + "\n").encode())
+                    await asyncio.sleep(self._delay(interval))
+                final = {**frame(""), **self._final(model, prompt, tokens, started, first_token_at)}
+                await response.write((json.dumps(final) + "\n").encode())
+                await response.write_eof()
+                self.stats["completed"] += 1
+                return response
+            finally:
+                self.stats["active"] -= 1
+
+    async def chat(self, request):
+        body = await request.json()
+        model = body.get("model") or self.args.model
+        messages = body.get("messages") or []
+        if not messages:
+            # An empty chat only loads the model, as used for warm-up
+            return web.json_response({
+                **self._base(model),
+                "message": {"role": "assistant", "content": ""},
+                "done_reason": "load",
+                "done": True
+            })
+        prompt = "\n".join(message.get("content", "") for message in messages)
+        return await self._generate(
+            request, model, prompt,
+            lambda text: {"message": {"role": "assistant", "content": text}},
+            body.get("stream", True)
+        )
+
+    async def generate(self, request):
+        body = await request.json()
+        model = body.get("model") or self.args.model
+        return await self._generate(
+            request, model, body.get("prompt", ""),
+            lambda text: {"response": text},
+            body.get("stream", True)
+        )
+
+    async def tags(self, request):
+        return web.json_response({"models": [{
+            "name": self.args.model,
+            "model": self.args.model,
+            "modified_at": "2025-01-01T00:00:00Z",
+            "size": 0,
+            "digest": "fake",
+            "details": {"family": "fake", "parameter_size": "0B", "quantization_level": "none"}
+        }]})
+
+    async def version(self, request):
+        return web.json_response({"version": "0.0.0-fake"})
+
+    async def fake_stats(self, request):
+        return web.json_response(self.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--model", default="fake", help="Model name reported by /api/tags")
+    parser.add_argument("--tokens-per-second", type=float, default=30.0, help="Generation speed per request")
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="Prompt processing time before the first token")
+    parser.add_argument("--response-tokens", type=int, default=200, help="Tokens per answer")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Relative random variation of delays and answer length")
+    parser.add_argument("--parallel", type=int, default=1, help="Requests generating at once, the rest wait")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--failure-mode", choices=["error", "disconnect"], default="error",
+                        help="HTTP 500 before streaming, or a connection dropped halfway through the answer")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeOllama(args)
+    app = web.Application()
+    app.router.add_post("/api/chat", fake.chat)
+    app.router.add_post("/api/generate", fake.generate)
+    app.router.add_get("/api/tags", fake.tags)
+    app.router.add_get("/api/version", fake.version)
+    app.router.add_get("/fake/stats", fake.fake_stats)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Load test for /query with many concurrent streaming clients.
+
+Each client thread sends questions back to back over SSE until the request budget or the
+duration is used up, and records per request:
+  - time to first token: request sent until the first answer frame
+  - queueing delay: the wait for a generation slot, from the `event: start` frame
+  - tokens per second: answer tokens after the first one over the streaming time
+    (tokens are counted as whitespace-separated words, which is exact against
+    benchmarks/fake_ollama.py since it emits one word per token)
+  - outcome: ok, rejected (429), not ready (503), http error, error event or exception
+
+Questions get a unique suffix so the answer cache does not serve them (--allow-cache
+turns that off). Every client uses its own X-Client-Id so the scheduler's per-client
+round robin behaves as with real users.
+
+To run on a laptop with no network, start the stand-in Ollama and point the backend at it:
+    python benchmarks/fake_ollama.py --port 11435 --tokens-per-second 40 --parallel 2
+    cd backend && OLLAMA_BASE_URL=http://localhost:11435 OLLAMA_MODEL=fake uvicorn main:app
+
+Usage:
+    python benchmarks/load_test.py --clients 16 --requests 200
+    python benchmarks/load_test.py --clients 64 --duration 120 --output load_test.json
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import statistics
+import threading
+import time
+import requests
+from stats import percentile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def summarize(values, scale=1.0, unit="ms"):
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        f"mean_{unit}": round(statistics.mean(values) * scale, 2),
+        f"p50_{unit}": round(percentile(values, 50) * scale, 2),
+        f"p95_{unit}": round(percentile(values, 95) * scale, 2),
+        f"p99_{unit}": round(percentile(values, 99) * scale, 2),
+        f"max_{unit}": round(max(values) * scale, 2)
+    }
+
+
+def read_questions(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["question"] for row in csv.DictReader(f)]
+
+
+def run_request(session, backend_url, question, client_id, timeout):
+    """Send one question and time its stream"""
+    result = {"outcome": "ok", "ttft": None, "queue_seconds": None, "tokens": 0, "stream_seconds": None}
+    start = time.perf_counter()
+    try:
+        with session.post(
+                f"{backend_url}/query",
+                json={"question": question, "messages": [], "stream_format": "text"},
+                headers={"Accept": "text/event-stream", "X-Client-Id": client_id},
+                stream=True,
+                timeout=timeout
+        ) as response:
+            if response.status_code == 429:
+                result["outcome"] = "rejected"
+                return result
+            if response.status_code == 503:
+                result["outcome"] = "not_ready"
+                return result
+            if response.status_code != 200:
+                result["outcome"] = f"http_{response.status_code}"
+                return result
+
+            event, data_lines, answer = "message", [], []
+            for line in response.iter_lines(decode_unicode=True):
+                if line is None:
+                    continue
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data:"):
+                    data_lines.append(line[6:] if line.startswith("data: ") else line[5:])
+                elif not line and data_lines:
+                    data = "\n".join(data_lines)
+                    if event == "message":
+                        if result["ttft"] is None:
+                            result["ttft"] = time.perf_counter() - start
+                        answer.append(data)
+                    elif event == "start":
+                        result["queue_seconds"] = json.loads(data)["queue_seconds"]
+                    elif event == "error":
+                        result["outcome"] = "error_event"
+                    event, data_lines = "message", []
+    except requests.RequestException as e:
+        result["outcome"] = f"exception_{type(e).__name__}"
+        return result
+
+    end = time.perf_counter()
+    result["tokens"] = len("".join(answer).split())
+    if result["ttft"] is not None:
+        result["stream_seconds"] = end - start - result["ttft"]
+    elif result["outcome"] == "ok":
+        result["outcome"] = "empty"
+    return result
+
+
+def client_loop(args, client_index, questions, counter, deadline, results, lock):
+    session = requests.Session()
+    client_id = f"load-test-{client_index}"
+    # Spread the clients' first requests over the ramp-up period
+    time.sleep(args.ramp_up * client_index / max(1, args.clients))
+    while time.perf_counter() < deadline:
+        n = next(counter)
+        if args.requests and n >= args.requests:
+            return
+        question = questions[n % len(questions)]
+        if not args.allow_cache:
+            question = f"{question} (load test request {n})"
+        result = run_request(session, args.backend_url, question, client_id, args.timeout)
+        with lock:
+            results.append(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent streaming clients")
+    parser.add_argument("--requests", type=int, default=100, help="Total requests, 0 for no limit (use --duration)")
+    parser.add_argument("--duration", type=float, default=600, help="Stop sending new requests after this many seconds")
+    parser.add_argument("--ramp-up", type=float, default=0, help="Seconds over which the clients start")
+    parser.add_argument("--questions", default=os.path.join(ROOT_DIR, "eval", "questions.csv"))
+    parser.add_argument("--allow-cache", action="store_true", help="Send questions unchanged, so repeats may hit the answer cache")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    questions = read_questions(args.questions)
+    counter = itertools.count()
+    results, lock = [], threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=client_loop, args=(args, i, questions, counter, deadline, results, lock), daemon=True)
+        for i in range(args.clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ok = [r for r in results if r["outcome"] == "ok"]
+    outcomes = {}
+    for r in results:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+    rates = [(r["tokens"] - 1) / r["stream_seconds"] for r in ok if r["tokens"] > 1 and r["stream_seconds"]]
+    queue_delays = [r["queue_seconds"] for r in ok if r["queue_seconds"] is not None]
+
+    report = {
+        "clients": args.clients,
+        "requests": len(results),
+        "elapsed_seconds": round(elapsed, 2),
+        "requests_per_second": round(len(results) / elapsed, 3),
+        "error_rate": round(1 - len(ok) / len(results), 4) if results else None,
+        "outcomes": outcomes,
+        "time_to_first_token": summarize([r["ttft"] for r in ok], 1000),
+        "queue_delay": summarize(queue_delays, 1000),
+        "queued_fraction": round(sum(1 for d in queue_delays if d > 0) / len(queue_delays), 4) if queue_delays else None,
+        "tokens_per_second_per_stream": summarize(rates, unit="tps"),
+        "aggregate_tokens_per_second": round(sum(r["tokens"] for r in ok) / elapsed, 1),
+        "scheduler": requests.get(f"{args.backend_url}/generation/stats", timeout=10).json()
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
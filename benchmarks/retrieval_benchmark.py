@@ -0,0 +1,395 @@
+"""
+Offline retrieval benchmark for ChromaDocStore.
+
+Builds a corpus of a given number of chunks in a throwaway data directory, ingests it
+through `ChromaDocStore.add_documents` and measures, for every corpus size, chunk size
+and retrieval setting:
+  - ingestion throughput (chunks per second, embedding included)
+  - `query_documents` latency p50/p95/p99, with the query embedding cache cleared
+  - memory: process RSS before and after ingestion, and its peak. Every corpus size and
+    chunk size runs in a fresh process, so these cover that run alone
+  - recall@k against labelled targets
+
+Corpora:
+  synthetic  generated text; every query is built from the rare terms of one chunk, so
+             the expected chunk is known by construction
+  real       chunks of the given documents (--documents), padded with synthetic
+             distractor chunks up to the corpus size; queries come from eval/questions.csv
+             and are scored against --labels, a CSV with columns
+             id,file_name,pages (pages separated by ";"). Questions without a label only
+             count towards latency.
+
+Embedding every chunk of a 1M corpus with the configured model takes hours on CPU;
+--embedder hashing swaps in a fast deterministic bag-of-words embedding so the index
+and search side can be measured at that scale. Results of the two are not comparable.
+
+--bm25-only skips Chroma and embeddings altogether: the synthetic corpus is indexed in a
+bare BM25Index and `search` is timed after one warm-up pass over the queries (the first
+search of a term orders its postings by impact). Each run reports whether its p95 stays
+within --bm25-target-ms (sub-millisecond by default), and the script exits with status 1
+if any run misses it.
+
+Results are written as JSON (one record per run) so they can be diffed between commits.
+
+Usage:
+    python benchmarks/retrieval_benchmark.py --sizes 10000 100000 --chunk-sizes 500 1000
+    python benchmarks/retrieval_benchmark.py --sizes 1000000 --embedder hashing --modes vector
+    python benchmarks/retrieval_benchmark.py --sizes 1000000 --bm25-only --bm25-max-scored-postings 20000
+    python benchmarks/retrieval_benchmark.py --corpus real --documents eval/AI_regulation.pdf \\
+        --labels eval/retrieval_labels.csv --sizes 10000 --rerank
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+from chromadb.api.types import EmbeddingFunction, Documents, Embeddings
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+sys.path.insert(0, BACKEND_DIR)
+from stats import percentile
+
+COMMON_WORDS = 2000
+RARE_TERMS_PER_CHUNK = 3
+
+
+def current_rss_mb():
+    """Resident set size of this process, from /proc where available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class HashingEmbedding(EmbeddingFunction[Documents]):
+    """Deterministic hashed bag-of-words vectors, for index-side measurements at scale"""
+
+    def __init__(self, dimension=384):
+        self.dimension = dimension
+        self.embedding_id = f"hashing:{dimension}"
+
+    def __call__(self, input: Documents) -> Embeddings:
+        embeddings = []
+        for text in input:
+            vector = np.zeros(self.dimension, dtype=np.float32)
+            for token in text.lower().split():
+                digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vector[value % self.dimension] += 1.0 if value >> 63 else -1.0
+            norm = np.linalg.norm(vector)
+            embeddings.append(vector / norm if norm else vector)
+        return embeddings
+
+
+class SyntheticCorpus:
+    """
+    Chunk i is a deterministic function of (seed, i): common words drawn from a Zipf
+    distribution plus a few rare terms unique to that chunk, so any chunk can be
+    regenerated to build a query for it without keeping the corpus in memory.
+    """
+
+    def __init__(self, chunk_size, seed=0):
+        self.chunk_size = chunk_size
+        self.seed = seed
+        rng = random.Random(seed)
+        syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "te", "vo", "zi", "pa", "do", "fe", "gu", "ho", "ji"]
+        self.words = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(COMMON_WORDS)]
+        self.cum_weights = list(itertools.accumulate(1.0 / rank for rank in range(1, COMMON_WORDS + 1)))
+
+    def rare_terms(self, i):
+        return [f"term{i}x{j}" for j in range(RARE_TERMS_PER_CHUNK)]
+
+    def chunk(self, i):
+        rng = random.Random(f"{self.seed}:{i}")
+        words = self.rare_terms(i)
+        length = len(" ".join(words))
+        while length < self.chunk_size:
+            word = rng.choices(self.words, cum_weights=self.cum_weights)[0]
+            words.append(word)
+            length += len(word) + 1
+        rng.shuffle(words)
+        return " ".join(words)
+
+    def metadata(self, i):
+        return {
+            'source': "synthetic",
+            'type': "text/plain",
+            'file_name': f"synthetic_{i // 1000:05d}.txt",
+            'page_number': str(i % 1000 + 1),
+            'page_range': str(i % 1000 + 1),
+            'chunk_num': "1",
+            'total_chunks': "1"
+        }
+
+    def query(self, i):
+        rng = random.Random(f"query:{self.seed}:{i}")
+        words = self.rare_terms(i) + rng.sample(self.words[:50], 3)
+        rng.shuffle(words)
+        return " ".join(words)
+
+
+def load_real_chunks(store, paths):
+    documents, metadatas = [], []
+    for path in paths:
+        with open(path, "rb") as f:
+            pages = store.extract_text_from_stream(f, os.path.basename(path))
+        chunks, metas = store.split_documents(pages)
+        documents.extend(chunks)
+        metadatas.extend(metas)
+    return documents, metadatas
+
+
+def load_labelled_questions(questions_path, labels_path):
+    with open(questions_path, newline="", encoding="utf-8") as f:
+        questions = {row["id"]: row["question"] for row in csv.DictReader(f)}
+    labels = {}
+    if labels_path:
+        with open(labels_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                pages = {page.strip() for page in row["pages"].split(";") if page.strip()}
+                labels[row["id"]] = (row["file_name"], pages)
+    return [(question, labels.get(question_id)) for question_id, question in questions.items()]
+
+
+def is_hit(metadata, label):
+    file_name, pages = label
+    return metadata.get("file_name") == file_name and (not pages or metadata.get("page_number") in pages)
+
+
+def ingest(store, chunks, batch_size):
+    """chunks yields (id, text, metadata); returns ingestion seconds"""
+    start = time.perf_counter()
+    ids, documents, metadatas = [], [], []
+    for chunk_id, text, metadata in chunks:
+        ids.append(chunk_id)
+        documents.append(text)
+        metadatas.append(metadata)
+        if len(ids) == batch_size:
+            if not store.add_documents(documents, metadatas, ids=ids):
+                raise SystemExit("Ingestion failed")
+            ids, documents, metadatas = [], [], []
+    if ids and not store.add_documents(documents, metadatas, ids=ids):
+        raise SystemExit("Ingestion failed")
+    return time.perf_counter() - start
+
+
+def measure_queries(store, queries, k, mode, rerank):
+    latencies, hits, labelled = [], 0, 0
+    for query, label in queries:
+        store.query_embedding_cache.clear()
+        start = time.perf_counter()
+        result = store.query_documents(query, n_results=k, distance_threshold=float("inf"), retrieval_mode=mode, rerank=rerank)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if label is not None:
+            labelled += 1
+            hits += any(is_hit(metadata, label) for metadata in result["metadatas"][0])
+    return {
+        "queries": len(latencies),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "mean": round(statistics.fmean(latencies), 2)
+        },
+        "labelled_queries": labelled,
+        f"recall@{k}": round(hits / labelled, 4) if labelled else None
+    }
+
+
+def run_bm25(args, size, chunk_size):
+    """Index the synthetic corpus in a bare BM25Index and time `search` against the latency target"""
+    from app.bm25_index import BM25Index
+
+    rss_start = current_rss_mb()
+    index = BM25Index(max_scored_postings=args.bm25_max_scored_postings or None)
+    corpus = SyntheticCorpus(chunk_size, seed=args.seed)
+    start = time.perf_counter()
+    for batch_start in range(0, size, args.batch_size):
+        batch = range(batch_start, min(size, batch_start + args.batch_size))
+        index.add([f"synthetic-{i}" for i in batch], [corpus.chunk(i) for i in batch])
+    index_seconds = time.perf_counter() - start
+    rss_after = current_rss_mb()
+
+    rng = random.Random(args.seed)
+    queries = [(corpus.query(i), f"synthetic-{i}") for i in rng.sample(range(size), min(args.queries, size))]
+    for query, _ in queries:
+        index.search(query, args.k)
+    latencies, hits = [], 0
+    for query, expected in queries:
+        start = time.perf_counter()
+        result = index.search(query, args.k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += any(doc_id == expected for doc_id, _ in result)
+
+    p95 = percentile(latencies, 95)
+    record = {
+        "corpus": "synthetic",
+        "size": size,
+        "chunk_size": chunk_size,
+        "retrieval_mode": "bm25_index",
+        "k": args.k,
+        "max_scored_postings": args.bm25_max_scored_postings,
+        "indexing": {
+            "seconds": round(index_seconds, 2),
+            "chunks_per_second": round(size / index_seconds, 1)
+        },
+        "memory_mb": {
+            "rss_start": rss_start and round(rss_start, 1),
+            "rss_after_indexing": rss_after and round(rss_after, 1),
+            "peak_rss": round(peak_rss_mb(), 1)
+        },
+        "queries": len(latencies),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(p95, 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(statistics.fmean(latencies), 3)
+        },
+        f"recall@{args.k}": round(hits / len(queries), 4),
+        "target_ms": args.bm25_target_ms,
+        "meets_target": p95 <= args.bm25_target_ms
+    }
+    print(json.dumps(record), flush=True)
+    return record
+
+
+def run(args, size, chunk_size, data_dir):
+    os.environ["CHROMA_PERSIST_DIRECTORY"] = data_dir
+    os.environ["CHUNK_SIZE"] = str(chunk_size)
+    os.environ["BM25_ENABLED"] = "true"
+    os.environ["QUERY_CACHE_PERSIST"] = "false"
+    os.environ["RERANK_ENABLED"] = str(args.rerank).lower()
+    # Keep every file of the run inside the throwaway data directory
+    os.environ.pop("DOCUMENT_MANIFEST_PATH", None)
+    os.environ.pop("QUERY_CACHE_PATH", None)
+    from app.document_store import ChromaDocStore
+
+    rss_start = current_rss_mb()
+    store = ChromaDocStore(embedding_function=HashingEmbedding() if args.embedder == "hashing" else None)
+    corpus = SyntheticCorpus(chunk_size, seed=args.seed)
+    rng = random.Random(args.seed)
+
+    if args.corpus == "synthetic":
+        chunks = ((f"synthetic-{i}", corpus.chunk(i), corpus.metadata(i)) for i in range(size))
+        targets = rng.sample(range(size), min(args.queries, size))
+        queries = [(corpus.query(i), (corpus.metadata(i)["file_name"], {corpus.metadata(i)["page_number"]})) for i in targets]
+    else:
+        documents, metadatas = load_real_chunks(store, args.documents)
+        if len(documents) > size:
+            raise SystemExit(f"The documents already have {len(documents)} chunks, more than the corpus size {size}")
+        real = ((f"real-{i}", text, metadata) for i, (text, metadata) in enumerate(zip(documents, metadatas)))
+        padding = ((f"synthetic-{i}", corpus.chunk(i), corpus.metadata(i)) for i in range(size - len(documents)))
+        chunks = (chunk for source in (real, padding) for chunk in source)
+        queries = load_labelled_questions(args.questions, args.labels)
+
+    rss_before = current_rss_mb()
+    ingest_seconds = ingest(store, chunks, args.batch_size)
+    rss_after = current_rss_mb()
+
+    results = []
+    for mode in args.modes:
+        for rerank in ([False, True] if args.rerank else [False]):
+            measured = measure_queries(store, queries, args.k, mode, rerank)
+            record = {
+                "corpus": args.corpus,
+                "size": size,
+                "chunk_count": store.collection.count(),
+                "chunk_size": chunk_size,
+                "embedding_id": store.embedding_id,
+                "retrieval_mode": mode,
+                "rerank": rerank,
+                "k": args.k,
+                "ingestion": {
+                    "seconds": round(ingest_seconds, 2),
+                    "chunks_per_second": round(size / ingest_seconds, 1)
+                },
+                "memory_mb": {
+                    "rss_start": rss_start and round(rss_start, 1),
+                    "rss_before_ingestion": rss_before and round(rss_before, 1),
+                    "rss_after_ingestion": rss_after and round(rss_after, 1),
+                    "peak_rss": round(peak_rss_mb(), 1)
+                },
+                **measured
+            }
+            print(json.dumps(record), flush=True)
+            results.append(record)
+    return results
+
+
+def run_isolated(args, size, chunk_size):
+    """All records of one corpus size and chunk size, run in a worker process of its own"""
+    if args.bm25_only:
+        return [run_bm25(args, size, chunk_size)]
+    data_dir = tempfile.mkdtemp(prefix=f"retrieval_benchmark_{size}_{chunk_size}_")
+    try:
+        return run(args, size, chunk_size, data_dir)
+    finally:
+        if not args.keep_data:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", choices=["synthetic", "real"], default="synthetic")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000], help="Corpus sizes in chunks")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[1000], help="Chunk sizes in characters")
+    parser.add_argument("--modes", nargs="+", choices=["vector", "bm25", "hybrid"], default=["vector", "bm25", "hybrid"])
+    parser.add_argument("--rerank", action="store_true", help="Also measure every mode with cross-encoder reranking")
+    parser.add_argument("--k", type=int, default=5, help="Results per query, recall is measured at k")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per run on synthetic corpora")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Chunks per add_documents call")
+    parser.add_argument("--embedder", choices=["configured", "hashing"], default="configured")
+    parser.add_argument("--documents", nargs="+", default=[], help="Documents of the real corpus")
+    parser.add_argument("--questions", default=os.path.join(ROOT_DIR, "eval", "questions.csv"))
+    parser.add_argument("--labels", help="CSV with id,file_name,pages targets for the questions")
+    parser.add_argument("--bm25-only", action="store_true", help="Time BM25Index.search alone, without Chroma or embeddings")
+    parser.add_argument("--bm25-target-ms", type=float, default=1.0, help="p95 latency target of --bm25-only runs")
+    parser.add_argument("--bm25-max-scored-postings", type=int, default=0, help="BM25_MAX_SCORED_POSTINGS of --bm25-only runs, 0 for exact")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=f"retrieval_benchmark_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    parser.add_argument("--keep-data", action="store_true", help="Keep the temporary data directories")
+    args = parser.parse_args()
+    if args.corpus == "real" and not args.documents:
+        parser.error("--corpus real needs --documents")
+    if args.bm25_only and args.corpus != "synthetic":
+        parser.error("--bm25-only needs the synthetic corpus")
+
+    results = []
+    # Peak RSS is per process and a finished run's store is not freed reliably, so every
+    # run gets a fresh process instead of inheriting the memory of the ones before it
+    context = multiprocessing.get_context("spawn")
+    for size in args.sizes:
+        for chunk_size in args.chunk_sizes:
+            with context.Pool(1) as pool:
+                results.extend(pool.apply(run_isolated, (args, size, chunk_size)))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": time.time(), "arguments": vars(args), "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+    missed = [r for r in results if r.get("meets_target") is False]
+    if missed:
+        for r in missed:
+            print(f"BM25 p95 {r['latency_ms']['p95']} ms over the {r['target_ms']} ms target at {r['size']} chunks")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
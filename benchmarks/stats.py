@@ -0,0 +1,12 @@
+"""
+Summary statistics shared by the benchmark scripts and eval/compare_runs.py, so every
+report computes percentiles the same way and their numbers can be compared.
+"""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of the values, None if there are none"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
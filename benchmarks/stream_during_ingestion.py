@@ -0,0 +1,132 @@
+"""
+Measures whether token streaming keeps flowing while a large document is ingested.
+
+Runs against a live backend. One SSE /query stream is opened and the gap between
+consecutive frames is recorded; once the stream is flowing, the PDF is uploaded and
+the script waits for its ingestion job. In parallel a probe hits a trivial endpoint
+every few milliseconds, so a blocked event loop shows up as probe latency.
+Gaps and probe latencies are reported separately for the periods before and during ingestion.
+
+Usage:
+    python benchmarks/stream_during_ingestion.py --pdf eval/AI_regulation.pdf
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import requests
+from stats import percentile
+
+PROBE_ENDPOINT = "generation/stats"
+
+
+def summarize(values):
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.mean(values) * 1000, 2),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2)
+    }
+
+
+class Recorder:
+    """Collects timed samples and tags them with the phase they were taken in"""
+
+    def __init__(self):
+        self.phase = "before"
+        self.samples = {"before": [], "during": [], "after": []}
+        self.lock = threading.Lock()
+
+    def add(self, value):
+        with self.lock:
+            self.samples[self.phase].append(value)
+
+
+def stream_query(backend_url, question, gaps: Recorder, first_frame: threading.Event, done: threading.Event):
+    with requests.post(
+            f"{backend_url}/query",
+            json={"question": question, "messages": []},
+            headers={"Accept": "text/event-stream", "X-Client-Id": "benchmark"},
+            stream=True
+    ) as response:
+        response.raise_for_status()
+        last = None
+        for line in response.iter_lines():
+            if not line or not line.startswith(b"data: "):
+                continue
+            now = time.perf_counter()
+            if last is not None:
+                gaps.add(now - last)
+            last = now
+            first_frame.set()
+    done.set()
+
+
+def probe_loop(backend_url, interval, latencies: Recorder, stop: threading.Event):
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.get(f"{backend_url}/{PROBE_ENDPOINT}").raise_for_status()
+        latencies.add(time.perf_counter() - start)
+        time.sleep(interval)
+
+
+def upload_and_wait(backend_url, pdf_path, poll_interval=0.5):
+    with open(pdf_path, "rb") as f:
+        response = requests.post(f"{backend_url}/documents/upload", files=[("files", f)])
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    while True:
+        job = requests.get(f"{backend_url}/jobs/{job_id}").json()
+        if job["status"] in ("completed", "partial", "failed"):
+            return job
+        time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend-url", default="http://localhost:8000")
+    parser.add_argument("--pdf", required=True, help="Large PDF to ingest during streaming")
+    parser.add_argument("--question", default="Summarize the obligations for providers of high-risk AI systems in detail.")
+    parser.add_argument("--probe-interval", type=float, default=0.02)
+    args = parser.parse_args()
+
+    gaps, probes = Recorder(), Recorder()
+    first_frame, stream_done, stop_probe = threading.Event(), threading.Event(), threading.Event()
+
+    streamer = threading.Thread(target=stream_query, args=(args.backend_url, args.question, gaps, first_frame, stream_done), daemon=True)
+    prober = threading.Thread(target=probe_loop, args=(args.backend_url, args.probe_interval, probes, stop_probe), daemon=True)
+    streamer.start()
+    prober.start()
+
+    if not first_frame.wait(timeout=600):
+        raise SystemExit("No frames received from /query")
+    time.sleep(2)  # baseline window
+
+    gaps.phase = probes.phase = "during"
+    ingest_start = time.perf_counter()
+    job = upload_and_wait(args.backend_url, args.pdf)
+    ingest_seconds = time.perf_counter() - ingest_start
+    gaps.phase = probes.phase = "after"
+
+    stream_done.wait(timeout=600)
+    stop_probe.set()
+    prober.join()
+
+    report = {
+        "ingestion_seconds": round(ingest_seconds, 2),
+        "ingestion_status": job["status"],
+        "stream_frame_gaps": {phase: summarize(values) for phase, values in gaps.samples.items()},
+        "event_loop_probe_latency": {phase: summarize(values) for phase, values in probes.samples.items()}
+    }
+    print(json.dumps(report, indent=2))
+    if not stream_done.is_set():
+        print("Warning: the stream had not finished when the benchmark ended")
+
+
+if __name__ == "__main__":
+    main()
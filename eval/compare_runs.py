@@ -0,0 +1,179 @@
+"""
+Compare two evaluation runs on quality and performance.
+
+Reads eval/results/results_<run>.json (answers with per-question metrics, written by
+prepare_answers.py) and, when present, eval/results/evaluation_<run>.csv (judge scores,
+written by evaluate_responses.py) for a baseline and a candidate run, and reports
+per-metric aggregates side by side. The candidate is flagged as a regression when
+  - a latency metric's p50 or p95 grows by more than --latency-threshold percent
+  - a throughput metric (completion tokens/s) drops by more than --latency-threshold percent
+  - the mean of a judge score drops by more than --score-threshold points
+  - a single question's average score drops by more than --question-threshold points
+Exits with status 1 when anything is flagged, so it can gate a change.
+
+Usage:
+    python eval/compare_runs.py 2025-01-01 2025-01-08
+    python eval/compare_runs.py baseline candidate --latency-threshold 10 --json report.json
+"""
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+from stats import percentile
+
+RESULTS_DIR = "eval/results"
+# Metrics where higher is worse, from the `metrics` of each answer
+LATENCY_METRICS = ["retrieval_ms", "ttft_ms", "total_ms", "llm_ttft_ms", "llm_total_ms"]
+# Reported for context, not flagged. Queue time is near zero when requests do not contend,
+# so percent changes of it are noise.
+COUNT_METRICS = ["prompt_tokens", "completion_tokens", "chunk_count", "context_chunks", "queue_seconds"]
+SCORE_COLUMNS = ["average_score", "relevance_score", "accuracy_score", "completeness_score",
+                 "coherence_score", "conciseness_score", "citation_score"]
+
+
+def describe(values):
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "mean": round(statistics.mean(values), 2),
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2)
+    }
+
+
+def load_run(run):
+    """Answers and judge scores of a run, given its name or the path of its results JSON"""
+    results_path = run if run.endswith(".json") else os.path.join(RESULTS_DIR, f"results_{run}.json")
+    with open(results_path, "r", encoding="utf-8") as f:
+        answers = {str(item["id"]): item for item in json.load(f)}
+
+    evaluation_path = os.path.join(
+        os.path.dirname(results_path),
+        os.path.basename(results_path).replace("results_", "evaluation_").replace(".json", ".csv")
+    )
+    scores = {}
+    if os.path.exists(evaluation_path):
+        with open(evaluation_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                scores[str(row["question_id"])] = {column: float(row[column]) for column in SCORE_COLUMNS if row.get(column)}
+    return answers, scores
+
+
+def metric_values(answers, metric):
+    values = []
+    for item in answers.values():
+        metrics = item.get("metrics") or {}
+        if metric == "completion_tokens_per_second":
+            tokens, eval_ms = metrics.get("completion_tokens"), metrics.get("llm_eval_ms")
+            value = tokens / (eval_ms / 1000) if tokens and eval_ms else None
+        else:
+            value = metrics.get(metric)
+        if isinstance(value, (int, float)):
+            values.append(value)
+    return values
+
+
+def relative_change(baseline, candidate):
+    if not baseline:
+        return None
+    return round((candidate - baseline) / baseline * 100, 1)
+
+
+def compare(baseline_run, candidate_run, latency_threshold, score_threshold, question_threshold):
+    base_answers, base_scores = load_run(baseline_run)
+    cand_answers, cand_scores = load_run(candidate_run)
+    report = {"baseline": baseline_run, "candidate": candidate_run, "performance": {}, "quality": {}, "regressions": []}
+
+    for metric in LATENCY_METRICS + ["completion_tokens_per_second"] + COUNT_METRICS:
+        base, cand = describe(metric_values(base_answers, metric)), describe(metric_values(cand_answers, metric))
+        if base is None or cand is None:
+            continue
+        entry = {"baseline": base, "candidate": cand}
+        for stat in ("p50", "p95"):
+            change = relative_change(base[stat], cand[stat])
+            entry[f"{stat}_change_percent"] = change
+            if change is None:
+                continue
+            if metric in LATENCY_METRICS and change > latency_threshold:
+                report["regressions"].append(f"{metric} {stat} up {change}% ({base[stat]} -> {cand[stat]})")
+            elif metric == "completion_tokens_per_second" and -change > latency_threshold:
+                report["regressions"].append(f"{metric} {stat} down {-change}% ({base[stat]} -> {cand[stat]})")
+        report["performance"][metric] = entry
+
+    if base_scores and cand_scores:
+        for column in SCORE_COLUMNS:
+            base = describe([s[column] for s in base_scores.values() if column in s])
+            cand = describe([s[column] for s in cand_scores.values() if column in s])
+            if base is None or cand is None:
+                continue
+            change = round(cand["mean"] - base["mean"], 2)
+            report["quality"][column] = {"baseline": base, "candidate": cand, "mean_change": change}
+            if -change > score_threshold:
+                report["regressions"].append(f"{column} mean down {-change} points ({base['mean']} -> {cand['mean']})")
+
+        for question_id in sorted(set(base_scores) & set(cand_scores), key=lambda q: (len(q), q)):
+            base, cand = base_scores[question_id].get("average_score"), cand_scores[question_id].get("average_score")
+            if base is not None and cand is not None and base - cand > question_threshold:
+                question = cand_answers.get(question_id, {}).get("question", "")
+                report["regressions"].append(f"question {question_id} average score down {round(base - cand, 1)} points: {question}")
+    else:
+        report["quality"] = None
+
+    missing = sorted(set(base_answers) - set(cand_answers))
+    if missing:
+        report["regressions"].append(f"{len(missing)} questions of the baseline are missing from the candidate: {', '.join(missing)}")
+    return report
+
+
+def format_change(change):
+    return "n/a" if change is None else f"{change}%"
+
+
+def print_report(report):
+    print(f"Baseline: {report['baseline']}   Candidate: {report['candidate']}\n")
+    print(f"{'metric':32} {'base p50':>10} {'cand p50':>10} {'change':>8} {'base p95':>10} {'cand p95':>10} {'change':>8}")
+    for metric, entry in report["performance"].items():
+        base, cand = entry["baseline"], entry["candidate"]
+        print(f"{metric:32} {base['p50']:>10} {cand['p50']:>10} {format_change(entry['p50_change_percent']):>8} "
+              f"{base['p95']:>10} {cand['p95']:>10} {format_change(entry['p95_change_percent']):>8}")
+    if report["quality"]:
+        print(f"\n{'score':32} {'base mean':>10} {'cand mean':>10} {'change':>8}")
+        for column, entry in report["quality"].items():
+            print(f"{column:32} {entry['baseline']['mean']:>10} {entry['candidate']['mean']:>10} {entry['mean_change']:>8}")
+    else:
+        print("\nNo judge scores for both runs, quality not compared")
+
+    if report["regressions"]:
+        print(f"\n{len(report['regressions'])} regressions:")
+        for regression in report["regressions"]:
+            print(f"  - {regression}")
+    else:
+        print("\nNo regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="Run name (e.g. a date) or path to its results JSON")
+    parser.add_argument("candidate", help="Run name (e.g. a date) or path to its results JSON")
+    parser.add_argument("--latency-threshold", type=float, default=20.0, help="Allowed latency growth in percent")
+    parser.add_argument("--score-threshold", type=float, default=5.0, help="Allowed drop of a mean judge score in points")
+    parser.add_argument("--question-threshold", type=float, default=20.0, help="Allowed drop of one question's average score")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = compare(args.baseline, args.candidate, args.latency_threshold, args.score_threshold, args.question_threshold)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,25 @@
+import argparse
+import asyncio
 import json
 import csv
 import requests
 from pathlib import Path
 import time
 from datetime import datetime
-from prepare_answers import main as prepare_answers_main
+from prepare_answers import main as prepare_answers_main, ANSWER_CONCURRENCY
+from runner import Checkpoint, JudgeCache, run_concurrently
+
+OLLAMA_URL = "http://localhost:11434"
+JUDGE_MODEL = "phi4:14b"
+JUDGE_CONCURRENCY = 2  # Judge requests in flight at once
+JUDGE_CACHE_PATH = "eval/results/judge_cache.jsonl"
+CATEGORIES = ['relevance', 'accuracy', 'completeness', 'coherence', 'conciseness', 'citation']
+DEFAULT_EVALUATION = """RELEVANCE|50|Could not evaluate properly
+ACCURACY|50|Could not evaluate properly
+COMPLETENESS|50|Could not evaluate properly
+COHERENCE|50|Could not evaluate properly
+CONCISENESS|50|Could not evaluate properly
+CITATION|50|Could not evaluate properly"""
 
 def get_phi_evaluation(question, answer, max_retries=3):
     """Query model to evaluate the RAG response with retry logic"""
@@ -41,9 +56,9 @@ Remember: Your response must contain exactly 6 lines, each with the format CATEG
         try:
             # Make request to Ollama
             response = requests.post(
-                "http://localhost:11434/api/generate",
+                f"{OLLAMA_URL}/api/generate",
                 json={
-                    "model": "phi4:14b",
+                    "model": JUDGE_MODEL,
                     "prompt": prompt.format(question=question, answer=answer),
                     "stream": False
                 }
@@ -69,12 +84,7 @@ Remember: Your response must contain exactly 6 lines, each with the format CATEG
             time.sleep(2 ** attempt)
     
     # If all retries failed, return a default evaluation
-    return """RELEVANCE|50|Could not evaluate properly
-ACCURACY|50|Could not evaluate properly
-COMPLETENESS|50|Could not evaluate properly
-COHERENCE|50|Could not evaluate properly
-CONCISENESS|50|Could not evaluate properly
-CITATION|50|Could not evaluate properly"""
+    return DEFAULT_EVALUATION
 
 def parse_evaluation(eval_text):
     """Parse the evaluation response into a dictionary with error handling"""
@@ -99,93 +109,125 @@ def parse_evaluation(eval_text):
         print(f"Error parsing evaluation: {str(e)}")
     return results
 
-def main():
+def evaluate_result(result, judge_cache):
+    """Judge one answer, reusing the cached judgement when the same answer was judged before"""
+    eval_text = judge_cache.get(result["question"], result["answer"], JUDGE_MODEL)
+    if eval_text is None:
+        eval_text = get_phi_evaluation(result["question"], result["answer"])
+        # A fallback is not a judgement: fail the item so it stays out of the checkpoint and is retried
+        if eval_text == DEFAULT_EVALUATION:
+            raise RuntimeError("the judge gave no valid evaluation")
+        judge_cache.put(result["question"], result["answer"], JUDGE_MODEL, eval_text)
+    eval_results = parse_evaluation(eval_text)
+    
+    # Print the evaluation scores
+    print(eval_results)
+    
+    # Calculate average score
+    scores = [v['score'] for v in eval_results.values()]
+    avg_score = sum(scores) / len(scores) if scores else 0
+    
+    # Prepare row for CSV
+    row = {
+        'id': result['id'],
+        'question_id': result['id'],
+        'question': result['question'],
+        'average_score': avg_score
+    }
+    
+    # Add individual category scores and justifications
+    for category in CATEGORIES:
+        if category in eval_results:
+            row[f'{category}_score'] = eval_results[category]['score']
+            row[f'{category}_justification'] = eval_results[category]['justification']
+        else:
+            row[f'{category}_score'] = 0
+            row[f'{category}_justification'] = 'No evaluation provided'
+    return row
+
+def error_row(result, error):
+    """Row for an answer that could not be judged"""
+    row = {
+        'question_id': result['id'],
+        'question': result['question'],
+        'average_score': 0
+    }
+    for category in CATEGORIES:
+        row[f'{category}_score'] = 0
+        row[f'{category}_justification'] = f'Error: {error}'
+    return row
+
+def main(results_path=None, run_name=None, concurrency=JUDGE_CONCURRENCY):
+    """
+    Judge every answer, `concurrency` at a time. Judged rows are checkpointed as they
+    complete, so rerunning with the same run name resumes an interrupted run, and
+    judgements are cached across runs by question, answer and judge model.
+    """
     # Create results directory if it doesn't exist
-    Path("results").mkdir(exist_ok=True)
+    Path("eval/results").mkdir(parents=True, exist_ok=True)
     
     # Get current date for filename
-    current_date = datetime.now().strftime("%Y-%m-%d")
+    run_name = run_name or datetime.now().strftime("%Y-%m-%d")
     
     # Read the RAG results
-    with open(f"eval/results/results_{current_date}.json", "r") as f:
+    with open(results_path or f"eval/results/results_{run_name}.json", "r") as f:
         rag_results = json.load(f)
+
+    output_file = f'eval/results/evaluation_{run_name}.csv'
+    checkpoint = Checkpoint(output_file.replace('.csv', '.jsonl'))
+    judge_cache = JudgeCache(JUDGE_CACHE_PATH)
+    
+    print(f"Evaluating {len(rag_results)} responses with concurrency {concurrency}...")
+    failed = asyncio.run(run_concurrently(
+        rag_results,
+        lambda result: evaluate_result(result, judge_cache),
+        checkpoint,
+        concurrency,
+        label="response"
+    ))
+    print(f"Judge cache hits: {judge_cache.hits}")
     
     # Prepare CSV output
-    csv_rows = []
     csv_headers = ['question_id', 'question', 'relevance_score', 'relevance_justification',
                   'accuracy_score', 'accuracy_justification', 'completeness_score',
                   'completeness_justification', 'coherence_score', 'coherence_justification',
                   'conciseness_score', 'conciseness_justification', 'citation_score',
                   'citation_justification', 'average_score']
+    csv_rows = [
+        checkpoint.items[str(result['id'])] if result['id'] in checkpoint
+        else error_row(result, "not evaluated, rerun to retry")
+        for result in rag_results
+    ]
     
-    # Process each question and answer
-    total = len(rag_results)
-    for i, result in enumerate(rag_results, 1):
-        print(f"Evaluating response {i}/{total}")
-        
-        try:
-            # Get evaluation from phi4
-            eval_text = get_phi_evaluation(result["question"], result["answer"])
-            eval_results = parse_evaluation(eval_text)
-            
-            # Print the evaluation scores
-            print(eval_results)
-            
-            
-            # Calculate average score
-            scores = [v['score'] for v in eval_results.values()]
-            avg_score = sum(scores) / len(scores) if scores else 0
-            
-            # Prepare row for CSV
-            row = {
-                'question_id': result['id'],
-                'question': result['question'],
-                'average_score': avg_score
-            }
-            
-            # Add individual category scores and justifications
-            for category in ['relevance', 'accuracy', 'completeness', 'coherence', 'conciseness', 'citation']:
-                if category in eval_results:
-                    row[f'{category}_score'] = eval_results[category]['score']
-                    row[f'{category}_justification'] = eval_results[category]['justification']
-                else:
-                    row[f'{category}_score'] = 0
-                    row[f'{category}_justification'] = 'No evaluation provided'
-            
-            csv_rows.append(row)
-            
-        except Exception as e:
-            print(f"Error processing response {i}: {str(e)}")
-            # Add a row with error information
-            row = {
-                'question_id': result['id'],
-                'question': result['question'],
-                'average_score': 0
-            }
-            for category in ['relevance', 'accuracy', 'completeness', 'coherence', 'conciseness', 'citation']:
-                row[f'{category}_score'] = 0
-                row[f'{category}_justification'] = f'Error: {str(e)}'
-            csv_rows.append(row)
-        
-        # Add a small delay between evaluations
-        time.sleep(1)
-    
-    # Write results to CSV with date in filename
-    output_file = f'eval/results/evaluation_{current_date}.csv'
+    # Write results to CSV with the run name in the filename
     with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=csv_headers)
+        writer = csv.DictWriter(f, fieldnames=csv_headers, extrasaction='ignore')
         writer.writeheader()
         writer.writerows(csv_rows)
     
+    if failed:
+        print(f"{failed} responses could not be evaluated, rerun with --run-name {run_name} to retry them")
     print(f"Evaluation complete. Results saved to {output_file}")
 
-def run_full_evaluation():
+def run_full_evaluation(run_name=None, answer_concurrency=ANSWER_CONCURRENCY, judge_concurrency=JUDGE_CONCURRENCY):
     """Run both prepare_answers and evaluation in sequence"""
     print("Step 1: Preparing answers...")
-    prepare_answers_main()
+    results_path = prepare_answers_main(run_name, answer_concurrency)
     
     print("\nStep 2: Evaluating responses...")
-    main()
+    main(results_path, run_name, judge_concurrency)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Answer the evaluation questions and judge the answers")
+    parser.add_argument("--run-name", help="Names the result files, reuse it to resume a run (default: today's date)")
+    parser.add_argument("--answer-concurrency", type=int, default=ANSWER_CONCURRENCY, help="Questions in flight at once")
+    parser.add_argument("--judge-concurrency", type=int, default=JUDGE_CONCURRENCY, help="Judge requests in flight at once")
+    parser.add_argument("--judge-only", action="store_true", help="Only judge the answers of an existing run")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    run_full_evaluation() 
+    args = parse_args()
+    if args.judge_only:
+        main(run_name=args.run_name, concurrency=args.judge_concurrency)
+    else:
+        run_full_evaluation(args.run_name, args.answer_concurrency, args.judge_concurrency)
@@ -1,20 +1,44 @@
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
 import requests
 import json
 import csv
 import time
 from datetime import datetime
+from runner import Checkpoint, run_concurrently
 
 # Configuration
 BACKEND_URL = "http://localhost:8000"
 SAMPLE_PDF_PATH = "eval/AI_regulation.pdf"
 QUESTIONS_CSV_PATH = "eval/questions.csv"
 RESULTS_JSON_PATH = "eval/results/results.json"
+JOB_POLL_INTERVAL = 2  # Seconds between ingestion job status checks
+JOB_TIMEOUT = 3600  # Maximum seconds to wait for ingestion to finish
+READY_TIMEOUT = 600  # Maximum seconds to wait for the backend to load its models
+ANSWER_CONCURRENCY = 4  # Questions in flight at once, the backend queues beyond its generation slots
+MAX_BUSY_RETRIES = 10  # Attempts when the backend rejects a question because its queue is full
 
 
 
+def wait_for_ready():
+    """Wait until the backend has loaded the index and embedding model"""
+    deadline = time.time() + READY_TIMEOUT
+    while time.time() < deadline:
+        try:
+            response = requests.get(f"{BACKEND_URL}/ready")
+            if response.status_code == 200:
+                print(f"Backend ready: {response.json()['startup_seconds']}")
+                return
+            if response.json().get('status') == 'error':
+                raise Exception(f"Backend failed to load: {response.json().get('message')}")
+        except requests.RequestException:
+            pass  # Not accepting connections yet
+        time.sleep(JOB_POLL_INTERVAL)
+    raise TimeoutError(f"Backend was not ready within {READY_TIMEOUT} seconds")
+
 def clear_database():
     """Clear all documents from the database"""
     response = requests.post(f"{BACKEND_URL}/documents/clear")
@@ -41,10 +65,33 @@ def upload_pdf():
             raise Exception(f"Failed to upload PDF: {response_data.get('message', 'Unknown error')}")
             
         print("PDF uploaded successfully")
+        return response_data['job_id']
     except Exception as e:
         print(f"Error during PDF upload: {str(e)}")
         raise
 
+def wait_for_job(job_id):
+    """Poll the ingestion job until it finishes"""
+    deadline = time.time() + JOB_TIMEOUT
+    while time.time() < deadline:
+        response = requests.get(f"{BACKEND_URL}/jobs/{job_id}")
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch job {job_id}. Status code: {response.status_code}")
+
+        job = response.json()
+        for file in job['files']:
+            print(f"  {file['file_name']}: {file['stage']} - pages {file['pages_extracted']}, "
+                  f"chunks {file['chunks_written']}/{file['chunks_total']}")
+
+        if job['status'] == 'completed':
+            return job
+        if job['status'] in ('failed', 'partial'):
+            errors = "; ".join(f"{f['file_name']}: {f['error']}" for f in job['files'] if f['error'])
+            raise Exception(f"Ingestion job {job_id} {job['status']}: {errors}")
+
+        time.sleep(JOB_POLL_INTERVAL)
+    raise TimeoutError(f"Ingestion job {job_id} did not finish within {JOB_TIMEOUT} seconds")
+
 def read_questions():
     """Read questions from CSV file"""
     questions = []
@@ -58,33 +105,62 @@ def read_questions():
     return questions
 
 def query_backend(question):
-    """Query the backend with a question and get the response"""
+    """
+    Query the backend with a question. Returns the answer and its metrics: client-side
+    time to first token and total time, the queue wait, and the retrieval time, chunk
+    count and token counts the backend reports in its `stats` event.
+    """
     query_data = {
         "question": question,
         "messages": [],
         "previous_chunks": []
     }
-    
-    response = requests.post(
-        f"{BACKEND_URL}/query",
-        json=query_data,
-        headers={"Accept": "text/event-stream"},
-        stream=True
-    )
-    
+
+    for attempt in range(MAX_BUSY_RETRIES):
+        start = time.perf_counter()
+        response = requests.post(
+            f"{BACKEND_URL}/query",
+            json=query_data,
+            headers={"Accept": "text/event-stream"},
+            stream=True
+        )
+        if response.status_code not in (429, 503):
+            break
+        # Queue full or still loading, wait as long as the backend asks
+        time.sleep(int(response.headers.get("Retry-After", 5)))
+    if response.status_code != 200:
+        raise Exception(f"Query failed. Status code: {response.status_code}. Response: {response.text}")
+
     full_answer = ""
+    metrics = {}
+    event = "message"
     for line in response.iter_lines():
-        if line:
-            line = line.decode('utf-8')
-            if line.startswith("data: "):
-                try:
-                    data = json.loads(line[6:])
-                    if "answer" in data:
-                        full_answer += data["answer"]
-                except json.JSONDecodeError:
-                    continue
+        if not line:
+            event = "message"
+            continue
+        line = line.decode('utf-8')
+        if line.startswith("event: "):
+            event = line[7:]
+        elif line.startswith("data: "):
+            if event == "error":
+                raise Exception(f"Backend error: {line[6:]}")
+            if event == "start":
+                metrics["queue_seconds"] = json.loads(line[6:])["queue_seconds"]
+                continue
+            if event == "stats":
+                metrics.update(json.loads(line[6:]))
+                continue
+            try:
+                data = json.loads(line[6:])
+                if "answer" in data:
+                    if "ttft_ms" not in metrics:
+                        metrics["ttft_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                    full_answer += data["answer"]
+            except json.JSONDecodeError:
+                continue
+    metrics["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
     
-    return full_answer.strip()
+    return full_answer.strip(), metrics
 
 def test_backend_connection():
     """Test if backend is accessible"""
@@ -95,48 +171,67 @@ def test_backend_connection():
         print(f"Backend connection failed: {str(e)}")
         return False
 
-def main():
+def answer_question(item):
+    """Worker for the runner: answer one question"""
+    answer, metrics = query_backend(item["question"])
+    return {
+        "date": item["date"],
+        "id": item["id"],
+        "question": item["question"],
+        "answer": answer,
+        "metrics": metrics
+    }
+
+def main(run_name=None, concurrency=ANSWER_CONCURRENCY):
+    """
+    Answer every question, `concurrency` at a time. Answers are checkpointed as they
+    complete, so rerunning with the same run name resumes an interrupted run without
+    re-ingesting the document.
+    """
     # Create results directory if it doesn't exist
     os.makedirs(os.path.dirname(RESULTS_JSON_PATH), exist_ok=True)
     
     # Get current date for filename
     current_date = datetime.now().strftime("%Y-%m-%d")
+    run_name = run_name or current_date
     
-    # Modify results path to include date
-    results_path = RESULTS_JSON_PATH.replace('.json', f'_{current_date}.json')
-    
-    # Clear the database
-    print("Clearing database...")
-    clear_database()
-    
-    # Upload the PDF
-    print("Uploading PDF...")
-    upload_pdf()
+    # Modify results path to include the run name
+    results_path = RESULTS_JSON_PATH.replace('.json', f'_{run_name}.json')
+    checkpoint = Checkpoint(results_path.replace('.json', '.jsonl'))
     
-    # Wait a bit for indexing
-    print("Waiting for indexing...")
-    time.sleep(60)  
+    # The backend accepts connections before its models are loaded
+    print("Waiting for backend...")
+    wait_for_ready()
+
+    if len(checkpoint):
+        # The index the earlier answers came from is still in place
+        print(f"Resuming run {run_name}, skipping ingestion")
+    else:
+        # Clear the database
+        print("Clearing database...")
+        clear_database()
+        
+        # Upload the PDF
+        print("Uploading PDF...")
+        job_id = upload_pdf()
+        
+        # Wait for the ingestion job to finish indexing
+        print("Waiting for indexing...")
+        wait_for_job(job_id)
     
     # Read questions
     print("Reading questions...")
     questions = read_questions()
+    for q in questions:
+        q["date"] = current_date
     
-    # Query each question and collect results
-    results = []
-    total_questions = len(questions)
+    print(f"Processing {len(questions)} questions with concurrency {concurrency}...")
+    failed = asyncio.run(run_concurrently(questions, answer_question, checkpoint, concurrency, label="question"))
+    if failed:
+        raise Exception(f"{failed} questions failed, rerun with --run-name {run_name} to retry them")
+    results = checkpoint.ordered(q["id"] for q in questions)
     
-    print(f"Processing {total_questions} questions...")
-    for i, q in enumerate(questions, 1):
-        print(f"Processing question {i}/{total_questions}")
-        answer = query_backend(q["question"])
-        results.append({
-            "date": current_date,
-            "id": q["id"],
-            "question": q["question"],
-            "answer": answer
-        })
-    
-    # Save results with date in filename
+    # Save results in question order
     with open(results_path, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
     
@@ -147,5 +242,12 @@ def main():
         
     return results_path  # Return the path of the generated file
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Answer the evaluation questions through the backend")
+    parser.add_argument("--run-name", help="Names the result files, reuse it to resume a run (default: today's date)")
+    parser.add_argument("--concurrency", type=int, default=ANSWER_CONCURRENCY, help="Questions in flight at once")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    args = parse_args()
+    main(args.run_name, args.concurrency)
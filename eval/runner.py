@@ -0,0 +1,122 @@
+"""
+Concurrency, checkpointing and caching shared by the evaluation scripts.
+
+Items are processed by blocking workers (the scripts use `requests`) run in a thread
+pool, at most `concurrency` at a time. Every finished item is appended to a JSONL
+checkpoint right away, so an interrupted run picks up where it stopped; items that
+failed are not recorded and are retried on the next run.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class Checkpoint:
+    """Append-only JSONL file of completed items, keyed by their `id`"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Last line of a run killed mid-write
+                    self.items[str(item['id'])] = item
+
+    def __contains__(self, item_id) -> bool:
+        return str(item_id) in self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def record(self, item: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Workers record from several threads
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.items[str(item['id'])] = item
+
+    def ordered(self, ids: Iterable) -> List[Dict[str, Any]]:
+        """Completed items in the given order"""
+        return [self.items[str(item_id)] for item_id in ids if str(item_id) in self.items]
+
+
+class JudgeCache:
+    """
+    Judge outputs keyed by sha256 of (question, answer, judge model), persisted as JSONL.
+    Shared across runs, so an answer that did not change is never judged twice.
+    """
+
+    def __init__(self, path: str):
+        self._checkpoint = Checkpoint(path)
+        self.hits = 0
+
+    @staticmethod
+    def key(question: str, answer: str, model: str) -> str:
+        return hashlib.sha256(json.dumps([question, answer, model]).encode('utf-8')).hexdigest()
+
+    def get(self, question: str, answer: str, model: str) -> Optional[str]:
+        entry = self._checkpoint.items.get(self.key(question, answer, model))
+        if entry is None:
+            return None
+        self.hits += 1
+        return entry['evaluation']
+
+    def put(self, question: str, answer: str, model: str, evaluation: str):
+        self._checkpoint.record({'id': self.key(question, answer, model), 'model': model, 'evaluation': evaluation})
+
+
+async def run_concurrently(
+        items: List[Dict[str, Any]],
+        worker: Callable[[Dict[str, Any]], Dict[str, Any]],
+        checkpoint: Checkpoint,
+        concurrency: int,
+        label: str = "item"
+) -> int:
+    """
+    Run the blocking `worker` on every item not yet in the checkpoint, `concurrency` at a
+    time, recording each result as soon as it is done. Returns the number of failures.
+    """
+    pending = [item for item in items if item['id'] not in checkpoint]
+    skipped = len(items) - len(pending)
+    if skipped:
+        print(f"Resuming: {skipped}/{len(items)} {label}s already done")
+    if not pending:
+        return 0
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    done, failed = skipped, 0
+    start = time.perf_counter()
+
+    async def process(item):
+        nonlocal done, failed
+        async with semaphore:
+            try:
+                result = await loop.run_in_executor(executor, worker, item)
+            except Exception as e:
+                failed += 1
+                print(f"{label.capitalize()} {item['id']} failed, it is retried on the next run: {e}")
+                return
+        checkpoint.record(result)
+        done += 1
+        print(f"Finished {label} {item['id']} ({done}/{len(items)}, {time.perf_counter() - start:.1f}s)")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        await asyncio.gather(*(process(item) for item in pending))
+    return failed
@@ -1,4 +1,5 @@
 import json
+import time
 import requests
 import streamlit as st
 from pathlib import Path
@@ -10,17 +11,32 @@ root_dir = Path(__file__).parent.parent.parent
 load_dotenv(dotenv_path=root_dir / '.env', override=True)
 BACKEND_URL = f"{os.getenv('BACKEND_URL')}/query"
 MODEL = os.getenv('OLLAMA_MODEL')
+# Re-rendering the growing markdown on every frame is quadratic, so redraw at most this often
+RENDER_INTERVAL = 1.0 / float(os.getenv('CHAT_RENDER_FPS', 10))
+
+def iter_sse_events(response):
+    """Yield (event, data) per SSE event, joining multi-line data with newlines"""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=False):
+        if not line:
+            # A blank line ends the current SSE event
+            if data_lines:
+                yield event, "\n".join(data_lines)
+            event, data_lines = "message", []
+            continue
+        line = line.decode('utf-8')
+        if line.startswith('event: '):
+            event = line[7:]
+        elif line.startswith('data:'):
+            data_lines.append(line[6:] if line.startswith('data: ') else line[5:])
+    if data_lines:
+        yield event, "\n".join(data_lines)
 
 def test_backend_connection() -> bool:
+    # /ready answers 200 once the backend has loaded its index and embedding model
     try:
-        with requests.post(
-            BACKEND_URL,
-            json={"question": "test", "messages": []},
-            stream=True,
-            headers={"Accept": "text/event-stream"}
-        ) as response:
-            response.raise_for_status()
-            return next(response.iter_lines(), None) is not None
+        response = requests.get(f"{os.getenv('BACKEND_URL')}/ready", timeout=5)
+        return response.status_code == 200
     except requests.exceptions.RequestException:
         return False
 
@@ -61,20 +77,40 @@ if st.session_state.backend_connected:
             try:
                 with requests.post(
                     BACKEND_URL,
-                    json={"question": prompt, "messages": st.session_state.messages[:-1]},
+                    json={
+                        "question": prompt,
+                        "messages": st.session_state.messages[:-1],
+                        "collections": st.session_state.get("collections", []),
+                        "stream_format": "text"
+                    },
                     stream=True,
                     headers={"Accept": "text/event-stream"}
                 ) as response:
+                    if response.status_code == 429:
+                        retry_after = response.headers.get("Retry-After", "a few")
+                        st.warning(f"The assistant is busy, please retry in {retry_after} seconds.")
+                        st.session_state.messages.pop()
+                        st.stop()
                     response.raise_for_status()
                     
-                    for line in response.iter_lines():
-                        if line and (line := line.decode('utf-8')).startswith('data: '):
-                            try:
-                                content = json.loads(line[6:]).get('answer', '')
-                                full_response += content
+                    last_render = 0.0
+                    for event, data in iter_sse_events(response):
+                        if event == "message":
+                            # Answer text arrives as raw text frames
+                            full_response += data
+                            now = time.monotonic()
+                            if now - last_render >= RENDER_INTERVAL:
                                 message_placeholder.markdown(full_response + "▌")
-                            except json.JSONDecodeError:
-                                continue
+                                last_render = now
+                            continue
+                        try:
+                            data = json.loads(data)
+                        except json.JSONDecodeError:
+                            continue
+                        if event == "queue":
+                            message_placeholder.markdown(f"⏳ Waiting for a free slot (position {data.get('position')} in queue)...")
+                        elif event == "error":
+                            st.error(data.get('error', 'Unknown error'))
                     
                     if not full_response.strip():
                         full_response = "I apologize, but I couldn't generate a response."
@@ -96,6 +132,13 @@ with st.sidebar:
     # Connection status
     status = "🟢 Connected" if st.session_state.backend_connected else "🔴 Disconnected"
     st.markdown(f"**Status:** {status}")
+
+    # Collections to search, the default collection when none is selected
+    try:
+        collections = requests.get(f"{os.getenv('BACKEND_URL')}/collections", timeout=5).json()
+        st.multiselect("Collections", [c['name'] for c in collections], key="collections")
+    except (requests.exceptions.RequestException, ValueError):
+        pass
     
     # Model info
     st.markdown("---")
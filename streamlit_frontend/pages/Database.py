@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 import sys
+import time
 import requests
 from dotenv import load_dotenv
 
@@ -8,15 +9,19 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path='../../.env')
 BACKEND_URL = os.getenv('BACKEND_URL')
 
-def make_request(endpoint: str, method: str = "GET", json_data: dict = None, files: list = None):
+def make_request(endpoint: str, method: str = "GET", json_data: dict = None, files: list = None, params: dict = None):
     try:
         url = f"{BACKEND_URL}/{endpoint}"
         if method == "GET":
-            response = requests.get(url)
+            response = requests.get(url, params=params)
+        elif method == "DELETE":
+            response = requests.delete(url, params=params)
+        elif method == "PUT":
+            response = requests.put(url, files=files, params=params)
         elif files:
-            response = requests.post(url, files=files)
+            response = requests.post(url, files=files, params=params)
         else:
-            response = requests.post(url, json=json_data)
+            response = requests.post(url, json=json_data, params=params)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -26,8 +31,63 @@ def make_request(endpoint: str, method: str = "GET", json_data: dict = None, fil
 def get_config():
     return make_request("config")
 
+def wait_for_job(job_id: str, poll_interval: float = 1.0):
+    """Poll an ingestion job and render per-file progress until it finishes"""
+    status_placeholder = st.empty()
+    while True:
+        job = make_request(f"jobs/{job_id}")
+        if not job:
+            return None
+
+        with status_placeholder.container():
+            for file in job['files']:
+                if file['unchanged']:
+                    st.progress(1.0, text=f"{file['file_name']}: unchanged, {file['chunks_reused']} chunks reused")
+                    continue
+                total = file['chunks_total'] or 1
+                done = file['chunks_written'] + file['chunks_reused']
+                st.progress(
+                    1.0 if file['stage'] == 'completed' else min(done / total, 1.0),
+                    text=f"{file['file_name']}: {file['stage']} - {file['pages_extracted']} pages, "
+                         f"{file['chunks_embedded']}/{file['chunks_total']} chunks embedded, "
+                         f"{file['chunks_written']}/{file['chunks_total']} written, "
+                         f"{file['chunks_reused']} reused, {file['chunks_removed']} removed"
+                )
+
+        if job['status'] in ('completed', 'partial', 'failed'):
+            return job
+        time.sleep(poll_interval)
+
 st.title("Document Database Management")
 
+# Collections (e.g. one per course or tenant), every section below works on the selected one
+st.header("Collection")
+collections = make_request("collections") or []
+collection_names = [c['name'] for c in collections]
+default_name = next((c['name'] for c in collections if c['default']), None)
+col_select, col_create = st.columns(2)
+with col_select:
+    collection = st.selectbox(
+        "Collection",
+        collection_names,
+        index=collection_names.index(default_name) if default_name in collection_names else 0
+    )
+    if collection and collection != default_name and st.button("Drop Collection"):
+        response = make_request(f"collections/{collection}", method="DELETE")
+        if response and response.get("status") == "success":
+            st.success(response.get("message"))
+            st.rerun()
+with col_create:
+    new_collection = st.text_input("New collection name")
+    if new_collection and st.button("Create Collection"):
+        response = make_request("collections", method="POST", json_data={"name": new_collection})
+        if response and response.get("status") == "success":
+            st.success(response.get("message"))
+            st.rerun()
+collection_params = {'collection': collection} if collection and collection != default_name else {}
+# Result of the last explicit recount, dropped by any write to the collection
+scan_key = f"full_scan_summary_{collection}"
+
 # File upload section
 st.header("Upload Documents")
 uploaded_files = st.file_uploader("Choose PDF files", type=['pdf'], accept_multiple_files=True)
@@ -35,41 +95,120 @@ uploaded_files = st.file_uploader("Choose PDF files", type=['pdf'], accept_multi
 if uploaded_files:
     if st.button("Process and Ingest Files"):
         files = [("files", file) for file in uploaded_files]
-        response = make_request("documents/upload", method="POST", files=files)
+        response = make_request("documents/upload", method="POST", files=files, params=collection_params)
+        st.session_state.pop(scan_key, None)
         
         if not response:
             st.error("Failed to upload documents")
         elif response.get("status") == "success":
-            st.success(response.get("message", "Successfully uploaded files!"))
+            st.info(response.get("message", "Files queued for ingestion"))
+            job = wait_for_job(response["job_id"])
+            if job and job["status"] == "completed":
+                st.success("Successfully processed all files!")
+            elif job:
+                for file in job["files"]:
+                    if file["error"]:
+                        st.error(f"{file['file_name']}: {file['error']}")
         else:
             st.error("Failed to upload documents: " + response.get("message", "Unknown error"))
 
+# Single document management section
+st.header("Manage Documents")
+stored_files = make_request("documents/files", params=collection_params) or []
+if stored_files:
+    file_names = [f['file_name'] for f in stored_files]
+    selected_file = st.selectbox("Document", file_names)
+    selected_path = requests.utils.quote(selected_file, safe='')
+
+    col_delete, col_replace = st.columns(2)
+    with col_delete:
+        if st.button("Delete Document"):
+            response = make_request(f"documents/{selected_path}", method="DELETE", params=collection_params)
+            st.session_state.pop(scan_key, None)
+            if response and response.get("status") == "success":
+                st.success(response.get("message"))
+            else:
+                st.error(f"Failed to delete {selected_file}")
+    with col_replace:
+        replacement = st.file_uploader("Replacement file", type=['pdf'], key="replacement")
+        if replacement and st.button("Replace Document"):
+            response = make_request(f"documents/{selected_path}", method="PUT", files=[("file", replacement)], params=collection_params)
+            st.session_state.pop(scan_key, None)
+            if response and response.get("status") == "success":
+                job = wait_for_job(response["job_id"])
+                if job and job["status"] == "completed":
+                    st.success(f"Replaced {selected_file}")
+                else:
+                    st.error(f"Failed to replace {selected_file}")
+            else:
+                st.error(f"Failed to replace {selected_file}")
+else:
+    st.info("No documents have been ingested yet.")
+
 # Document listing section
 st.header("Stored Documents")
-if st.button("List Documents"):
-    results = make_request("documents")
-    if results and results.get('documents'):
-        df_data = {
-            'Source': [m.get('source', 'Unknown') for m in results['metadatas']],
-            'Content': results['documents']
+# Counts come from the manifest; recounting reads every chunk, so it only runs on request
+if st.button("Recount from stored chunks", help="Reads the metadata of every chunk, slow on large collections"):
+    st.session_state[scan_key] = make_request("documents/summary", params={**collection_params, 'full_scan': 'true'})
+summary = st.session_state.get(scan_key) or make_request("documents/summary", params=collection_params) or []
+if summary:
+    st.dataframe(
+        {
+            'File': [f['file_name'] for f in summary],
+            'Chunks': [f['chunk_count'] for f in summary],
+            'Pages': [f['page_count'] if f['page_count'] is not None else '' for f in summary]
+        },
+        hide_index=True
+    )
+    st.info(f"Total chunks: {sum(f['chunk_count'] for f in summary)} in {len(summary)} files")
+
+    # Browse chunks one page at a time instead of loading the whole collection
+    if st.checkbox("Browse chunks"):
+        col_file, col_size, col_text = st.columns(3)
+        with col_file:
+            browse_file = st.selectbox("File", ["All files"] + [f['file_name'] for f in summary])
+        with col_size:
+            page_size = st.selectbox("Chunks per page", [25, 50, 100, 250], index=1)
+        with col_text:
+            show_text = st.checkbox("Show chunk text", value=True)
+
+        total = sum(f['chunk_count'] for f in summary if browse_file in ("All files", f['file_name']))
+        page_count = max(1, (total + page_size - 1) // page_size)
+        page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+
+        params = {
+            **collection_params,
+            'limit': page_size,
+            'offset': (page_number - 1) * page_size,
+            'fields': "documents,metadatas" if show_text else "metadatas"
         }
-        
-        st.dataframe(
-            df_data,
-            column_config={
-                'Source': st.column_config.TextColumn('Source File'),
-                'Content': st.column_config.TextColumn('Content', width='large')
-            },
-            hide_index=True
-        )
-        
-        st.info(f"Total chunks: {len(results['documents'])}")
-    else:
-        st.info("No documents found in the database.")
+        if browse_file != "All files":
+            params['file_name'] = browse_file
+        results = make_request("documents", params=params)
+        if results and results['ids']:
+            df_data = {
+                'Source': [m.get('source', 'Unknown') for m in results['metadatas']],
+                'Page': [m.get('page_number', '') for m in results['metadatas']]
+            }
+            if show_text:
+                df_data['Content'] = results['documents']
+            st.dataframe(
+                df_data,
+                column_config={
+                    'Source': st.column_config.TextColumn('Source File'),
+                    'Content': st.column_config.TextColumn('Content', width='large')
+                },
+                hide_index=True
+            )
+            first = results['offset'] + 1
+            st.caption(f"Chunks {first}-{first + len(results['ids']) - 1} of {results['total'] if results['total'] is not None else total}, page {page_number} of {page_count}")
+else:
+    st.info("No documents found in the database.")
 
 # Add clear database option
 if st.button("Clear Database"):
-    response = make_request("documents/clear", method="POST")
+    response = make_request("documents/clear", method="POST", params=collection_params)
+    st.session_state.pop(scan_key, None)
     if response and response["status"] == "success":
         st.success("Database cleared successfully!")
     else: